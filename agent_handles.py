@@ -0,0 +1,173 @@
+"""
+Shared Vertex AI Agent Handles.
+
+Process-wide registry of VertexAiSessionService instances and agent engine handles so
+they are created once per project/resource instead of on every request, plus an
+optional per-user pool of pre-created sessions that is refilled in the background and
+off-critical-path session cleanup.
+"""
+
+import os
+import time
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Set, Tuple
+
+from app.utils.session_utils import generate_session_user_id
+from .startup import ensure_vertexai_client, lazy_module
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    from google.adk.sessions import VertexAiSessionService
+
+# Imported on first use so worker start-up does not pay for the Vertex AI SDKs
+agent_engines = lazy_module("vertexai.agent_engines")
+adk_sessions = lazy_module("google.adk.sessions")
+
+# Sessions kept ready per user and agent; a session is only ever handed to the user it
+# was created for, so pooling never shares agent state across users or companies
+SESSION_POOL_SIZE = int(os.getenv("AGENT_SESSION_POOL_SIZE", "0"))
+# Pre-created sessions idle for longer than this are deleted instead of being handed out
+SESSION_POOL_MAX_IDLE_SECONDS = float(os.getenv("AGENT_SESSION_POOL_MAX_IDLE_SECONDS", "300"))
+
+_registry_lock = threading.Lock()
+_session_services: Dict[Tuple[str, str], "VertexAiSessionService"] = {}
+_agents: Dict[str, Any] = {}
+_session_pools: Dict[Tuple[str, str], "SessionPool"] = {}
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def get_session_service(project_id: str, location: str) -> "VertexAiSessionService":
+    """Return the shared session service for a project/location, creating it on first use."""
+    key = (project_id, location)
+    service = _session_services.get(key)
+    if service is None:
+        with _registry_lock:
+            service = _session_services.get(key)
+            if service is None:
+                service = adk_sessions.VertexAiSessionService(project_id, location)
+                _session_services[key] = service
+    return service
+
+
+def get_agent_handle(resource_id: str) -> Any:
+    """Return the shared agent engine handle for a resource id, resolving it on first use."""
+    agent = _agents.get(resource_id)
+    if agent is None:
+        with _registry_lock:
+            agent = _agents.get(resource_id)
+            if agent is None:
+                ensure_vertexai_client()
+                agent = agent_engines.get(resource_id)
+                _agents[resource_id] = agent
+    return agent
+
+
+def _run_in_background(coro) -> asyncio.Task:
+    # Keep a strong reference so fire-and-forget tasks are not garbage collected mid-flight
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def _delete_session(service: "VertexAiSessionService", app_name: str, user_id: str, session_id: str):
+    try:
+        await service.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    except Exception as e:
+        logger.warning("Failed to delete agent session %s for %s: %s", session_id, app_name, e)
+
+
+def schedule_session_cleanup(service: "VertexAiSessionService", app_name: str, user_id: str, session_id: str):
+    """Delete an agent session in the background so it stays off the response path."""
+    _run_in_background(_delete_session(service, app_name, user_id, session_id))
+
+
+class SessionPool:
+    def __init__(self, resource_id: str, project_id: str, location: str, prefix: str, size: int = SESSION_POOL_SIZE,
+                 max_idle_seconds: float = SESSION_POOL_MAX_IDLE_SECONDS):
+        self.resource_id = resource_id
+        self.project_id = project_id
+        self.location = location
+        self.prefix = prefix
+        self.size = size
+        self.max_idle_seconds = max_idle_seconds
+        # Ready (created_at, session, unique_user_id) entries keyed by the user they belong to
+        self._ready: Dict[str, List[Tuple[float, Any, str]]] = {}
+        self._refilling: Set[str] = set()
+
+    async def _create(self, user_id: str):
+        service = get_session_service(self.project_id, self.location)
+        # Generate unique user ID to prevent concurrent session conflicts
+        unique_user_id = generate_session_user_id(user_id, prefix=self.prefix)
+        session = await service.create_session(app_name=self.resource_id, user_id=unique_user_id)
+        return service, session, unique_user_id
+
+    def _discard_stale(self):
+        # Delete sessions that sat idle too long, and forget users with none left
+        if not self._ready:
+            return
+        cutoff = time.monotonic() - self.max_idle_seconds
+        service = get_session_service(self.project_id, self.location)
+        for user_id in list(self._ready):
+            ready = self._ready[user_id]
+            for created_at, session, unique_user_id in ready:
+                if created_at < cutoff:
+                    schedule_session_cleanup(service, self.resource_id, unique_user_id, session.id)
+            ready[:] = [entry for entry in ready if entry[0] >= cutoff]
+            if not ready and user_id not in self._refilling:
+                del self._ready[user_id]
+
+    async def _refill(self, user_id: str):
+        try:
+            ready = self._ready.setdefault(user_id, [])
+            while len(ready) < self.size:
+                _, session, unique_user_id = await self._create(user_id)
+                ready.append((time.monotonic(), session, unique_user_id))
+        except Exception as e:
+            logger.warning("Failed to pre-create agent session for %s: %s", self.resource_id, e)
+        finally:
+            self._refilling.discard(user_id)
+
+    def schedule_refill(self, user_id: str):
+        """Top the user's pool back up to its target size in the background."""
+        if self.size <= 0 or user_id in self._refilling or len(self._ready.get(user_id, ())) >= self.size:
+            return
+        self._refilling.add(user_id)
+        _run_in_background(self._refill(user_id))
+
+    async def acquire(self, user_id: str):
+        """
+        Return a ready session, using one pre-created for the same user when available.
+
+        Args:
+            user_id: Caller identifier; sessions are pooled and created per caller
+
+        Returns:
+            tuple: (service, session, unique_user_id)
+        """
+        self._discard_stale()
+        ready = self._ready.get(user_id)
+        if ready:
+            _, session, unique_user_id = ready.pop()
+            self.schedule_refill(user_id)
+            return get_session_service(self.project_id, self.location), session, unique_user_id
+
+        self.schedule_refill(user_id)
+        return await self._create(user_id)
+
+
+def get_session_pool(resource_id: str, project_id: str, location: str, prefix: str) -> SessionPool:
+    """Return the shared session pool for an agent resource."""
+    key = (resource_id, prefix)
+    pool = _session_pools.get(key)
+    if pool is None:
+        with _registry_lock:
+            pool = _session_pools.get(key)
+            if pool is None:
+                pool = SessionPool(resource_id, project_id, location, prefix)
+                _session_pools[key] = pool
+    return pool
@@ -0,0 +1,223 @@
+"""
+Vertex AI Agent Admission Scheduler.
+
+Limits how many agent streams run at once per agent resource. Callers over the limit
+wait in a bounded queue that is served by weighted round-robin across companies, so one
+busy company cannot starve the others. When the queue is full, callers get an explicit
+429 with an estimated wait instead of piling up on the upstream quota.
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from fastapi import HTTPException, status
+from .pipeline_metrics import pipeline_metrics
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = int(os.getenv("AGENT_MAX_CONCURRENCY", "8"))
+DEFAULT_MAX_QUEUE = int(os.getenv("AGENT_MAX_QUEUE", "50"))
+# Initial estimate of an agent run before any run has completed
+DEFAULT_RUN_SECONDS = float(os.getenv("AGENT_EXPECTED_RUN_SECONDS", "60"))
+
+
+def _parse_mapping(value: str, cast) -> Dict[str, object]:
+    # "key=value,key=value" -> {key: cast(value)}
+    mapping = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        key, _, raw = item.partition("=")
+        if raw:
+            mapping[key.strip()] = cast(raw.strip())
+    return mapping
+
+
+class AdmissionTicket:
+    def __init__(self, lane: "_AgentLane", queued_seconds: float):
+        self.queued_seconds = queued_seconds
+        self._lane = lane
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        """Give the slot back; safe to call more than once."""
+        if self._released:
+            return
+        self._released = True
+        self._lane.finish(time.monotonic() - self._started)
+
+
+class _AgentLane:
+    def __init__(self, agent_key: str, limit: int, max_queue: int, weights: Dict[str, int]):
+        self.agent_key = agent_key
+        self.limit = limit
+        self.max_queue = max_queue
+        self.weights = weights
+        self.active = 0
+        self.queued = 0
+        self.avg_run_seconds = DEFAULT_RUN_SECONDS
+        self.queue_waits = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.rejected = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self._rotation: Deque[str] = deque()
+        self._credits: Dict[str, int] = {}
+
+    def estimated_wait(self) -> float:
+        # Everyone ahead must drain through `limit` slots of roughly avg_run_seconds each
+        return (self.queued // max(self.limit, 1) + 1) * self.avg_run_seconds
+
+    def finish(self, run_seconds: Optional[float] = None):
+        self.active -= 1
+        if run_seconds is not None:
+            # Exponentially weighted average keeps the wait estimate current
+            self.avg_run_seconds = 0.8 * self.avg_run_seconds + 0.2 * run_seconds
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.active < self.limit and self._rotation:
+            company_id = self._rotation[0]
+            waiters = self._waiters[company_id]
+            waiter = waiters.popleft()
+            self.queued -= 1
+            self._credits[company_id] -= 1
+            if not waiters:
+                self._rotation.popleft()
+                del self._waiters[company_id]
+                del self._credits[company_id]
+            elif self._credits[company_id] <= 0:
+                # This company used its turn: move it to the back of the rotation
+                self._rotation.rotate(-1)
+                self._credits[company_id] = self.weights.get(company_id, 1)
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(None)
+
+    def _enqueue(self, company_id: str) -> asyncio.Future:
+        waiter = asyncio.get_running_loop().create_future()
+        if company_id not in self._waiters:
+            self._waiters[company_id] = deque()
+            self._credits[company_id] = self.weights.get(company_id, 1)
+            self._rotation.append(company_id)
+        self._waiters[company_id].append(waiter)
+        self.queued += 1
+        return waiter
+
+    def _discard(self, company_id: str, waiter: asyncio.Future):
+        waiters = self._waiters.get(company_id)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            self.queued -= 1
+            if not waiters:
+                self._rotation.remove(company_id)
+                del self._waiters[company_id]
+                del self._credits[company_id]
+
+    async def acquire(self, company_id: str) -> AdmissionTicket:
+        if self.active < self.limit and not self.queued:
+            self.active += 1
+            return AdmissionTicket(self, 0.0)
+
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            retry_after = int(self.estimated_wait()) + 1
+            logger.warning("Agent %s over capacity (%s active, %s queued), rejecting company %s",
+                           self.agent_key, self.active, self.queued, company_id)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Analysis capacity exhausted. Estimated wait: {retry_after} seconds.",
+                headers={"Retry-After": str(retry_after)}
+            )
+
+        queued_at = time.monotonic()
+        waiter = self._enqueue(company_id)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just as the caller went away: hand the slot on
+                self.finish()
+            else:
+                self._discard(company_id, waiter)
+            raise
+
+        queued_seconds = time.monotonic() - queued_at
+        self.queue_waits += 1
+        self.queue_wait_total += queued_seconds
+        self.queue_wait_max = max(self.queue_wait_max, queued_seconds)
+        return AdmissionTicket(self, queued_seconds)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "queue_waits": self.queue_waits,
+            "queue_wait_avg_seconds": self.queue_wait_total / self.queue_waits if self.queue_waits else 0.0,
+            "queue_wait_max_seconds": self.queue_wait_max,
+            "avg_run_seconds": self.avg_run_seconds
+        }
+
+
+class AgentAdmissionScheduler:
+    def __init__(
+        self,
+        default_limit: int = DEFAULT_CONCURRENCY,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        limits: Optional[Dict[str, int]] = None,
+        company_weights: Optional[Dict[str, int]] = None
+    ):
+        self.default_limit = default_limit
+        self.max_queue = max_queue
+        self.limits = limits if limits is not None else _parse_mapping(os.getenv("AGENT_CONCURRENCY_LIMITS", ""), int)
+        self.company_weights = company_weights if company_weights is not None else _parse_mapping(os.getenv("AGENT_COMPANY_WEIGHTS", ""), int)
+        self._lanes: Dict[str, _AgentLane] = {}
+
+    def _lane(self, agent_key: str) -> _AgentLane:
+        lane = self._lanes.get(agent_key)
+        if lane is None:
+            lane = _AgentLane(agent_key, self.limits.get(agent_key, self.default_limit), self.max_queue, self.company_weights)
+            self._lanes[agent_key] = lane
+        return lane
+
+    async def acquire(self, agent_key: str, company_id: str) -> AdmissionTicket:
+        """
+        Wait for a free slot on an agent.
+
+        Args:
+            agent_key: Agent resource id
+            company_id: Company the request is made for, used for fair scheduling
+
+        Returns:
+            AdmissionTicket: Release it when the agent stream has finished
+
+        Raises:
+            HTTPException: 429 with a Retry-After header when the wait queue is full
+        """
+        ticket = await self._lane(agent_key).acquire(company_id)
+        if ticket.queued_seconds:
+            logger.info("Admitted agent %s run for company %s after %.2fs in queue", agent_key, company_id, ticket.queued_seconds)
+        return ticket
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-agent concurrency and queue-time metrics."""
+        return {agent_key: lane.stats() for agent_key, lane in self._lanes.items()}
+
+
+# Shared scheduler for all agent calls in this process
+agent_scheduler = AgentAdmissionScheduler()
+
+
+def _scheduler_samples():
+    for agent_key, lane_stats in agent_scheduler.stats().items():
+        for field, value in lane_stats.items():
+            yield f"agent_scheduler_{field}", {"agent": agent_key}, value
+
+
+pipeline_metrics.register_collector("Agent admission scheduler state.", _scheduler_samples)
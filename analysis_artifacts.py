@@ -0,0 +1,339 @@
+"""
+Upstream Analysis Artifact Loader.
+
+Helpers for reading the JSON outputs of earlier analyses (problem standardization,
+nine windows, functional analysis, ...) from Google Cloud Storage. Downloads run in
+worker threads so async request handlers never block the event loop on GCS I/O.
+
+Downloaded documents are kept in a process-wide LRU keyed by GCS URL and validated
+against the blob generation, so the same upstream result is fetched once and shared by
+every downstream analysis. Each read returns a freshly parsed copy that callers may mutate.
+
+Below the memory LRU sits a local disk tier with its own byte budget. Restarted workers
+find documents there and, once the blob generation has been confirmed with a metadata
+call, skip the download entirely.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .pipeline_metrics import pipeline_metrics
+from .startup import lazy_callable
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+# google.cloud.storage is imported on the first GCS call
+get_storage_client = lazy_callable("app.utils.storage", "get_storage_client")
+
+BUCKET_NAME = "triz_bucket"
+GCS_PREFIX = f"gs://{BUCKET_NAME}/"
+
+UPSTREAM_CACHE_MAX_BYTES = int(os.getenv("UPSTREAM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+UPSTREAM_CACHE_MAX_ENTRIES = int(os.getenv("UPSTREAM_CACHE_MAX_ENTRIES", "512"))
+# Within this window a cached document is served without asking GCS for its generation
+UPSTREAM_CACHE_REVALIDATE_SECONDS = float(os.getenv("UPSTREAM_CACHE_REVALIDATE_SECONDS", "30"))
+# Larger documents are only kept on disk
+UPSTREAM_CACHE_MAX_ENTRY_BYTES = int(os.getenv("UPSTREAM_CACHE_MAX_ENTRY_BYTES", str(8 * 1024 * 1024)))
+ARTIFACT_DISK_CACHE_DIR = os.getenv("ARTIFACT_DISK_CACHE_DIR", os.path.join(tempfile.gettempdir(), "artifact_cache"))
+# Set to 0 to disable the disk tier
+ARTIFACT_DISK_CACHE_MAX_BYTES = int(os.getenv("ARTIFACT_DISK_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+
+def gcs_url_to_blob_path(json_gcs_url: str) -> str:
+    """
+    Convert a gs://triz_bucket/... URL stored on an analysis record to a blob path.
+
+    Args:
+        json_gcs_url: GCS URL as saved in the database
+
+    Returns:
+        str: Blob path relative to the bucket
+    """
+    return json_gcs_url.replace(GCS_PREFIX, "")
+
+
+class DiskArtifactTier:
+    """
+    Local disk LRU of artifact bytes, one file per (URL, generation).
+
+    Recency is kept in file mtimes so that the LRU order survives restarts.
+    """
+
+    def __init__(self, directory: str = ARTIFACT_DISK_CACHE_DIR, max_bytes: int = ARTIFACT_DISK_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = 0
+        # file name -> size, least recently used first
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.enabled = max_bytes > 0
+        if self.enabled:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                self._load_index()
+            except OSError as e:
+                logger.warning("Artifact disk cache disabled, %s is not usable: %s", directory, e)
+                self.enabled = False
+
+    def _load_index(self):
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                # Left behind by a crash during a write
+                os.remove(path)
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._files[name] = size
+            self.size += size
+        self._evict()
+
+    @staticmethod
+    def _prefix(json_gcs_url: str) -> str:
+        return hashlib.sha256(json_gcs_url.encode("utf-8")).hexdigest()[:32]
+
+    def _name(self, json_gcs_url: str, generation: Optional[int]) -> str:
+        return f"{self._prefix(json_gcs_url)}-{generation}.json"
+
+    def _remove(self, name: str):
+        size = self._files.pop(name, None)
+        if size is not None:
+            self.size -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _evict(self):
+        while self.size > self.max_bytes and self._files:
+            self._remove(next(iter(self._files)))
+
+    def read(self, json_gcs_url: str, generation: Optional[int]) -> Optional[bytes]:
+        """Return the stored bytes for this exact generation, or None."""
+        if not self.enabled:
+            return None
+        name = self._name(json_gcs_url, generation)
+        with self._lock:
+            if name not in self._files:
+                return None
+            self._files.move_to_end(name)
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as artifact_file:
+                data = artifact_file.read()
+            os.utime(path)
+        except OSError:
+            # Evicted by another thread between the index check and the read
+            return None
+        return data
+
+    def write(self, json_gcs_url: str, generation: Optional[int], data: bytes):
+        """Store a generation, replacing any older generation of the same URL."""
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+        name = self._name(json_gcs_url, generation)
+        prefix = self._prefix(json_gcs_url)
+        path = os.path.join(self.directory, name)
+        try:
+            # Write to a temp file and rename, so readers never see a partial document
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as artifact_file:
+                artifact_file.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning("Failed to write artifact %s to disk cache: %s", json_gcs_url, e)
+            return
+        with self._lock:
+            for stale in [existing for existing in self._files if existing.startswith(prefix) and existing != name]:
+                self._remove(stale)
+            self.size -= self._files.pop(name, 0)
+            self._files[name] = len(data)
+            self.size += len(data)
+            self._evict()
+
+    def invalidate(self, json_gcs_url: str):
+        if not self.enabled:
+            return
+        prefix = self._prefix(json_gcs_url)
+        with self._lock:
+            for name in [existing for existing in self._files if existing.startswith(prefix)]:
+                self._remove(name)
+
+
+class UpstreamArtifactCache:
+    """
+    Size-bounded LRU of upstream JSON documents, backed by a DiskArtifactTier.
+
+    Entries hold the raw JSON bytes, which are immutable; every hit is parsed again so no
+    caller can modify what another one receives. Parsing is cheaper than a deep copy.
+    """
+
+    def __init__(self, max_bytes: int = UPSTREAM_CACHE_MAX_BYTES, max_entries: int = UPSTREAM_CACHE_MAX_ENTRIES,
+                 revalidate_seconds: float = UPSTREAM_CACHE_REVALIDATE_SECONDS,
+                 max_entry_bytes: int = UPSTREAM_CACHE_MAX_ENTRY_BYTES, disk: Optional[DiskArtifactTier] = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.revalidate_seconds = revalidate_seconds
+        self.max_entry_bytes = max_entry_bytes
+        self.disk = disk if disk is not None else DiskArtifactTier()
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # url -> (generation, json bytes, last validated at)
+        self._entries: "OrderedDict[str, tuple[Optional[int], bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, json_gcs_url: str, generation: Optional[int] = None) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(json_gcs_url)
+            if entry is None:
+                return None
+            cached_generation, text, validated_at = entry
+            if generation is None:
+                if time.monotonic() - validated_at > self.revalidate_seconds:
+                    return None
+            elif generation != cached_generation:
+                return None
+            else:
+                self._entries[json_gcs_url] = (cached_generation, text, time.monotonic())
+            self._entries.move_to_end(json_gcs_url)
+            return text
+
+    def _store(self, json_gcs_url: str, generation: Optional[int], text: bytes):
+        with self._lock:
+            self._discard(json_gcs_url)
+            if len(text) > min(self.max_bytes, self.max_entry_bytes):
+                return
+            self._entries[json_gcs_url] = (generation, text, time.monotonic())
+            self.size += len(text)
+            while self.size > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def _discard(self, json_gcs_url: str):
+        entry = self._entries.pop(json_gcs_url, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def get(self, json_gcs_url: str) -> Any:
+        """
+        Return the parsed document at a GCS URL, downloading it only if it changed (blocking).
+
+        Args:
+            json_gcs_url: GCS URL of the JSON artifact
+
+        Returns:
+            Parsed JSON content, owned by the caller
+
+        Raises:
+            FileNotFoundError: If the blob does not exist
+        """
+        text = self._lookup(json_gcs_url)
+        if text is None:
+            blob = get_storage_client().bucket(BUCKET_NAME).get_blob(gcs_url_to_blob_path(json_gcs_url))
+            if blob is None:
+                self.invalidate(json_gcs_url)
+                raise FileNotFoundError(f"Artifact not found: {json_gcs_url}")
+            text = self._lookup(json_gcs_url, blob.generation)
+            if text is not None:
+                self.hits += 1
+            else:
+                text = self.disk.read(json_gcs_url, blob.generation)
+                if text is not None:
+                    self.disk_hits += 1
+                else:
+                    self.misses += 1
+                    # Pin the generation so a concurrent overwrite can't pair old metadata with new bytes
+                    text = blob.download_as_bytes(if_generation_match=blob.generation)
+                    self.disk.write(json_gcs_url, blob.generation, text)
+                self._store(json_gcs_url, blob.generation, text)
+        else:
+            self.hits += 1
+        return json.loads(text)
+
+    def invalidate(self, json_gcs_url: str):
+        """Drop a document, e.g. after the upstream analysis that wrote it was re-run."""
+        with self._lock:
+            self._discard(json_gcs_url)
+        self.disk.invalidate(json_gcs_url)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "disk_bytes": self.disk.size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses
+            }
+
+
+# Shared cache for upstream analysis outputs in this process
+upstream_artifacts = UpstreamArtifactCache()
+
+
+def invalidate_upstream_artifact(json_gcs_url: Optional[str]):
+    """
+    Forget a cached upstream document.
+
+    Services that re-run an upstream analysis should call this with the previous
+    json_gcs_url; readers on other instances pick up the new blob generation on
+    their next revalidation.
+    """
+    if json_gcs_url:
+        upstream_artifacts.invalidate(json_gcs_url)
+
+
+def download_json_artifact(json_gcs_url: str) -> Any:
+    """
+    Download and parse a JSON artifact from GCS through the shared upstream cache (blocking).
+
+    Args:
+        json_gcs_url: GCS URL of the JSON artifact
+
+    Returns:
+        Parsed JSON content
+    """
+    return upstream_artifacts.get(json_gcs_url)
+
+
+async def fetch_json_artifacts(json_gcs_urls: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Download several JSON artifacts concurrently without blocking the event loop.
+
+    Args:
+        json_gcs_urls: Mapping of artifact name to GCS URL
+
+    Returns:
+        Dict[str, Any]: Mapping of artifact name to parsed JSON content
+
+    Raises:
+        Exception: The first download or parse error encountered
+    """
+    names: List[str] = list(json_gcs_urls)
+    results = await asyncio.gather(*(
+        asyncio.to_thread(download_json_artifact, json_gcs_urls[name])
+        for name in names
+    ))
+    return dict(zip(names, results))
+
+
+def _upstream_cache_samples():
+    for field, value in upstream_artifacts.stats().items():
+        yield f"upstream_artifact_cache_{field}", {}, value
+
+
+pipeline_metrics.register_collector("Upstream artifact cache state.", _upstream_cache_samples)
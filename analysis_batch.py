@@ -0,0 +1,210 @@
+"""
+Batch Analyses.
+
+Runs one analysis type over many innovations of a company in a single call, instead of
+one HTTP call per innovation that repeats the access check, company lookup and
+prerequisite queries:
+
+- load_batch_innovations looks the company up once and authorizes every innovation;
+  the services then check prerequisites for the whole batch with one query each;
+- run_bounded prefetches upstream inputs and prepares records a few at a time;
+- AnalysisBatch runs each item as an AnalysisJob on the shared worker pool, so agent
+  parallelism stays bounded by ANALYSIS_JOB_WORKERS and items can still be polled by
+  job id after the client has disconnected, and streams per-item progress events
+  (one line per event for text/plain clients) ending with a summary.
+"""
+
+import os
+import uuid
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.models.models import Company, Innovation
+from app.services.problem_standardisation import check_user_access_to_innovation
+from .analysis_jobs import JOB_COMPLETED, AnalysisJob, analysis_jobs
+from .stream_events import StreamEvent
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_ITEMS = int(os.getenv("ANALYSIS_BATCH_MAX_ITEMS", "200"))
+# Upstream downloads and record writes in flight at once while a batch is prepared
+BATCH_PREPARE_CONCURRENCY = int(os.getenv("ANALYSIS_BATCH_PREPARE_CONCURRENCY", "8"))
+
+BATCH_ITEM_DENIED = "Access denied: User does not have access to this innovation or innovation not found"
+
+
+def normalize_innovation_ids(innovation_ids: Sequence[str]) -> List[str]:
+    """
+    Deduplicate the requested innovation ids, keeping their order.
+
+    Raises:
+        HTTPException: 400 if no ids were given, 413 if there are more than BATCH_MAX_ITEMS
+    """
+    unique = list(dict.fromkeys(str(innovation_id) for innovation_id in innovation_ids if innovation_id))
+    if not unique:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one innovation id is required"
+        )
+    if len(unique) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch can contain at most {BATCH_MAX_ITEMS} innovations, got {len(unique)}"
+        )
+    return unique
+
+
+def load_batch_innovations(db: Session, user_id: str, company_id: str,
+                           innovation_ids: Sequence[str]) -> Tuple[Company, Dict[str, Innovation]]:
+    """
+    Look up the company of a batch and authorize each of its innovations.
+
+    Every id goes through check_user_access_to_innovation, the same rule the single
+    endpoints apply, so no item of a batch is authorized on behalf of another.
+
+    Args:
+        db: Database session
+        user_id: Id of the requesting user
+        company_id: Company the innovations must belong to
+        innovation_ids: Requested innovation ids
+
+    Returns:
+        tuple: (company, innovations by id); ids missing from the mapping were denied or
+        not found and must be rejected
+
+    Raises:
+        HTTPException: 404 if the company does not exist
+    """
+    company = db.query(Company).filter(Company.id == company_id).first()
+    if not company:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Company not found"
+        )
+
+    innovations: Dict[str, Innovation] = {}
+    for innovation_id in innovation_ids:
+        innovation = check_user_access_to_innovation(db, user_id, company_id, innovation_id)
+        if innovation:
+            innovations[innovation_id] = innovation
+    denied = len(innovation_ids) - len(innovations)
+    if denied:
+        logger.warning("Denied %s of %s innovations in a batch for user %s", denied, len(innovation_ids), user_id)
+    return company, innovations
+
+
+async def run_bounded(calls: Dict[str, Callable[[], Awaitable[Any]]],
+                      concurrency: int = BATCH_PREPARE_CONCURRENCY) -> Dict[str, Any]:
+    """
+    Await several coroutine factories, at most `concurrency` at a time.
+
+    Returns:
+        Dict[str, Any]: Each key's result, or the exception it raised
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def call(factory: Callable[[], Awaitable[Any]]):
+        async with semaphore:
+            return await factory()
+
+    names = list(calls)
+    results = await asyncio.gather(*(call(calls[name]) for name in names), return_exceptions=True)
+    return dict(zip(names, results))
+
+
+class AnalysisBatch:
+    """
+    Per-item progress of one batch call.
+
+    Every item ends in exactly one of: rejected (failed validation before it was
+    queued), cached (served from the result cache), completed or failed.
+    """
+
+    def __init__(self, analysis_type: str, company_id: str, user_id: str):
+        self.batch_id = uuid.uuid4().hex
+        self.analysis_type = analysis_type
+        self.company_id = company_id
+        self.user_id = user_id
+        self.counts = {"rejected": 0, "cached": 0, "completed": 0, "failed": 0}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._open = 0
+
+    def _emit(self, event: StreamEvent):
+        self._queue.put_nowait(event)
+
+    def _progress(self, innovation_id: str, stage: str, job: Optional[AnalysisJob] = None, **data) -> StreamEvent:
+        payload = {"innovationId": innovation_id, "stage": stage, **data}
+        if job:
+            payload["jobId"] = job.job_id
+        line = f"[{innovation_id}] {stage}"
+        if data.get("url"):
+            line += f": {data['url']}"
+        return StreamEvent("progress", payload, text=line + "\n")
+
+    def reject(self, innovation_id: str, error: str):
+        """Record an item that failed validation and will not run."""
+        self.counts["rejected"] += 1
+        self._emit(StreamEvent("error", {"innovationId": innovation_id, "stage": "rejected", "message": error},
+                               text=f"[{innovation_id}] rejected: {error}\n"))
+
+    def cached(self, innovation_id: str, response: BaseModel):
+        """Record an item served from the result cache, pollable like a finished job."""
+        job = analysis_jobs.complete(AnalysisJob(self.analysis_type, innovation_id, self.company_id, self.user_id), response)
+        self.counts["cached"] += 1
+        self._emit(self._progress(innovation_id, "cached", job, url=getattr(response, "gcs_url", None)))
+
+    def submit(self, innovation_id: str, runner: Callable[[], Awaitable[BaseModel]]) -> AnalysisJob:
+        """
+        Queue one item on the shared job pool, reporting when it starts and finishes.
+
+        The outcome is reported from the job task's done-callback, so an item cancelled
+        while still queued is counted as failed as well.
+
+        Raises:
+            HTTPException: 429 if the job queue is full
+        """
+        job = AnalysisJob(self.analysis_type, innovation_id, self.company_id, self.user_id)
+
+        async def run_item():
+            self._emit(self._progress(innovation_id, "running", job))
+            return await runner()
+
+        job = analysis_jobs.submit(job, run_item)
+        self._open += 1
+        self._emit(self._progress(innovation_id, "queued", job))
+        job.task.add_done_callback(lambda _task: self._finish(innovation_id, job))
+        return job
+
+    def _finish(self, innovation_id: str, job: AnalysisJob):
+        self._open -= 1
+        if job.status == JOB_COMPLETED:
+            self.counts["completed"] += 1
+            self._emit(self._progress(innovation_id, "completed", job, url=(job.result or {}).get("gcs_url")))
+            return
+        message = job.error or "Cancelled"
+        self.counts["failed"] += 1
+        self._emit(StreamEvent("error", {"innovationId": innovation_id, "stage": "failed",
+                                         "jobId": job.job_id, "message": message},
+                               text=f"[{innovation_id}] failed: {message}\n"))
+
+    async def events(self) -> AsyncIterator[StreamEvent]:
+        """
+        Progress events until every queued item has finished, then a summary.
+
+        Closing the stream does not cancel the items; they keep running as jobs.
+        """
+        while self._open or not self._queue.empty():
+            yield await self._queue.get()
+        summary = ", ".join(f"{count} {outcome}" for outcome, count in self.counts.items())
+        logger.info("%s batch %s finished: %s", self.analysis_type, self.batch_id, summary)
+        yield StreamEvent("progress", {"stage": "batch_completed", "batchId": self.batch_id, **self.counts},
+                          text=f"Batch {self.batch_id} finished: {summary}\n")
+
+    def response_headers(self) -> Dict[str, str]:
+        return {"X-Batch-Id": self.batch_id}
@@ -0,0 +1,212 @@
+"""
+Analysis Result Cache.
+
+Caches completed agent analyses keyed by a hash of the formatted agent context plus
+the agent resource id, so identical re-runs are served without starting a Vertex AI
+agent session. Entries live in a bounded in-memory LRU tier backed by a GCS tier,
+and both tiers honour the same TTL.
+
+Signed URLs expire long before a 24h entry does, so entries only keep the gs:// paths
+of their artifacts; every hit gets freshly signed URLs and its own copy of the entry.
+"""
+
+import os
+import copy
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Optional, Dict, Any
+
+from .startup import lazy_callable
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+# google.cloud.storage is imported on the first GCS call
+get_storage_client = lazy_callable("app.utils.storage", "get_storage_client")
+
+BUCKET_NAME = "triz_bucket"
+CACHE_PREFIX = "analysis_cache"
+DEFAULT_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "128"))
+GCS_TIER_ENABLED = os.getenv("ANALYSIS_CACHE_GCS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Lifetime of the URLs signed for a cache hit
+SIGNED_URL_HOURS = int(os.getenv("ANALYSIS_CACHE_SIGNED_URL_HOURS", "24"))
+
+
+def make_cache_key(context_data: Any, resource_id: str) -> str:
+    """
+    Build a content-hash cache key for an agent run.
+
+    Args:
+        context_data: Formatted agent context (e.g. output of format_innovation_for_patent)
+        resource_id: Vertex AI agent resource id
+
+    Returns:
+        str: Hex SHA-256 digest identifying the inputs
+    """
+    digest = hashlib.sha256()
+    digest.update(resource_id.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(json.dumps(context_data, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def sign_gcs_url(gcs_url: str, bucket_name: str = BUCKET_NAME, hours: int = SIGNED_URL_HOURS) -> str:
+    """
+    Sign a GET URL for a gs:// URL or a blob path in bucket_name (blocking).
+
+    Args:
+        gcs_url: gs://bucket/path as stored on analysis records, or a bare blob path
+        bucket_name: Bucket of bare blob paths
+        hours: Lifetime of the signed URL
+
+    Returns:
+        str: V4 signed URL
+    """
+    if gcs_url.startswith("gs://"):
+        bucket_name, _, path = gcs_url[len("gs://"):].partition("/")
+    else:
+        path = gcs_url
+    blob = get_storage_client().bucket(bucket_name).blob(path)
+    return blob.generate_signed_url(version="v4", expiration=timedelta(hours=hours), method="GET")
+
+
+class AnalysisResultCache:
+    def __init__(
+        self,
+        analysis_type: str,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        use_gcs: bool = GCS_TIER_ENABLED,
+        bucket_name: str = BUCKET_NAME,
+        signed_urls: Optional[Dict[str, str]] = None
+    ):
+        self.analysis_type = analysis_type
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.use_gcs = use_gcs
+        self.bucket_name = bucket_name
+        # Signed URL field -> field holding the gs:// path it is signed from; only the
+        # paths are stored
+        self.signed_urls = dict(signed_urls or {})
+        self._entries: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _blob_path(self, key: str) -> str:
+        return f"{CACHE_PREFIX}/{self.analysis_type}/{key}.json"
+
+    def _is_fresh(self, stored_at: float) -> bool:
+        return time.time() - stored_at < self.ttl_seconds
+
+    def _remember(self, key: str, stored_at: float, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (stored_at, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _hit(self, key: str, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # The caller's own copy, with URLs signed now rather than when the entry was stored
+        entry = copy.deepcopy(entry)
+        try:
+            for url_field, path_field in self.signed_urls.items():
+                path = entry.get(path_field)
+                entry[url_field] = sign_gcs_url(path, self.bucket_name) if path else None
+        except Exception as e:
+            logger.warning("Analysis cache could not sign URLs for %s/%s, treating as a miss: %s",
+                           self.analysis_type, key, e)
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a copy of a cached entry with freshly signed URLs, or None.
+
+        Blocking: URLs are signed on every hit, and the GCS tier may be consulted.
+        """
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached:
+                stored_at, entry = cached
+                if self._is_fresh(stored_at):
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    entry = None
+            else:
+                entry = None
+        if entry is not None:
+            return self._hit(key, entry)
+
+        if not self.use_gcs:
+            return None
+
+        try:
+            blob = get_storage_client().bucket(self.bucket_name).blob(self._blob_path(key))
+            if not blob.exists():
+                return None
+            payload = json.loads(blob.download_as_text())
+        except Exception as e:
+            logger.warning("Analysis cache GCS lookup failed for %s/%s: %s", self.analysis_type, key, e)
+            return None
+
+        stored_at = payload.get("stored_at", 0)
+        if not self._is_fresh(stored_at):
+            return None
+
+        entry = payload.get("entry")
+        if not isinstance(entry, dict):
+            return None
+        # Entries written before URLs were re-signed on each hit may still carry signed URLs
+        entry = {field: value for field, value in entry.items() if field not in self.signed_urls}
+        self._remember(key, stored_at, entry)
+        return self._hit(key, entry)
+
+    def put(self, key: str, entry: Dict[str, Any]):
+        """
+        Store a copy of an entry in both tiers, without its signed URLs.
+
+        Blocking when the GCS tier is enabled.
+        """
+        entry = copy.deepcopy({field: value for field, value in entry.items() if field not in self.signed_urls})
+        stored_at = time.time()
+        self._remember(key, stored_at, entry)
+
+        if not self.use_gcs:
+            return
+
+        try:
+            blob = get_storage_client().bucket(self.bucket_name).blob(self._blob_path(key))
+            blob.upload_from_string(
+                json.dumps({"stored_at": stored_at, "entry": entry}),
+                content_type="application/json"
+            )
+        except Exception as e:
+            logger.warning("Analysis cache GCS store failed for %s/%s: %s", self.analysis_type, key, e)
+
+    def invalidate(self, key: str):
+        """Drop an entry from both tiers."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+        if not self.use_gcs:
+            return
+
+        try:
+            blob = get_storage_client().bucket(self.bucket_name).blob(self._blob_path(key))
+            if blob.exists():
+                blob.delete()
+        except Exception as e:
+            logger.warning("Analysis cache GCS invalidation failed for %s/%s: %s", self.analysis_type, key, e)
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, entry: Dict[str, Any]):
+        await asyncio.to_thread(self.put, key, entry)
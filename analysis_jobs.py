@@ -0,0 +1,185 @@
+"""
+Background Analysis Jobs.
+
+Runs long agent analyses on a bounded in-process worker pool so the submitting HTTP
+request returns immediately with a job id. Clients poll the job for its status and
+fetch the result once it has completed.
+"""
+
+import os
+import uuid
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", "4"))
+JOB_MAX_PENDING = int(os.getenv("ANALYSIS_JOB_MAX_PENDING", "500"))
+JOB_RETENTION = int(os.getenv("ANALYSIS_JOB_RETENTION", "1000"))
+
+JOB_QUEUED = "QUEUED"
+JOB_RUNNING = "RUNNING"
+JOB_COMPLETED = "COMPLETED"
+JOB_FAILED = "FAILED"
+
+
+class AnalysisJobResponse(BaseModel):
+    jobId: str
+    analysisType: str
+    status: str
+    innovationId: str
+    companyId: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    submittedAt: datetime
+    startedAt: Optional[datetime] = None
+    finishedAt: Optional[datetime] = None
+
+
+class AnalysisJob:
+    def __init__(self, analysis_type: str, innovation_id: str, company_id: str, user_id: str):
+        self.job_id = uuid.uuid4().hex
+        self.analysis_type = analysis_type
+        self.innovation_id = innovation_id
+        self.company_id = company_id
+        self.user_id = user_id
+        self.status = JOB_QUEUED
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.submitted_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        # Worker task once the job is queued; done after its final status is set
+        self.task: Optional[asyncio.Task] = None
+
+    def to_response(self) -> AnalysisJobResponse:
+        return AnalysisJobResponse(
+            jobId=self.job_id,
+            analysisType=self.analysis_type,
+            status=self.status,
+            innovationId=self.innovation_id,
+            companyId=self.company_id,
+            result=self.result,
+            error=self.error,
+            submittedAt=self.submitted_at,
+            startedAt=self.started_at,
+            finishedAt=self.finished_at
+        )
+
+
+class AnalysisJobManager:
+    def __init__(self, max_workers: int = JOB_WORKERS, max_pending: int = JOB_MAX_PENDING, retention: int = JOB_RETENTION):
+        self.max_pending = max_pending
+        self.retention = retention
+        self._jobs: "OrderedDict[str, AnalysisJob]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+        self._workers = asyncio.Semaphore(max_workers)
+        self._pending = 0
+
+    def _prune(self):
+        # Drop the oldest finished jobs once the retention limit is exceeded
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.retention:
+                break
+            if self._jobs[job_id].status in (JOB_COMPLETED, JOB_FAILED):
+                del self._jobs[job_id]
+
+    def complete(self, job: AnalysisJob, result: BaseModel) -> AnalysisJob:
+        """Register a job that finished without running, e.g. a result cache hit."""
+        job.status = JOB_COMPLETED
+        job.result = result.model_dump() if hasattr(result, "model_dump") else result.dict()
+        job.started_at = job.finished_at = datetime.now()
+        self._jobs[job.job_id] = job
+        self._prune()
+        return job
+
+    def submit(self, job: AnalysisJob, runner: Callable[[], Awaitable[BaseModel]]) -> AnalysisJob:
+        """
+        Queue a job on the worker pool.
+
+        Args:
+            job: Job metadata
+            runner: Coroutine factory running the analysis pipeline and returning its response
+
+        Returns:
+            AnalysisJob: The queued job
+
+        Raises:
+            HTTPException: 429 if the pending queue is full
+        """
+        if self._pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many analyses queued. Please retry later."
+            )
+
+        self._jobs[job.job_id] = job
+        self._prune()
+        self._pending += 1
+        task = asyncio.create_task(self._run(job, runner))
+        job.task = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda _task: self._settle(job))
+        return job
+
+    def _settle(self, job: AnalysisJob):
+        # A task cancelled before it first ran never reached the handlers in _run
+        if job.status == JOB_QUEUED:
+            self._pending -= 1
+            job.status = JOB_FAILED
+            job.error = "Cancelled"
+            job.finished_at = datetime.now()
+
+    async def _run(self, job: AnalysisJob, runner: Callable[[], Awaitable[BaseModel]]):
+        try:
+            async with self._workers:
+                self._pending -= 1
+                job.status = JOB_RUNNING
+                job.started_at = datetime.now()
+                try:
+                    result = await runner()
+                    job.result = result.model_dump() if hasattr(result, "model_dump") else result.dict()
+                    job.status = JOB_COMPLETED
+                except HTTPException as e:
+                    job.status = JOB_FAILED
+                    job.error = str(e.detail)
+                except Exception as e:
+                    logger.exception("Analysis job %s failed: %s", job.job_id, e)
+                    job.status = JOB_FAILED
+                    job.error = str(e)
+                finally:
+                    job.finished_at = datetime.now()
+        except asyncio.CancelledError:
+            if job.status == JOB_QUEUED:
+                self._pending -= 1
+            job.status = JOB_FAILED
+            job.error = "Cancelled"
+            job.finished_at = datetime.now()
+            raise
+
+    def get(self, job_id: str, user_id: str) -> AnalysisJob:
+        """
+        Look up a job submitted by the given user.
+
+        Raises:
+            HTTPException: 404 if the job is unknown or belongs to another user
+        """
+        job = self._jobs.get(job_id)
+        if not job or job.user_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Analysis job not found"
+            )
+        return job
+
+
+# Shared job manager for all analyses in this process
+analysis_jobs = AnalysisJobManager()
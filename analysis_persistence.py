@@ -0,0 +1,74 @@
+"""
+Analysis Output Persistence Stage.
+
+Uploads every output artifact of an analysis concurrently on a bounded thread pool so
+the blocking GCS client never runs on the event loop and the stage costs roughly as
+much as the slowest single upload.
+"""
+
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+UPLOAD_WORKERS = int(os.getenv("GCS_UPLOAD_WORKERS", "8"))
+
+_upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="gcs-upload")
+
+# An upload job returns (gcs_path, signed_url), like gcs_service.upload_text_to_gcs
+UploadJob = Callable[[], Tuple[str, str]]
+
+
+async def persist_artifacts(jobs: Dict[str, Optional[UploadJob]]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """
+    Run all upload jobs of an analysis concurrently on the shared upload pool.
+
+    Args:
+        jobs: Mapping of artifact name to a zero-argument upload callable; None entries
+              are skipped and reported as (None, None)
+
+    Returns:
+        Dict[str, Tuple[Optional[str], Optional[str]]]: (gcs_path, signed_url) per artifact
+
+    Raises:
+        Exception: The first upload error, after all uploads have settled
+    """
+    loop = asyncio.get_running_loop()
+    names = [name for name, job in jobs.items() if job is not None]
+    results = await asyncio.gather(
+        *(loop.run_in_executor(_upload_executor, jobs[name]) for name in names),
+        return_exceptions=True
+    )
+
+    persisted: Dict[str, Tuple[Optional[str], Optional[str]]] = {name: (None, None) for name in jobs}
+    first_error = None
+    for name, result in zip(names, results):
+        if isinstance(result, BaseException):
+            logger.error("Upload of artifact %s failed: %s", name, result)
+            first_error = first_error or result
+            continue
+        persisted[name] = result
+
+    if first_error:
+        raise first_error
+    return persisted
+
+
+async def settle_persists(tasks: List[asyncio.Task]):
+    """
+    Settle background persist tasks started while an analysis was streaming.
+
+    Call it in a finally block: after a failure or cancellation the unfinished tasks are
+    cancelled, and every task is awaited so none is left running unobserved.
+    """
+    pending = [task for task in tasks if not task.done()]
+    for task in pending:
+        task.cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning("Background persist failed: %s", result)
@@ -0,0 +1,132 @@
+"""
+Analysis Status Transitions.
+
+Every status change of a per-innovation analysis record (Patent, PhysicalContradiction)
+goes through an AnalysisStatusStore: one upsert that carries the new status together
+with all result fields, committed on a short-lived session from SessionLocal's
+connection pool in a worker thread. Callers keep no ORM record or request session open
+across the agent run, and each transition costs a single statement and commit.
+
+Upserts use INSERT ... ON CONFLICT (innovation_id) DO UPDATE on PostgreSQL and SQLite
+when the table has a unique constraint on innovation_id; otherwise an UPDATE followed,
+only for a missing record, by an INSERT in the same transaction.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import UniqueConstraint, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.database.database import SessionLocal
+from app.models.models import AnalysisStatus, Patent, PhysicalContradiction
+from .pipeline_metrics import pipeline_metrics
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+_ON_CONFLICT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _unique_on_innovation(table) -> bool:
+    # ON CONFLICT needs a unique constraint or index on exactly innovation_id
+    if table.c.innovation_id.unique:
+        return True
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint) and [column.name for column in constraint.columns] == ["innovation_id"]:
+            return True
+    return any(index.unique and [column.name for column in index.columns] == ["innovation_id"] for index in table.indexes)
+
+
+class AnalysisStatusStore:
+    def __init__(self, model, analysis_type: str, result_fields: Sequence[str], touch_column: Optional[str] = None):
+        self.model = model
+        self.analysis_type = analysis_type
+        # Result columns cleared when a new run starts
+        self.result_fields = list(result_fields)
+        self.touch_column = touch_column
+        self.session_factory = SessionLocal
+        self._on_conflict = _unique_on_innovation(model.__table__)
+
+    def _values(self, status_value: AnalysisStatus, fields: Dict[str, Any]) -> Dict[str, Any]:
+        values = {"status": status_value, **fields}
+        if self.touch_column:
+            values[self.touch_column] = datetime.now()
+        return values
+
+    def _upsert(self, session, innovation_id: Any, values: Dict[str, Any]):
+        dialect_insert = _ON_CONFLICT_INSERTS.get(session.get_bind().dialect.name)
+        if self._on_conflict and dialect_insert is not None:
+            statement = dialect_insert(self.model).values(innovation_id=innovation_id, **values)
+            session.execute(statement.on_conflict_do_update(index_elements=["innovation_id"], set_=values))
+            return
+        result = session.execute(update(self.model).where(self.model.innovation_id == innovation_id).values(**values))
+        if result.rowcount == 0:
+            session.execute(insert(self.model).values(innovation_id=innovation_id, **values))
+
+    def write(self, innovation_id: Any, status_value: AnalysisStatus, fields: Dict[str, Any], create: bool = True):
+        """
+        Apply one status transition and commit it (blocking).
+
+        Args:
+            innovation_id: Innovation the record belongs to
+            status_value: New status
+            fields: Other columns to set in the same statement
+            create: Insert the record if it does not exist yet; otherwise only update it
+        """
+        values = self._values(status_value, fields)
+        session = self.session_factory()
+        try:
+            if create:
+                self._upsert(session, innovation_id, values)
+            else:
+                session.execute(update(self.model).where(self.model.innovation_id == innovation_id).values(**values))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    async def transition(self, innovation_id: Any, status_value: AnalysisStatus, create: bool = True, **fields):
+        """Apply one status transition on a pooled session off the event loop."""
+        with pipeline_metrics.stage(self.analysis_type, "db_commit"):
+            await asyncio.to_thread(self.write, innovation_id, status_value, fields, create)
+
+    async def start(self, innovation_id: Any):
+        """Set the record IN_PROGRESS with the results of any previous run cleared, creating it if needed."""
+        await self.transition(innovation_id, AnalysisStatus.IN_PROGRESS,
+                              error=None, **{field: None for field in self.result_fields})
+
+    async def complete(self, innovation_id: Any, **results):
+        """Set the record COMPLETED together with all of its result fields."""
+        await self.transition(innovation_id, AnalysisStatus.COMPLETED, error=None, **results)
+
+    async def fail(self, innovation_id: Any, error: str, status_value: AnalysisStatus = AnalysisStatus.FAILED,
+                   create: bool = True):
+        """Set the record FAILED (or e.g. cancelled) with an error message, never raising."""
+        try:
+            await self.transition(innovation_id, status_value, create=create, error=error)
+        except Exception as e:
+            # Don't mask the original failure if the status update fails
+            logger.error("Failed to record %s status %s for innovation %s: %s",
+                         self.analysis_type, status_value, innovation_id, e)
+
+
+patent_status = AnalysisStatusStore(
+    Patent,
+    "patent",
+    result_fields=["gcs_url", "json_gcs_url"],
+    touch_column="updated_at"
+)
+
+physical_contradiction_status = AnalysisStatusStore(
+    PhysicalContradiction,
+    "physical_contradiction",
+    result_fields=[
+        "gcs_url", "json_gcs_url", "model_of_problem_gcs_url", "model_of_problem_response",
+        "sub_agents_gcs_url", "last_agent_gcs_url"
+    ]
+)
@@ -0,0 +1,7 @@
+"""
+Offline benchmarks for the analysis pipelines.
+
+Runs the patent and Physical Contradiction endpoint functions against local stand-ins
+for the Vertex AI agent, the session service and GCS, so throughput and latency can be
+measured without cloud access. See pipeline_benchmark.py for usage.
+"""
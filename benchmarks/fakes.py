@@ -0,0 +1,254 @@
+"""
+Local stand-ins for the cloud services used by the analysis pipelines.
+
+- FakeAgent: agent engine handle whose async_stream_query streams a canned response
+  at a configurable token rate, chunk size, first-token latency and failure rate.
+- FakeSessionService: VertexAiSessionService replacement with configurable latency.
+- FakeStorageClient: in-memory or on-disk GCS bucket with blob generations.
+- FakeGcsService: the gcs_service upload helpers, writing into the fake bucket.
+- FakeDb: a SQLAlchemy session stand-in answering the pipelines' queries and status writes.
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import asyncio
+import threading
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+
+class FakeAgent:
+    def __init__(self, target_key: str, tokens_per_second: float = 200.0, chunk_chars: int = 64,
+                 first_token_latency: float = 1.0, response_chars: int = 20000, failure_rate: float = 0.0):
+        self.target_key = target_key
+        self.tokens_per_second = tokens_per_second
+        self.chunk_chars = chunk_chars
+        self.first_token_latency = first_token_latency
+        self.response_chars = response_chars
+        self.failure_rate = failure_rate
+
+    def _response(self, message: str) -> str:
+        # Prose followed by the structured JSON the pipelines extract
+        prose = "Analysis in progress. " * max(1, (self.response_chars // 2) // 22)
+        items = [{"id": index, "summary": "finding " * 8} for index in range(max(1, (self.response_chars // 2) // 90))]
+        # The target key sits at the top level of the document, as in the real agents' output
+        payload = json.dumps({self.target_key: items, "input_bytes": len(message)}, indent=2)
+        return prose + "\n```json\n" + payload + "\n```\n"
+
+    async def async_stream_query(self, user_id: str, session_id: str, message: str) -> AsyncIterator[Dict[str, Any]]:
+        await asyncio.sleep(self.first_token_latency)
+        text = self._response(message)
+        # Roughly four characters per token
+        chunk_delay = (self.chunk_chars / 4) / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        fail_at = len(text) * random.random() if random.random() < self.failure_rate else None
+        for start in range(0, len(text), self.chunk_chars):
+            if fail_at is not None and start >= fail_at:
+                raise RuntimeError("Simulated agent failure")
+            yield {"content": {"parts": [{"text": text[start:start + self.chunk_chars]}]}}
+            if chunk_delay:
+                await asyncio.sleep(chunk_delay)
+
+
+class FakeSessionService:
+    def __init__(self, latency: float = 0.2):
+        self.latency = latency
+        self.created = 0
+        self.deleted = 0
+
+    async def create_session(self, app_name: str, user_id: str):
+        await asyncio.sleep(self.latency)
+        self.created += 1
+        return SimpleNamespace(id=uuid.uuid4().hex, app_name=app_name, user_id=user_id)
+
+    async def delete_session(self, app_name: str, user_id: str, session_id: str):
+        await asyncio.sleep(self.latency)
+        self.deleted += 1
+
+
+class FakeBlob:
+    def __init__(self, bucket: "FakeBucket", name: str):
+        self.bucket = bucket
+        self.name = name
+
+    @property
+    def generation(self) -> Optional[int]:
+        entry = self.bucket._get(self.name)
+        return entry[1] if entry else None
+
+    def exists(self) -> bool:
+        return self.bucket._get(self.name) is not None
+
+    def download_as_bytes(self, if_generation_match: Optional[int] = None) -> bytes:
+        entry = self.bucket._get(self.name)
+        if entry is None:
+            raise FileNotFoundError(self.name)
+        if if_generation_match is not None and entry[1] != if_generation_match:
+            raise RuntimeError(f"Generation mismatch for {self.name}")
+        self.bucket.downloads += 1
+        return entry[0]
+
+    def download_as_text(self, if_generation_match: Optional[int] = None) -> str:
+        return self.download_as_bytes(if_generation_match).decode("utf-8")
+
+    def upload_from_string(self, data, content_type: Optional[str] = None, if_generation_match: Optional[int] = None):
+        if if_generation_match == 0 and self.exists():
+            raise RuntimeError(f"{self.name} already exists")
+        self.bucket._put(self.name, data.encode("utf-8") if isinstance(data, str) else data)
+
+    def compose(self, sources):
+        self.bucket._put(self.name, b"".join(source.download_as_bytes() for source in sources))
+
+    def generate_signed_url(self, version: str = "v4", expiration=None, method: str = "GET") -> str:
+        return f"https://storage.local/{self.bucket.name}/{self.name}"
+
+    def upload_from_filename(self, filename: str, content_type: Optional[str] = None):
+        with open(filename, "rb") as source:
+            self.bucket._put(self.name, source.read())
+
+
+class FakeBucket:
+    """Blob store kept in memory, or under a directory when one is given."""
+
+    def __init__(self, name: str, directory: Optional[str] = None, latency: float = 0.0):
+        self.name = name
+        self.directory = directory
+        self.latency = latency
+        self.uploads = 0
+        self.downloads = 0
+        self._blobs: Dict[str, Tuple[bytes, int]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name.replace("/", "__"))
+
+    def _get(self, name: str) -> Optional[Tuple[bytes, int]]:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            entry = self._blobs.get(name)
+        if entry and self.directory:
+            with open(self._path(name), "rb") as source:
+                return source.read(), entry[1]
+        return entry
+
+    def _put(self, name: str, data: bytes):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            generation = self._blobs.get(name, (b"", 0))[1] + 1
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(self._path(name), "wb") as target:
+                    target.write(data)
+                self._blobs[name] = (b"", generation)
+            else:
+                self._blobs[name] = (data, generation)
+            self.uploads += 1
+
+    def blob(self, name: str) -> FakeBlob:
+        return FakeBlob(self, name)
+
+    def get_blob(self, name: str) -> Optional[FakeBlob]:
+        return FakeBlob(self, name) if self._get(name) is not None else None
+
+
+class FakeStorageClient:
+    def __init__(self, directory: Optional[str] = None, latency: float = 0.0):
+        self.directory = directory
+        self.latency = latency
+        self._buckets: Dict[str, FakeBucket] = {}
+
+    def bucket(self, name: str) -> FakeBucket:
+        if name not in self._buckets:
+            directory = os.path.join(self.directory, name) if self.directory else None
+            self._buckets[name] = FakeBucket(name, directory, self.latency)
+        return self._buckets[name]
+
+
+class FakeGcsService:
+    def __init__(self, client: FakeStorageClient):
+        self.client = client
+
+    def _path(self, innovation_id: str, company_id: str, analysis_type: str, extension: str) -> str:
+        return f"{company_id}/{innovation_id}/{analysis_type}_{uuid.uuid4().hex[:8]}.{extension}"
+
+    def upload_text_to_gcs(self, text: str, innovation_id: str, company_id: str, analysis_type: str,
+                           bucket_name: str, project_id: Optional[str] = None) -> Tuple[str, str]:
+        path = self._path(innovation_id, company_id, analysis_type, "txt")
+        self.client.bucket(bucket_name).blob(path).upload_from_string(text)
+        return f"gs://{bucket_name}/{path}", f"https://storage.local/{bucket_name}/{path}"
+
+    def save_json_to_gcs(self, json_data: Any, innovation_id: str, company_id: str, analysis_type: str,
+                         bucket_name: str, project_id: Optional[str] = None) -> Tuple[str, str]:
+        path = self._path(innovation_id, company_id, analysis_type, "json")
+        self.client.bucket(bucket_name).blob(path).upload_from_string(json.dumps(json_data))
+        return f"gs://{bucket_name}/{path}", f"https://storage.local/{bucket_name}/{path}"
+
+
+class FakeQuery:
+    def __init__(self, result: Any):
+        self._result = result
+
+    def __getattr__(self, name: str):
+        # filter, select_from, outerjoin, order_by, ... all keep the chain going
+        return lambda *args, **kwargs: self
+
+    def first(self) -> Any:
+        return self._result
+
+    def all(self) -> list:
+        return [self._result] if self._result is not None else []
+
+
+class FakeDb:
+    """
+    Session stand-in: query(Model) answers with records[Model]; column queries
+    (e.g. the labelled prerequisite join) answer with records["row"].
+    """
+
+    def __init__(self, records: Dict[Any, Any], query_latency: float = 0.0):
+        self.records = records
+        self.query_latency = query_latency
+        self.commits = 0
+        self.statements = 0
+
+    def query(self, *entities) -> FakeQuery:
+        if self.query_latency:
+            time.sleep(self.query_latency)
+        entity = entities[0] if entities else None
+        if isinstance(entity, type):
+            return FakeQuery(self.records.get(entity))
+        return FakeQuery(self.records.get("row"))
+
+    def execute(self, statement: Any):
+        # Status upserts from analysis_status; every UPDATE finds its record
+        if self.query_latency:
+            time.sleep(self.query_latency)
+        self.statements += 1
+        return SimpleNamespace(rowcount=1)
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(name="benchmark"))
+
+    def add(self, instance: Any):
+        self.records[type(instance)] = instance
+
+    def delete(self, instance: Any):
+        self.records.pop(type(instance), None)
+
+    def flush(self):
+        pass
+
+    def commit(self):
+        if self.query_latency:
+            time.sleep(self.query_latency)
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,257 @@
+"""
+Pipeline Load Benchmark.
+
+Drives the patent or Physical Contradiction endpoint functions concurrently against the
+local fakes in benchmarks.fakes and reports throughput, p50/p99 latency, time to first
+token, event-loop lag and peak RSS, plus the per-stage means from pipeline_metrics.
+
+Usage (from the project root):
+    python -m app.services.benchmarks.pipeline_benchmark --analysis patent --mode stream \\
+        --requests 200 --concurrency 50 --tokens-per-second 400 --chunk-chars 32
+
+Service settings such as AGENT_MAX_CONCURRENCY, GCS_UPLOAD_WORKERS,
+CONTENT_ADDRESSED_STORAGE or STREAM_COALESCE_MS are read from the environment as usual,
+so the same command compares configurations.
+"""
+
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import resource
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+# The streamers initialise the Vertex AI client on first use; keep the benchmark offline
+import app.utils.vertexai_utils as vertexai_utils
+vertexai_utils.get_vertexai_client = lambda *args, **kwargs: None
+
+from .. import agent_handles, analysis_artifacts, analysis_cache, analysis_status, content_store, stream_log, patent, physical_contradiction
+from ..stream_output import stream_output_totals
+from ..pipeline_metrics import pipeline_metrics
+from .fakes import FakeAgent, FakeDb, FakeGcsService, FakeSessionService, FakeStorageClient
+
+BUCKET_NAME = "triz_bucket"
+
+
+class Sample:
+    def __init__(self):
+        self.latency: Optional[float] = None
+        self.first_token: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile; None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+class LoopLagMonitor:
+    """Samples how late a periodic timer fires, i.e. how long callbacks hold the loop."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+class PipelineBenchmark:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:8]
+        self.module = patent if args.analysis == "patent" else physical_contradiction
+        self.storage = FakeStorageClient(args.gcs_dir, args.gcs_latency)
+        self.sessions = FakeSessionService(args.session_latency)
+        self._install()
+
+    def _install(self):
+        for module in (analysis_artifacts, analysis_cache, content_store, stream_log, patent, physical_contradiction):
+            if hasattr(module, "get_storage_client"):
+                module.get_storage_client = lambda: self.storage
+        fake_gcs = FakeGcsService(self.storage)
+        patent.gcs_service = fake_gcs
+        physical_contradiction.gcs_service = fake_gcs
+
+        # Status transitions open their own sessions
+        self.status_db = FakeDb({}, self.args.db_latency)
+        for store in (analysis_status.patent_status, analysis_status.physical_contradiction_status):
+            store.session_factory = lambda: self.status_db
+
+        access = lambda db, user_id, company_id, innovation_id: SimpleNamespace(
+            id=innovation_id, innovation_name=f"benchmark {innovation_id}"
+        )
+        patent.check_user_access_to_innovation = access
+        physical_contradiction.check_user_access_to_innovation = access
+
+        for module, target_key in ((patent, "results"), (physical_contradiction, "model_of_problem")):
+            streamer = module.streamer
+            agent_handles._session_services[(streamer.project_id, streamer.location)] = self.sessions
+            agent_handles._agents[streamer.resource_id] = FakeAgent(
+                target_key,
+                tokens_per_second=self.args.tokens_per_second,
+                chunk_chars=self.args.chunk_chars,
+                first_token_latency=self.args.first_token_latency,
+                response_chars=self.args.response_chars,
+                failure_rate=self.args.failure_rate
+            )
+
+    def _seed_upstream(self, innovation_id: str) -> Dict[str, str]:
+        # Distinct upstream documents per request so result caches never short-circuit a run
+        urls = {}
+        padding = "x" * self.args.upstream_chars
+        for name in ("problem", "nine_windows", "functional"):
+            path = f"benchmark/{innovation_id}/{name}.json"
+            document = {"innovation": innovation_id, "section": name, "details": padding}
+            self.storage.bucket(BUCKET_NAME).blob(path).upload_from_string(json.dumps(document, indent=2))
+            urls[name] = f"gs://{BUCKET_NAME}/{path}"
+        return urls
+
+    def _make_db(self, innovation_id: str, urls: Dict[str, str]) -> FakeDb:
+        models = self.module
+        records = {
+            models.Company: SimpleNamespace(id="benchmark-company"),
+            models.ProblemStandardization: SimpleNamespace(json_gcs_url=urls["problem"]),
+            "row": SimpleNamespace(innovation_id=innovation_id, problem=urls["problem"],
+                                   nine_windows=urls["nine_windows"], functional=urls["functional"])
+        }
+        return FakeDb(records, self.args.db_latency)
+
+    async def _one(self, index: int) -> Sample:
+        sample = Sample()
+        innovation_id = f"bench-{self.run_id}-{index}"
+        db = self._make_db(innovation_id, self._seed_upstream(innovation_id))
+        user = SimpleNamespace(id="benchmark-user")
+        if self.module is patent:
+            req = patent.PatentRequest(companyId="benchmark-company", innovationId=innovation_id, format=self.args.format)
+            run, stream = patent.generate_patent_analysis, patent.generate_patent_analysis_stream
+        else:
+            req = physical_contradiction.PhysicalContradictionRequest(companyId="benchmark-company", innovationId=innovation_id,
+                                                                     format=self.args.format)
+            run = physical_contradiction.generate_physical_contradiction_analysis
+            stream = physical_contradiction.generate_physical_contradiction_analysis_stream
+
+        started = time.perf_counter()
+        try:
+            if self.args.mode == "run":
+                await run(req, current_user=user, db=db)
+            else:
+                response = await stream(req, current_user=user, db=db)
+                async for chunk in response.body_iterator:
+                    if sample.first_token is None:
+                        sample.first_token = time.perf_counter() - started
+                    text = chunk.decode("utf-8", "replace") if isinstance(chunk, bytes) else chunk
+                    if "❌ Error" in text or "event: error" in text:
+                        sample.error = "stream error"
+        except Exception as e:
+            sample.error = f"{type(e).__name__}: {getattr(e, 'detail', e)}"
+        sample.latency = time.perf_counter() - started
+        return sample
+
+    async def run(self) -> Dict[str, Any]:
+        monitor = LoopLagMonitor()
+        monitor.start()
+        limit = asyncio.Semaphore(self.args.concurrency)
+
+        async def bounded(index: int) -> Sample:
+            async with limit:
+                return await self._one(index)
+
+        started = time.perf_counter()
+        samples = await asyncio.gather(*(bounded(index) for index in range(self.args.requests)))
+        wall = time.perf_counter() - started
+        await monitor.stop()
+        return self._report(samples, wall, monitor.samples)
+
+    def _report(self, samples: List[Sample], wall: float, lags: List[float]) -> Dict[str, Any]:
+        succeeded = [sample for sample in samples if not sample.error]
+        latencies = [sample.latency for sample in succeeded]
+        first_tokens = [sample.first_token for sample in succeeded if sample.first_token is not None]
+        errors: Dict[str, int] = {}
+        for sample in samples:
+            if sample.error:
+                errors[sample.error] = errors.get(sample.error, 0) + 1
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+        stages = pipeline_metrics.snapshot(self.args.analysis)
+        return {
+            "analysis": self.args.analysis,
+            "mode": self.args.mode,
+            "requests": len(samples),
+            "concurrency": self.args.concurrency,
+            "succeeded": len(succeeded),
+            "errors": errors,
+            "wall_seconds": wall,
+            "throughput_rps": len(succeeded) / wall if wall else 0.0,
+            "latency_p50": percentile(latencies, 0.50),
+            "latency_p99": percentile(latencies, 0.99),
+            "first_token_p50": percentile(first_tokens, 0.50),
+            "first_token_p99": percentile(first_tokens, 0.99),
+            "loop_lag_p99": percentile(lags, 0.99),
+            "loop_lag_max": max(lags) if lags else None,
+            "peak_rss_mb": peak_rss_mb,
+            "gcs_uploads": self.storage.bucket(BUCKET_NAME).uploads,
+            "gcs_downloads": self.storage.bucket(BUCKET_NAME).downloads,
+            "sessions_created": self.sessions.created,
+            "status_writes": self.status_db.commits,
+            "stream_items": stream_output_totals["items"],
+            "stream_frames": stream_output_totals["frames"],
+            "stage_means": {name: values["mean"] for name, values in sorted(stages.items())}
+        }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline load benchmark for the analysis pipelines")
+    parser.add_argument("--analysis", choices=["patent", "physical_contradiction"], default="patent")
+    parser.add_argument("--mode", choices=["run", "stream"], default="stream",
+                        help="run = blocking endpoint, stream = streaming endpoint")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--format", choices=["text", "sse"], default="text", help="Streaming wire format")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0, help="Per-stream agent token rate")
+    parser.add_argument("--chunk-chars", type=int, default=64, help="Characters per agent chunk")
+    parser.add_argument("--first-token-latency", type=float, default=0.5, help="Agent delay before the first chunk (s)")
+    parser.add_argument("--response-chars", type=int, default=20000, help="Approximate agent response size")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of agent runs that fail mid-stream")
+    parser.add_argument("--session-latency", type=float, default=0.1, help="Session create/delete latency (s)")
+    parser.add_argument("--gcs-latency", type=float, default=0.02, help="Per-call fake GCS latency (s)")
+    parser.add_argument("--gcs-dir", default=None, help="Keep fake GCS blobs on disk under this directory")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="Per-query/commit fake DB latency (s)")
+    parser.add_argument("--upstream-chars", type=int, default=20000, help="Size of each upstream document")
+    parser.add_argument("--output", default=None, help="Also write the report as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    report = asyncio.run(PipelineBenchmark(args).run())
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Content-Addressed Artifact Storage.
+
+Opt-in (CONTENT_ADDRESSED_STORAGE=true) storage for analysis outputs. Each blob is
+keyed by the SHA-256 of its bytes under cas/sha256/, so identical outputs (e.g. the
+Physical Contradiction JSON that is also saved as the model of problem, or a re-run
+producing the same text) are uploaded once. Uploads are skipped when the hash already
+exists. A text made of already stored parts is assembled server-side with a GCS compose
+instead of being uploaded again.
+
+Every analysis run writes a small manifest naming the blobs it produced, so the
+artifacts of a run can still be listed per innovation.
+"""
+
+import os
+import json
+import hashlib
+import asyncio
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from .pipeline_metrics import pipeline_metrics
+from .startup import lazy_callable
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+# google.cloud.storage is imported on the first GCS call
+get_storage_client = lazy_callable("app.utils.storage", "get_storage_client")
+
+CONTENT_ADDRESSED_STORAGE = os.getenv("CONTENT_ADDRESSED_STORAGE", "false").lower() == "true"
+SIGNED_URL_HOURS = int(os.getenv("CAS_SIGNED_URL_HOURS", "168"))
+BUCKET_NAME = "triz_bucket"
+CAS_PREFIX = "cas/sha256"
+MANIFEST_PREFIX = "manifests"
+# Hashes known to exist, so repeated outputs skip even the existence check
+KNOWN_HASHES_MAX = 10000
+
+
+class ContentStore:
+    def __init__(self, bucket_name: str = BUCKET_NAME, enabled: bool = CONTENT_ADDRESSED_STORAGE):
+        self.bucket_name = bucket_name
+        self.enabled = enabled
+        self.uploaded = 0
+        self.deduplicated = 0
+        self.bytes_saved = 0
+        self._known: "OrderedDict[str, None]" = OrderedDict()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    def _bucket(self):
+        return get_storage_client().bucket(self.bucket_name)
+
+    @staticmethod
+    def blob_path(digest: str, extension: str) -> str:
+        return f"{CAS_PREFIX}/{digest[:2]}/{digest}.{extension}"
+
+    def _hash_lock(self, digest: str) -> threading.Lock:
+        with self._registry_lock:
+            lock = self._locks.get(digest)
+            if lock is None:
+                lock = self._locks[digest] = threading.Lock()
+            return lock
+
+    def _remember(self, digest: str):
+        with self._registry_lock:
+            self._known[digest] = None
+            self._known.move_to_end(digest)
+            while len(self._known) > KNOWN_HASHES_MAX:
+                self._known.popitem(last=False)
+            # The lock is only needed until the blob is known to exist
+            self._locks.pop(digest, None)
+
+    def _is_known(self, digest: str) -> bool:
+        with self._registry_lock:
+            return digest in self._known
+
+    def _urls(self, path: str) -> Tuple[str, str]:
+        blob = self._bucket().blob(path)
+        signed_url = blob.generate_signed_url(version="v4", expiration=timedelta(hours=SIGNED_URL_HOURS), method="GET")
+        return f"gs://{self.bucket_name}/{path}", signed_url
+
+    def _ensure(self, data: bytes, extension: str, content_type: str, digest: Optional[str] = None, build=None) -> str:
+        digest = digest or hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest, extension)
+        if self._is_known(digest):
+            self._count_duplicate(len(data))
+            return path
+        # Concurrent writers of the same content wait for the first one instead of uploading twice
+        with self._hash_lock(digest):
+            if self._is_known(digest):
+                self._count_duplicate(len(data))
+                return path
+            blob = self._bucket().blob(path)
+            if blob.exists():
+                self._count_duplicate(len(data))
+            elif build is not None:
+                build(blob)
+                self.uploaded += 1
+            else:
+                try:
+                    # Create-only: another instance writing the same hash is not an error
+                    blob.upload_from_string(data, content_type=content_type, if_generation_match=0)
+                    self.uploaded += 1
+                except Exception as e:
+                    if not blob.exists():
+                        raise
+                    logger.debug("Content %s was stored concurrently: %s", digest, e)
+            self._remember(digest)
+        return path
+
+    def _count_duplicate(self, size: int):
+        self.deduplicated += 1
+        self.bytes_saved += size
+
+    def put_text(self, text: str, parts: Optional[List[str]] = None) -> Tuple[str, str]:
+        """
+        Store text by content hash (blocking).
+
+        Args:
+            text: Text to store
+            parts: Optional pieces whose concatenation is exactly `text`; they are stored
+                on their own and the full text is composed from them in GCS
+
+        Returns:
+            Tuple[str, str]: (gs:// URL, signed URL)
+        """
+        data = text.encode("utf-8")
+        pieces = [part for part in (parts or []) if part]
+
+        def compose_pieces(blob):
+            sources = [self._bucket().blob(self._ensure(piece.encode("utf-8"), "txt", "text/plain; charset=utf-8"))
+                       for piece in pieces]
+            blob.content_type = "text/plain; charset=utf-8"
+            blob.compose(sources)
+
+        composable = 1 < len(pieces) <= 32 and "".join(pieces) == text
+        path = self._ensure(data, "txt", "text/plain; charset=utf-8", build=compose_pieces if composable else None)
+        return self._urls(path)
+
+    def put_json(self, data: Any) -> Tuple[str, str]:
+        """Store a JSON document by the hash of its serialized bytes (blocking)."""
+        payload = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+        return self._urls(self._ensure(payload, "json", "application/json"))
+
+    def write_manifest(self, analysis_type: str, innovation_id: str, company_id: str,
+                       artifacts: Dict[str, Tuple[Optional[str], Optional[str]]]) -> Optional[str]:
+        """
+        Record which content blobs one analysis run produced (blocking).
+
+        Args:
+            analysis_type: e.g. "patent" or "physical_contradiction"
+            innovation_id: Innovation id
+            company_id: Company id
+            artifacts: Artifact name -> (gs:// URL, signed URL) as returned by persist_artifacts
+
+        Returns:
+            gs:// URL of the manifest, or None when content-addressed storage is disabled
+        """
+        if not self.enabled:
+            return None
+        created_at = datetime.now()
+        manifest = {
+            "analysis_type": analysis_type,
+            "innovation_id": innovation_id,
+            "company_id": company_id,
+            "created_at": created_at.isoformat(),
+            "artifacts": {name: urls[0] for name, urls in artifacts.items() if urls and urls[0]}
+        }
+        path = f"{MANIFEST_PREFIX}/{analysis_type}/{company_id}/{innovation_id}/{created_at.strftime('%Y%m%dT%H%M%S%f')}.json"
+        self._bucket().blob(path).upload_from_string(json.dumps(manifest, indent=2), content_type="application/json")
+        return f"gs://{self.bucket_name}/{path}"
+
+    async def awrite_manifest(self, analysis_type: str, innovation_id: str, company_id: str,
+                              artifacts: Dict[str, Tuple[Optional[str], Optional[str]]]) -> Optional[str]:
+        """write_manifest off the event loop; failures are logged, never raised."""
+        if not self.enabled:
+            return None
+        try:
+            return await asyncio.to_thread(self.write_manifest, analysis_type, innovation_id, company_id, artifacts)
+        except Exception as e:
+            logger.warning("Failed to write %s manifest for innovation %s: %s", analysis_type, innovation_id, e)
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        return {"uploaded": self.uploaded, "deduplicated": self.deduplicated, "bytes_saved": self.bytes_saved}
+
+
+# Shared content store for analysis outputs in this process
+content_store = ContentStore()
+
+
+def _content_store_samples():
+    for field, value in content_store.stats().items():
+        yield f"content_store_{field}_total", {}, value
+
+
+pipeline_metrics.register_collector("Content-addressed artifact storage totals.", _content_store_samples)
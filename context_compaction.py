@@ -0,0 +1,153 @@
+"""
+Agent Context Compaction.
+
+Serializes the context sent to an agent as compact JSON instead of pretty-printed
+JSON, optionally prunes fields an agent does not use, and enforces a per-agent size
+budget by dropping the lowest-value sections first. With debug logging enabled, every
+compaction also measures the pretty-printed size and reports how many bytes it saved.
+
+Profiles are configured per agent through the environment:
+    AGENT_CONTEXT_MAX_BYTES_<PROFILE>   byte budget for the query (0 = unlimited)
+    AGENT_CONTEXT_PRUNE_KEYS_<PROFILE>  comma-separated keys removed at any depth
+    AGENT_CONTEXT_DROP_EMPTY            "true" to also remove null/empty values
+"""
+
+import os
+import json
+from typing import Any, Dict, List, Optional, Sequence
+from .pipeline_metrics import pipeline_metrics
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+DROP_EMPTY = os.getenv("AGENT_CONTEXT_DROP_EMPTY", "false").lower() == "true"
+
+_EMPTY = (None, "", [], {})
+
+
+class ContextProfile:
+    def __init__(self, name: str, max_bytes: int = 0, prune_keys: Sequence[str] = (),
+                 trim_order: Sequence[str] = (), drop_empty: bool = DROP_EMPTY):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.prune_keys = frozenset(prune_keys)
+        # Top-level sections, lowest value first, that may be dropped to meet the budget
+        self.trim_order = list(trim_order)
+        self.drop_empty = drop_empty
+
+    @classmethod
+    def from_env(cls, name: str, trim_order: Sequence[str] = ()) -> "ContextProfile":
+        suffix = name.upper()
+        prune_keys = [key.strip() for key in os.getenv(f"AGENT_CONTEXT_PRUNE_KEYS_{suffix}", "").split(",") if key.strip()]
+        return cls(
+            name,
+            max_bytes=int(os.getenv(f"AGENT_CONTEXT_MAX_BYTES_{suffix}", "0")),
+            prune_keys=prune_keys,
+            trim_order=trim_order
+        )
+
+
+class CompactedContext:
+    def __init__(self, query: str, original_bytes: Optional[int], dropped_sections: List[str]):
+        self.query = query
+        self.original_bytes = original_bytes
+        self.compact_bytes = len(query.encode("utf-8"))
+        self.dropped_sections = dropped_sections
+
+    @property
+    def saved_bytes(self) -> Optional[int]:
+        # Only known when the pretty-printed size was measured
+        if self.original_bytes is None:
+            return None
+        return self.original_bytes - self.compact_bytes
+
+
+CONTEXT_PROFILES: Dict[str, ContextProfile] = {
+    "patent": ContextProfile.from_env("patent"),
+    # Company context is the core input; the nine windows view is the most expendable
+    "physical_contradiction": ContextProfile.from_env(
+        "physical_contradiction",
+        trim_order=["window_analysis", "ideality_improvement_analysis"]
+    ),
+}
+
+# Running totals for monitoring
+compaction_totals = {"requests": 0, "compact_bytes": 0, "trimmed_requests": 0}
+
+
+def _prune(value: Any, prune_keys: frozenset, drop_empty: bool) -> Any:
+    if isinstance(value, dict):
+        pruned = {}
+        for key, item in value.items():
+            if key in prune_keys:
+                continue
+            item = _prune(item, prune_keys, drop_empty)
+            if drop_empty and item in _EMPTY:
+                continue
+            pruned[key] = item
+        return pruned
+    if isinstance(value, list):
+        items = (_prune(item, prune_keys, drop_empty) for item in value)
+        return [item for item in items if not (drop_empty and item in _EMPTY)]
+    return value
+
+
+def _dumps(value: Any) -> str:
+    # Compact separators and raw UTF-8 instead of \uXXXX escapes
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def compact_context(context_data: dict, profile: Optional[str] = None) -> CompactedContext:
+    """
+    Serialize agent context compactly, within the profile's byte budget.
+
+    Args:
+        context_data: Context dict built by the service's formatter
+        profile: Name of a CONTEXT_PROFILES entry; None only compacts whitespace
+
+    Returns:
+        CompactedContext: The query string, and the size savings when debug logging is enabled
+    """
+    settings = CONTEXT_PROFILES.get(profile) if profile else None
+    # The pretty-printed size is a second full serialization, only paid for when it is logged
+    measure = logger.isEnabledFor(logging.DEBUG)
+    original_bytes = len(json.dumps(context_data, indent=2, default=str).encode("utf-8")) if measure else None
+
+    data = context_data
+    if settings and (settings.prune_keys or settings.drop_empty):
+        data = _prune(context_data, settings.prune_keys, settings.drop_empty)
+
+    query = _dumps(data)
+    dropped: List[str] = []
+    if settings and settings.max_bytes and isinstance(data, dict):
+        for section in settings.trim_order:
+            if len(query.encode("utf-8")) <= settings.max_bytes:
+                break
+            if section in data:
+                data = {key: item for key, item in data.items() if key != section}
+                dropped.append(section)
+                query = _dumps(data)
+        if len(query.encode("utf-8")) > settings.max_bytes:
+            logger.warning("Context for %s is %s bytes after trimming, over its %s byte budget",
+                           profile, len(query.encode("utf-8")), settings.max_bytes)
+
+    compacted = CompactedContext(query, original_bytes, dropped)
+    compaction_totals["requests"] += 1
+    compaction_totals["compact_bytes"] += compacted.compact_bytes
+    if dropped:
+        compaction_totals["trimmed_requests"] += 1
+        logger.info("Dropped %s from the %s context to fit its budget", ", ".join(dropped), profile)
+    if measure:
+        logger.debug("Compacted %s context from %s to %s bytes (saved %s, ~%s tokens)",
+                     profile or "agent", compacted.original_bytes, compacted.compact_bytes, compacted.saved_bytes,
+                     compacted.saved_bytes // 4)
+    return compacted
+
+
+def _compaction_samples():
+    for field, value in compaction_totals.items():
+        yield f"agent_context_compaction_{field}", {}, value
+
+
+pipeline_metrics.register_collector("Agent context compaction totals.", _compaction_samples)
@@ -0,0 +1,294 @@
+"""
+Single-Pass JSON Extraction.
+
+Scans agent output once and yields every complete top-level JSON object it contains,
+together with its position in the text. The scanner is incremental: chunks can be fed
+while the agent is still streaming, and each object is reported as soon as it closes.
+"""
+
+import re
+import json
+from typing import Any, Iterable, List, Optional, Tuple, Union
+
+# Characters that change the scanner state inside a candidate object
+_SIGNIFICANT = re.compile(r'[{}\[\]"\\]')
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def find_key_value(data: Any, key: str) -> Any:
+    """
+    Depth-first search for the first value stored under a key.
+
+    Args:
+        data: Parsed JSON (dict, list or scalar)
+        key: Key to look for
+
+    Returns:
+        The value if found, None otherwise
+    """
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if key in node:
+                return node[key]
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+    return None
+
+
+def find_key_path(data: Any, key: str) -> Optional[List[Union[str, int]]]:
+    """
+    Path (dict keys and list indexes) to the value find_key_value returns.
+
+    Uses the same traversal order, so the path and the value always agree.
+    """
+    stack: List[Tuple[Any, List[Union[str, int]]]] = [(data, [])]
+    while stack:
+        node, path = stack.pop()
+        if isinstance(node, dict):
+            if key in node:
+                return path + [key]
+            stack.extend(reversed([(value, path + [name]) for name, value in node.items()]))
+        elif isinstance(node, list):
+            stack.extend(reversed([(value, path + [index]) for index, value in enumerate(node)]))
+    return None
+
+
+class JsonDocument:
+    def __init__(self, value: dict, start: int, end: int, target: Any = None, target_span: Optional[Tuple[int, int]] = None):
+        self.value = value
+        self.start = start
+        self.end = end
+        self.target = target
+        self.target_span = target_span
+
+    @property
+    def span(self) -> Tuple[int, int]:
+        return self.start, self.end
+
+    @property
+    def has_target(self) -> bool:
+        return self.target is not None
+
+
+class JsonExtraction:
+    def __init__(self, document: Optional[dict] = None, target: Any = None,
+                 document_span: Optional[Tuple[int, int]] = None, target_span: Optional[Tuple[int, int]] = None):
+        self.document = document
+        self.target = target
+        self.document_span = document_span
+        self.target_span = target_span
+
+
+class IncrementalJsonExtractor:
+    """
+    Streaming scanner for JSON objects embedded in free text.
+
+    Offsets are character offsets into the concatenated response text.
+    """
+
+    def __init__(self, target_key: Optional[str] = None):
+        self.target_key = target_key
+        self.documents: List[JsonDocument] = []
+        self._offset = 0
+        self._reset_candidate()
+
+    def _reset_candidate(self):
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._candidate_start = None
+        self._candidate_parts: List[str] = []
+        self._containers: List[int] = []
+        self._spans = {}
+
+    def feed(self, chunk: str) -> List[JsonDocument]:
+        """
+        Scan the next chunk of response text.
+
+        Args:
+            chunk: Newly received text
+
+        Returns:
+            List[JsonDocument]: Objects that were completed by this chunk
+        """
+        found: List[JsonDocument] = []
+        self._scan(chunk, found)
+        self.documents.extend(found)
+        return found
+
+    def close(self) -> List[JsonDocument]:
+        """
+        Finish the stream, rescanning any object that never closed.
+
+        A stray opening brace in prose would otherwise hide every object after it.
+        """
+        found: List[JsonDocument] = []
+        while self._candidate_start is not None:
+            start = self._candidate_start
+            text = "".join(self._candidate_parts)
+            self._reset_candidate()
+            self._offset = start + 1
+            self._scan(text[1:], found)
+        self.documents.extend(found)
+        return found
+
+    def result(self) -> JsonExtraction:
+        """
+        Return the last object containing the target key, or the last object if none does.
+        """
+        chosen = None
+        for document in reversed(self.documents):
+            if chosen is None:
+                chosen = document
+            if document.has_target or not self.target_key:
+                chosen = document
+                break
+        if chosen is None:
+            return JsonExtraction()
+        return JsonExtraction(chosen.value, chosen.target, chosen.span, chosen.target_span)
+
+    def _scan(self, text: str, found: List[JsonDocument]):
+        index = 0
+        segment_start = 0
+        # Position of a character escaped by a backslash, which must not change state
+        skip = 0 if self._escape else -1
+        self._escape = False
+        while True:
+            if self._candidate_start is None:
+                brace = text.find("{", index)
+                if brace < 0:
+                    break
+                self._candidate_start = self._offset + brace
+                segment_start = brace
+                index = brace
+
+            restarted = False
+            for match in _SIGNIFICANT.finditer(text, index):
+                position = match.start()
+                if position == skip:
+                    continue
+                char = match.group()
+                if self._in_string:
+                    if char == "\\":
+                        if position + 1 == len(text):
+                            self._escape = True
+                        skip = position + 1
+                    elif char == '"':
+                        self._in_string = False
+                    continue
+                if char == '"':
+                    self._in_string = True
+                elif char in "{[":
+                    self._containers.append(self._offset + position)
+                    self._depth += 1
+                elif self._depth > 0:
+                    self._spans[self._containers.pop()] = self._offset + position + 1
+                    self._depth -= 1
+                    if self._depth == 0:
+                        candidate = "".join(self._candidate_parts) + text[segment_start:position + 1]
+                        document = self._parse_candidate(candidate)
+                        if document is not None:
+                            found.append(document)
+                            self._reset_candidate()
+                            index = position + 1
+                        else:
+                            # Not JSON after all: rescan from just after the opening brace
+                            start = self._candidate_start
+                            text = candidate[1:] + text[position + 1:]
+                            self._reset_candidate()
+                            self._offset = start + 1
+                            index = 0
+                            skip = -1
+                        restarted = True
+                        break
+            if restarted:
+                continue
+
+            # End of text with an open candidate: keep its tail for the next chunk
+            self._candidate_parts.append(text[segment_start:])
+            break
+
+        self._offset += len(text)
+
+    def _parse_candidate(self, candidate: str) -> Optional[JsonDocument]:
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            return None
+        start = self._candidate_start
+        document = JsonDocument(value, start, start + len(candidate))
+        if self.target_key:
+            path = find_key_path(value, self.target_key)
+            if path is not None:
+                target = value
+                for step in path:
+                    target = target[step]
+                if target is not None:
+                    document.target = target
+                    document.target_span = self._locate_target(candidate, start, path)
+        return document
+
+    def _value_end(self, candidate: str, position: int, decoder: json.JSONDecoder) -> int:
+        # Containers closed during the scan are skipped without decoding them again
+        end = self._spans.get(self._candidate_start + position) if candidate[position] in "{[" else None
+        if end is not None:
+            return end - self._candidate_start
+        return decoder.raw_decode(candidate, position)[1]
+
+    def _child_start(self, candidate: str, position: int, step: Union[str, int],
+                     decoder: json.JSONDecoder) -> Optional[int]:
+        is_object = candidate[position] == "{"
+        found = None
+        index = 0
+        position = _WHITESPACE.match(candidate, position + 1).end()
+        while candidate[position] not in "}]":
+            if is_object:
+                name, position = decoder.raw_decode(candidate, position)
+                position = _WHITESPACE.match(candidate, position).end() + 1
+                position = _WHITESPACE.match(candidate, position).end()
+            else:
+                name = index
+                index += 1
+            if name == step:
+                # Keep looking: json.loads keeps the last of duplicate keys
+                found = position
+            position = _WHITESPACE.match(candidate, self._value_end(candidate, position, decoder)).end()
+            if candidate[position] == ",":
+                position = _WHITESPACE.match(candidate, position + 1).end()
+        return found
+
+    def _locate_target(self, candidate: str, start: int, path: List[Union[str, int]]) -> Optional[Tuple[int, int]]:
+        decoder = json.JSONDecoder()
+        position = 0
+        try:
+            for step in path:
+                position = self._child_start(candidate, position, step, decoder)
+                if position is None:
+                    return None
+            return start + position, start + self._value_end(candidate, position, decoder)
+        except (ValueError, IndexError):
+            return None
+
+
+def extract_json(source: Union[str, Iterable[str]], target_key: Optional[str] = None) -> JsonExtraction:
+    """
+    Extract the last JSON object and the target key's subtree in a single pass.
+
+    Args:
+        source: Full response text or an iterable of text chunks
+        target_key: Key whose subtree should be returned (e.g. "results")
+
+    Returns:
+        JsonExtraction: document, target subtree and their character offsets
+    """
+    extractor = IncrementalJsonExtractor(target_key)
+    if isinstance(source, str):
+        extractor.feed(source)
+    else:
+        for chunk in source:
+            extractor.feed(chunk)
+    extractor.close()
+    return extractor.result()
@@ -0,0 +1,181 @@
+"""
+Event-Loop Stall Monitor.
+
+Opt-in watchdog (LOOP_MONITOR_ENABLED=true) that measures event-loop lag and catches
+callbacks that hold the loop for longer than LOOP_MONITOR_THRESHOLD_SECONDS, e.g. a
+synchronous GCS download or db.commit() inside an async handler.
+
+A heartbeat task on the loop records how late its timer fires. A daemon thread watches
+the heartbeat; when it goes stale, the thread samples the loop thread's stack and the
+pipeline stage of the running callback (from pipeline_metrics.current_stage), so every stall
+is attributed to the stage that caused it. The loop itself does no extra work per
+callback, which keeps the overhead low enough for production traffic.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import contextvars
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from .pipeline_metrics import current_stage, pipeline_metrics
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "false").lower() == "true"
+LOOP_MONITOR_INTERVAL_SECONDS = float(os.getenv("LOOP_MONITOR_INTERVAL_SECONDS", "0.05"))
+LOOP_MONITOR_THRESHOLD_SECONDS = float(os.getenv("LOOP_MONITOR_THRESHOLD_SECONDS", "0.1"))
+# Stack traces are logged at most this often per stage
+LOOP_MONITOR_LOG_INTERVAL_SECONDS = float(os.getenv("LOOP_MONITOR_LOG_INTERVAL_SECONDS", "60"))
+STACK_DEPTH = 25
+
+
+class StallRecord:
+    def __init__(self, stage: str, task_name: Optional[str], stack: List[str]):
+        self.stage = stage
+        self.task_name = task_name
+        self.stack = stack
+        self.detected_at = time.time()
+        self.duration: Optional[float] = None
+
+
+def _running_context(frame) -> Optional[contextvars.Context]:
+    # The loop runs every callback, task steps included, through Handle._run as
+    # self._context.run(...); that Context carries the stage of the blocking code
+    while frame is not None:
+        if frame.f_code.co_name == "_run":
+            handle = frame.f_locals.get("self")
+            context = getattr(handle, "_context", None)
+            if isinstance(context, contextvars.Context):
+                return context
+        frame = frame.f_back
+    return None
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL_SECONDS, threshold: float = LOOP_MONITOR_THRESHOLD_SECONDS,
+                 history: int = 100):
+        self.interval = interval
+        self.threshold = threshold
+        self.recent: Deque[StallRecord] = deque(maxlen=history)
+        self.stalls_by_stage: Dict[str, int] = {}
+        self.stall_seconds_by_stage: Dict[str, float] = {}
+        self.max_lag = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = 0.0
+        self._pending: Optional[StallRecord] = None
+        self._last_logged: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start monitoring the running event loop; must be called from a coroutine on it."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = self._loop.create_task(self._beat(), name="loop-monitor")
+        threading.Thread(target=self._watch, name="loop-monitor", daemon=True).start()
+        logger.info("Event-loop monitor started (interval=%ss, threshold=%ss)", self.interval, self.threshold)
+
+    def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _beat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - expected)
+            self.max_lag = max(self.max_lag, lag)
+            pipeline_metrics.observe("event_loop", "lag", lag)
+            stall, self._pending = self._pending, None
+            if stall is not None:
+                # The loop is free again: the stall lasted about as long as the timer was late
+                stall.duration = lag
+                self._record(stall)
+
+    def _watch(self):
+        # Poll at half the threshold so a stall is sampled while it is still in progress
+        while not self._stopped.wait(self.threshold / 2):
+            if self._pending is not None:
+                continue
+            if time.monotonic() - self._heartbeat - self.interval > self.threshold:
+                self._pending = self._sample()
+
+    def _sample(self) -> StallRecord:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame, limit=STACK_DEPTH) if frame else []
+        task = None
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            pass
+        context = _running_context(frame)
+        if context is None and task is not None and hasattr(task, "get_context"):
+            # Python 3.12+ exposes the task's context directly
+            context = task.get_context()
+        stage = context.get(current_stage) if context is not None else None
+        return StallRecord(stage or "unattributed", task.get_name() if task else None, stack)
+
+    def _record(self, stall: StallRecord):
+        self.recent.append(stall)
+        self.stalls_by_stage[stall.stage] = self.stalls_by_stage.get(stall.stage, 0) + 1
+        self.stall_seconds_by_stage[stall.stage] = self.stall_seconds_by_stage.get(stall.stage, 0.0) + stall.duration
+        now = time.monotonic()
+        if now - self._last_logged.get(stall.stage, float("-inf")) >= LOOP_MONITOR_LOG_INTERVAL_SECONDS:
+            self._last_logged[stall.stage] = now
+            logger.warning("Event loop blocked for %.3fs in stage %s (task %s):\n%s",
+                           stall.duration, stall.stage, stall.task_name, "".join(stall.stack))
+
+    def report(self) -> Dict[str, object]:
+        """Stall counts and time per stage plus the most recent stalls."""
+        return {
+            "max_lag_seconds": self.max_lag,
+            "stalls_by_stage": dict(self.stalls_by_stage),
+            "stall_seconds_by_stage": dict(self.stall_seconds_by_stage),
+            "recent": [
+                {"stage": stall.stage, "task": stall.task_name, "duration": stall.duration,
+                 "detected_at": stall.detected_at, "stack": stall.stack}
+                for stall in self.recent
+            ]
+        }
+
+
+_monitor: Optional[LoopMonitor] = None
+
+
+def ensure_loop_monitor() -> Optional[LoopMonitor]:
+    """
+    Start the monitor on the running loop the first time it is called, if enabled.
+
+    Cheap enough to call at the top of every request handler.
+    """
+    global _monitor
+    if not LOOP_MONITOR_ENABLED:
+        return None
+    if _monitor is None:
+        _monitor = LoopMonitor()
+        _monitor.start()
+    return _monitor
+
+
+def _stall_samples():
+    if _monitor is None:
+        return
+    for stage, count in _monitor.stalls_by_stage.items():
+        yield "event_loop_stalls_total", {"stage": stage}, count
+    for stage, seconds in _monitor.stall_seconds_by_stage.items():
+        yield "event_loop_stall_seconds_total", {"stage": stage}, seconds
+
+
+pipeline_metrics.register_collector("Event-loop stalls by pipeline stage.", _stall_samples)
@@ -0,0 +1,28 @@
+"""
+Pipeline Metrics Endpoint.
+
+Serves pipeline_metrics in the Prometheus text exposition format from the FastAPI
+process that runs the analyses, so the scrape sees the same registry the pipelines
+write to. Include the router in the service app next to the analysis endpoints:
+
+    app.include_router(metrics_router)
+"""
+
+from fastapi import APIRouter, Response
+
+from .pipeline_metrics import pipeline_metrics
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_pipeline_metrics() -> Response:
+    """
+    Render all pipeline metrics for a Prometheus scrape.
+
+    Returns:
+        Response: Stage histograms, error counters and collector samples
+    """
+    return Response(pipeline_metrics.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -6,33 +6,46 @@ and saves results to Google Cloud Storage, following the same pattern as evaluat
 """
 
 import os
-import json
+import time
+# Import cost of this module, reported by startup_report()
+_import_started = time.perf_counter()
 import asyncio
-import threading
-from datetime import datetime, timedelta
-from queue import Queue, Empty
-from threading import Thread
-from typing import Optional, Dict, Any, Union, List
+from typing import Optional, Dict, Any, Union, List, Literal
 
 from fastapi import HTTPException, Depends, status
-from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from app.utils.vertexai_utils import get_vertexai_client
-import vertexai
-from vertexai import agent_engines
-from google.adk.sessions import VertexAiSessionService
-from google.cloud import storage
-from .gcs_service import gcs_service
-from app.utils.storage import get_storage_client
+from .startup import ensure_vertexai_client, lazy_object, record_timing, register_warmup
+from .analysis_artifacts import download_json_artifact
+from .analysis_cache import AnalysisResultCache, make_cache_key
+from .stream_fanout import stream_flights
+from .analysis_persistence import persist_artifacts, settle_persists
+from .analysis_status import patent_status
+from .region_shards import RegionLineBuffer, combine_texts, interleave_streams, merge_documents, merge_results, resolve_regions
+from .content_store import content_store
+from .response_buffer import ResponseBuffer
+from .context_compaction import compact_context
+from .pipeline_metrics import pipeline_metrics, stage_label
+from .loop_monitor import ensure_loop_monitor
+from .analysis_jobs import AnalysisJob, AnalysisJobResponse, analysis_jobs
+from .analysis_batch import (
+    BATCH_ITEM_DENIED, AnalysisBatch, load_batch_innovations, normalize_innovation_ids, run_bounded
+)
+from .agent_scheduler import AdmissionTicket, agent_scheduler
+from .agent_handles import get_agent_handle, get_session_pool, get_session_service, schedule_session_cleanup
 from dotenv import load_dotenv
-from app.utils.json_utils import extract_json_from_response, extract_json_with_key, get_json_value_by_key
-from app.utils.session_utils import generate_session_user_id
+from .json_extraction import extract_json, IncrementalJsonExtractor
+from .stream_events import StreamEvent
+from .stream_output import streaming_response
 import logging
 
 # Module logger
 logger = logging.getLogger(__name__)
+
+# Resolved on first upload so importing this module does not load google.cloud.storage
+gcs_service = lazy_object(".gcs_service", "gcs_service", __package__)
+
 if not logging.getLogger().handlers:
     logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
 
@@ -50,32 +63,43 @@ def extract_results_from_json(full_json: dict) -> Union[dict, list]:
         return full_json["results"]
     return {}
 
-def extract_results_from_response(text: str) -> Union[dict, list]:
-    """
-    Extract results directly from AI response text.
-    
-    Args:
-        text: The full response text from the AI agent
-        
-    Returns:
-        Union[dict, list]: Only the results section if found, empty dict otherwise
-    """
-    results = get_json_value_by_key(text, "results")
-    return results if results else {}
-
 from app.database.database import get_db
 from app.auth.auth import get_current_user
-from app.models.models import User, Innovation, Company, ProblemStandardization, AnalysisStatus, Patent
+from app.models.models import User, Innovation, Company, ProblemStandardization, AnalysisStatus
 
 load_dotenv()
 
 PROJECT_ID = os.getenv("PROJECT_ID")
 LOCATION = os.getenv("LOCATION")
 BUCKET_NAME = "triz_bucket"
+PROBLEM_STANDARDIZATION_REQUIRED = "Problem standardization must be completed before generating patent analysis. Please run problem standardization analysis first."
+PROBLEM_STANDARDIZATION_JSON_MISSING = "Problem standardization JSON results not found. Please re-run problem standardization analysis."
 
 class PatentRequest(BaseModel):
     companyId: str
     innovationId: str
+    # Regions to search in parallel, one agent query each (e.g. ["US", "EP", "CN"]);
+    # None uses PATENT_SHARD_REGIONS, and no regions keeps a single "all" query
+    regions: Optional[List[str]] = None
+    # Streaming endpoints only: text/plain or Server-Sent Events, optionally gzipped
+    format: Literal["text", "sse"] = "text"
+    gzip: bool = False
+
+class PatentBatchRequest(BaseModel):
+    companyId: str
+    innovationIds: List[str]
+    regions: Optional[List[str]] = None
+    # Progress stream: text/plain or Server-Sent Events, optionally gzipped
+    format: Literal["text", "sse"] = "text"
+    gzip: bool = False
+
+class PatentResumeRequest(BaseModel):
+    companyId: str
+    innovationId: str
+    streamId: str
+    offset: int = 0
+    # Resumed output is text/plain, since offsets count bytes of that rendering
+    gzip: bool = False
 
 class PatentResponse(BaseModel):
     message: str
@@ -89,9 +113,7 @@ class PatentResponse(BaseModel):
 
 class PatentStreamer:
     def __init__(self):
-        # Initialize Vertex AI using centralized client
-        get_vertexai_client()
-        
+        # The Vertex AI client is initialised on first use (or by the warm-up hook), not at import
         # Original bucket logic restored
         self.project_id = PROJECT_ID
         self.location = LOCATION
@@ -99,32 +121,26 @@ class PatentStreamer:
         self.resource_id = "2741346370836234240"  # Patent Analysis Agent
 
     def initialize_vertex_ai(self):
-        # VertexAI already initialized via centralized client
-        pass
+        # Centralized client, initialised once per process
+        ensure_vertexai_client()
+
+    def warm_up(self):
+        """Initialise the Vertex AI client, agent handle and session service ahead of the first request."""
+        self.initialize_vertex_ai()
+        self.get_agent()
+        get_session_service(self.project_id, self.location)
 
     async def create_session(self, user_id: str):
-        service = VertexAiSessionService(self.project_id, self.location)
-        # Generate unique user ID to prevent concurrent session conflicts
-        unique_user_id = generate_session_user_id(user_id, prefix="patent_user")
-        session = await service.create_session(app_name=self.resource_id, user_id=unique_user_id)
-        return service, session, unique_user_id
+        # Reuse the shared session service and, when pooling is enabled, a pre-created session
+        pool = get_session_pool(self.resource_id, self.project_id, self.location, prefix="patent_user")
+        return await pool.acquire(user_id)
 
     def get_agent(self):
-        return agent_engines.get(self.resource_id)
-
-    def _stream_to_queue(self, agent, session_id: str, user_id: str, query: str, queue: Queue):
-        try:
-            for event in agent.stream_query(user_id=user_id, session_id=session_id, message=query):
-                if "content" in event and "parts" in event["content"]:
-                    for part in event["content"]["parts"]:
-                        if "text" in part:
-                            queue.put(part["text"])
-        except Exception as e:
-            queue.put(f"\n❌ Error: {e}\n")
-        finally:
-            queue.put(None)
+        return get_agent_handle(self.resource_id)
 
     def _upload_to_gcs(self, text: str, innovation_id: str, company_id: str) -> tuple[str, str]:
+        if content_store.enabled:
+            return content_store.put_text(text)
         return gcs_service.upload_text_to_gcs(
             text=text,
             innovation_id=innovation_id,
@@ -135,6 +151,8 @@ class PatentStreamer:
         )
 
     def _save_json_to_gcs(self, json_data: dict, innovation_id: str, company_id: str) -> tuple[str, str]:
+        if content_store.enabled:
+            return content_store.put_json(json_data)
         return gcs_service.save_json_to_gcs(
             json_data=json_data,
             innovation_id=innovation_id,
@@ -146,6 +164,8 @@ class PatentStreamer:
     
     def _save_results_to_gcs(self, results_data: Union[dict, list], innovation_id: str, company_id: str) -> tuple[str, str]:
         """Save only the results portion to GCS separately."""
+        if content_store.enabled:
+            return content_store.put_json(results_data)
         return gcs_service.save_json_to_gcs(
             json_data=results_data,
             innovation_id=innovation_id,
@@ -155,36 +175,66 @@ class PatentStreamer:
             project_id=self.project_id
         )
 
-    async def stream_response(self, context_data: dict, user_id: str, innovation_id: str, company_id: str):
+    async def stream_response(self, context_data: dict, user_id: str, innovation_id: str, company_id: str,
+                              admission: Optional[AdmissionTicket] = None):
         self.initialize_vertex_ai()
-        service, session, unique_user_id = await self.create_session(f"user_{user_id}")
-        agent = self.get_agent()
-        queue = Queue()
-        full_response = []
+        # Wait for a slot on this agent unless the caller already holds one
+        if admission is None:
+            admission = await agent_scheduler.acquire(self.resource_id, company_id)
+        pipeline_metrics.observe("patent", "admission_wait", admission.queued_seconds)
+        try:
+            with pipeline_metrics.stage("patent", "session_create"):
+                service, session, unique_user_id = await self.create_session(f"user_{user_id}")
+                agent = self.get_agent()
+        except BaseException:
+            admission.release()
+            raise
+        response = ResponseBuffer()
 
         # Convert context data to the expected format for the agent
-        query = json.dumps(context_data, indent=2)
-
-        Thread(target=self._stream_to_queue, args=(agent, session.id, unique_user_id, query, queue)).start()
+        query = compact_context(context_data, "patent").query
 
         async def generator():
-            while True:
-                try:
-                    chunk = queue.get(timeout=0.2)
-                    if chunk is None:
-                        break
-                    full_response.append(chunk)
-                    yield chunk
-                except Empty:
-                    await asyncio.sleep(0.1)
-            await service.delete_session(app_name=self.resource_id, user_id=unique_user_id, session_id=session.id)
+            started = time.perf_counter()
+            first_token = True
+            # Consume the agent stream natively on the event loop so each part is
+            # forwarded as soon as it arrives instead of being polled from a thread.
+            try:
+                async for event in agent.async_stream_query(
+                    user_id=unique_user_id,
+                    session_id=session.id,
+                    message=query
+                ):
+                    content = event.get("content", {})
+                    parts = content.get("parts", [])
+                    for part in parts:
+                        text_part = part.get("text", "")
+                        if text_part:
+                            if first_token:
+                                first_token = False
+                                pipeline_metrics.observe("patent", "time_to_first_token", time.perf_counter() - started)
+                            response.append(text_part)
+                            yield text_part
+            except Exception as e:
+                logger.exception("Patent agent stream failed: %s", e)
+                error_text = f"\n❌ Error: {e}\n"
+                response.append(error_text)
+                yield StreamEvent("error", {"message": str(e)}, text=error_text)
+            finally:
+                pipeline_metrics.observe("patent", "streaming", time.perf_counter() - started)
+                admission.release()
+                # Session cleanup runs in the background, off the response path
+                schedule_session_cleanup(service, self.resource_id, unique_user_id, session.id)
 
-        return generator, full_response
+        return generator, response
 
-def format_innovation_for_patent(innovation: Innovation, company: Company, db: Session, cached_data: dict = None) -> dict:
+async def format_innovation_for_patent(innovation: Innovation, company: Company, db: Session, cached_data: dict = None) -> dict:
     """
     Format innovation data for the Patent Analysis Agent by fetching problem standardization results.
     
+    The upstream JSON document is downloaded in a worker thread, so the event loop is not
+    blocked on GCS.
+    
     Args:
         innovation: Innovation database object
         company: Company database object
@@ -197,11 +247,10 @@ def format_innovation_for_patent(innovation: Innovation, company: Company, db: S
     Raises:
         HTTPException: If problem standardization is not completed
     """
-    # Use cached data if provided to avoid repeated GCS downloads
+    # Use cached data if provided to avoid repeated GCS downloads; copy so the caller's dict is untouched
     if cached_data:
         logger.info("✅ Using pre-fetched problem standardization data for patent analysis")
-        cached_data["region"] = "all"
-        return cached_data
+        return {**cached_data, "region": "all"}
     # Check if problem standardization is completed
     problem_standardization = db.query(ProblemStandardization).filter(
         ProblemStandardization.innovation_id == innovation.id,
@@ -211,26 +260,21 @@ def format_innovation_for_patent(innovation: Innovation, company: Company, db: S
     if not problem_standardization:
         raise HTTPException(
             status_code=status.HTTP_412_PRECONDITION_FAILED,
-            detail="Problem standardization must be completed before generating patent analysis. Please run problem standardization analysis first."
+            detail=PROBLEM_STANDARDIZATION_REQUIRED
         )
     
     if not problem_standardization.json_gcs_url:
         raise HTTPException(
             status_code=status.HTTP_412_PRECONDITION_FAILED,
-            detail="Problem standardization JSON results not found. Please re-run problem standardization analysis."
+            detail=PROBLEM_STANDARDIZATION_JSON_MISSING
         )
     
     try:
-        client = get_storage_client()
-        # Extract blob path from gs:// URL
-        json_gcs_path = problem_standardization.json_gcs_url.replace("gs://triz_bucket/", "")
-        blob = client.bucket("triz_bucket").blob(json_gcs_path)
+        # Shared with downstream analyses; only re-downloaded when the blob generation changes
+        with pipeline_metrics.stage("patent", "upstream_fetch"):
+            problem_standardization_data = await asyncio.to_thread(download_json_artifact, problem_standardization.json_gcs_url)
         
-        # Download and parse JSON content
-        json_content = blob.download_as_text()
-        problem_standardization_data = json.loads(json_content)
-        
-        # Add region field for patent analysis
+        # Add region field for patent analysis (the cache hands out a private copy)
         problem_standardization_data["region"] = "all"
         
         return problem_standardization_data
@@ -242,18 +286,32 @@ def format_innovation_for_patent(innovation: Innovation, company: Company, db: S
         )
 
 
+def with_patent_regions(context_data: dict, requested: Optional[List[str]] = None) -> dict:
+    """
+    Set the agent context's region: one region (or "all") for a single query, or the
+    list of regions to shard the analysis over. The list is part of the cache key.
+    """
+    regions = resolve_regions(requested)
+    return {**context_data, "region": regions if len(regions) > 1 else regions[0]}
+
+def shard_regions(context_data: dict) -> Optional[List[str]]:
+    """Regions a context is sharded over, or None for a single agent query."""
+    region = context_data.get("region")
+    return region if isinstance(region, list) else None
+
+
 # Import check_user_access_to_innovation from problem_standardisation
 from app.services.problem_standardisation import check_user_access_to_innovation
 
 streamer = PatentStreamer()
+result_cache = AnalysisResultCache("patent", signed_urls={
+    "gcs_url": "gcs_path", "json_gcs_url": "json_gcs_path", "results_gcs_url": "results_gcs_path"
+})
+register_warmup("patent", streamer.warm_up)
 
-async def generate_patent_analysis(
-    req: PatentRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+async def prepare_patent_analysis(req: PatentRequest, current_user: User, db: Session):
     """
-    Generate patent analysis using Vertex AI with proper access control.
+    Validate access and prerequisites and move the patent record to IN_PROGRESS.
     
     Args:
         req: Request containing company_id and innovation_id
@@ -261,202 +319,469 @@ async def generate_patent_analysis(
         db: Database session
         
     Returns:
-        Patent analysis response with GCS URLs
+        tuple: (innovation_id, context_data, cache_key, cached_response); cached_response is a
+        PatentResponse when the result cache already holds this analysis, None otherwise
         
     Raises:
-        HTTPException: If user lacks access or innovation not found
+        HTTPException: If user lacks access, innovation not found or prerequisites are missing
     """
-    try:
-        # Verify user has access to the innovation
+    # Verify user has access to the innovation
+    with pipeline_metrics.stage("patent", "access_check"):
         innovation = check_user_access_to_innovation(
             db, 
             str(current_user.id), 
             req.companyId, 
             req.innovationId
         )
-        
-        if not innovation:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied: User does not have access to this innovation or innovation not found"
-            )
-        
-        # Get company details
+    
+    if not innovation:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied: User does not have access to this innovation or innovation not found"
+        )
+    
+    # Get company details
+    with pipeline_metrics.stage("patent", "db_query"):
         company = db.query(Company).filter(Company.id == req.companyId).first()
-        if not company:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Company not found"
-            )
+    if not company:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Company not found"
+        )
+    
+    # Check prerequisites before the record moves to IN_PROGRESS
+    try:
+        # Format data for AI patent analysis (this will check prerequisites)
+        with pipeline_metrics.stage("patent", "prerequisites"):
+            context_data = with_patent_regions(await format_innovation_for_patent(innovation, company, db), req.regions)
+    except HTTPException as e:
+        # Set status to FAILED and store error message
+        await patent_status.fail(innovation.id, e.detail)
+        raise  # Re-raise the HTTPException
+    
+    cache_key, cached_response = await begin_patent_analysis(req, innovation.id, context_data)
+    return innovation.id, context_data, cache_key, cached_response
+
+async def begin_patent_analysis(req: PatentRequest, innovation_id: Any, context_data: dict) -> tuple:
+    """
+    Complete the record from the result cache, or move it to IN_PROGRESS for a new run.
+    
+    Args:
+        req: Request containing company_id and innovation_id
+        innovation_id: Innovation whose prerequisites have been validated
+        context_data: Formatted agent input
         
-        # Get or create patent record
-        patent = db.query(Patent).filter(
-            Patent.innovation_id == innovation.id
-        ).first()
+    Returns:
+        tuple: (cache_key, cached_response); cached_response is None unless the result
+        cache already holds this analysis
+    """
+    # Serve identical re-runs from the result cache without starting an agent session
+    cache_key = make_cache_key(context_data, streamer.resource_id)
+    with pipeline_metrics.stage("patent", "cache_lookup"):
+        cached_result = await result_cache.aget(cache_key)
+    if cached_result:
+        logger.info(f"✅ Patent analysis cache hit for innovation {req.innovationId}")
+        await patent_status.complete(
+            innovation_id,
+            gcs_url=cached_result["gcs_path"],
+            json_gcs_url=cached_result["json_gcs_path"]
+        )
         
-        if not patent:
-            patent = Patent(
-                innovation_id=innovation.id,
-                status=AnalysisStatus.NOT_STARTED
-            )
-            db.add(patent)
-            db.flush()  # Get the ID
-        
-        # Reset existing patent analysis to start fresh each time
-        if patent.status == AnalysisStatus.COMPLETED:
-            logger.info(f"🔄 Patent analysis already exists for innovation {req.innovationId}, resetting to start fresh")
-            patent.status = AnalysisStatus.NOT_STARTED
-            patent.gcs_url = None
-            patent.json_gcs_url = None
-            patent.error = None
-            patent.updated_at = datetime.now()
-            db.commit()
-            logger.info("✅ Patent analysis reset completed")
-        
-        # Check prerequisites BEFORE updating status to IN_PROGRESS
-        try:
-            # Format data for AI patent analysis (this will check prerequisites)
-            context_data = format_innovation_for_patent(innovation, company, db)
-        except HTTPException as e:
-            # Set status to FAILED and store error message
-            patent.status = AnalysisStatus.FAILED
-            patent.error = e.detail
-            patent.updated_at = datetime.now()
-            db.commit()
-            raise  # Re-raise the HTTPException
-        
-        # Only set to IN_PROGRESS after prerequisites are validated
-        patent.status = AnalysisStatus.IN_PROGRESS
-        patent.error = None
-        patent.updated_at = datetime.now()
-        db.commit()
-        
-        # Process with Vertex AI
-        generator_func, response_buffer = await streamer.stream_response(
-            context_data, 
-            str(current_user.id),
-            req.innovationId,
-            req.companyId
+        return cache_key, PatentResponse(
+            message="Patent analysis completed successfully",
+            gcs_url=cached_result["gcs_url"],
+            json_response=cached_result["json_response"],
+            json_gcs_url=cached_result["json_gcs_url"],
+            results_response=cached_result["results_response"],
+            results_gcs_url=cached_result["results_gcs_url"],
+            innovationId=req.innovationId,
+            companyId=req.companyId
         )
+    
+    # Only set to IN_PROGRESS after prerequisites are validated; the same write clears
+    # the results of a previous run and creates the record on the first run
+    await patent_status.start(innovation_id)
+    
+    return cache_key, None
 
-        # Collect full response
-        full_response_text = ""
-        async for chunk in generator_func():
-            full_response_text += chunk
+async def run_patent_agent(req: PatentRequest, user_id: str, context_data: dict) -> tuple:
+    """
+    Run one patent agent query to completion and extract its JSON.
+    
+    Args:
+        req: Request containing company_id and innovation_id
+        user_id: Id of the user the agent session is created for
+        context_data: Agent input for a single region (or "all")
+        
+    Returns:
+        tuple: (full_response_text, parsed_json, results_data)
+    """
+    # Process with Vertex AI
+    generator_func, response_buffer = await streamer.stream_response(
+        context_data, 
+        user_id,
+        req.innovationId,
+        req.companyId
+    )
 
-        logger.info(f"🔄 Patent analysis completed, response length: {len(full_response_text)}")
-        logger.debug("FULL RESPONSE TEXT START\n" + (full_response_text[:1000] + '... (truncated)' if len(full_response_text) > 1000 else full_response_text))
-        logger.debug("END OF FULL RESPONSE TEXT")
+    # Drain the stream; the chunks accumulate in the response buffer
+    async for _ in generator_func():
+        pass
+    full_response_text = response_buffer.text()
 
-        # Save full response to GCS
-        gcs_path, gcs_url = streamer._upload_to_gcs(
-            full_response_text,
-            req.innovationId,
-            req.companyId
-        )
+    logger.info(f"🔄 Patent analysis completed, response length: {len(full_response_text)}")
+    logger.debug("FULL RESPONSE TEXT START\n" + (full_response_text[:1000] + '... (truncated)' if len(full_response_text) > 1000 else full_response_text))
+    logger.debug("END OF FULL RESPONSE TEXT")
 
-        # Extract JSON from the complete response, targeting the 'results' key
-        try:
-            # Try to extract JSON with 'results' key from the full response
-            from app.utils.json_utils import extract_json_from_response
-            extracted_json = extract_json_from_response(full_response_text, target_key="results")
-
-            if extracted_json:
-                parsed_json = extracted_json
-                logger.info(f"✅ JSON extraction successful using utils, keys: {list(parsed_json.keys())}")
-                
-                # Validate that 'results' key exists in the extracted JSON
-                if "results" not in parsed_json:
-                    logger.warning("⚠️ Warning: Extracted JSON does not contain 'results' key")
-            else:
-                # Fallback: try basic string cleaning
-                cleaned_text = full_response_text.replace("```json", "").replace("```", "").strip()
-                if cleaned_text:
-                    parsed_json = json.loads(cleaned_text)
-                    logger.info(f"✅ JSON extraction successful using fallback, keys: {list(parsed_json.keys())}")
-                else:
-                    parsed_json = None
-                    logger.error("❌ No valid JSON found in response")
-        except (json.JSONDecodeError, Exception) as json_error:
-            logger.exception(f"❌ JSON parsing failed: {json_error}")
-            parsed_json = None
-        
-        # Final validation
-        if not parsed_json:
-            logger.error("❌ JSON extraction failed - will save text response only")
-        elif "results" not in parsed_json:
-            logger.warning("⚠️ Warning: Final parsed JSON does not contain 'results' key")
-            
-        json_gcs_path = None
-        json_gcs_url = None
-        results_gcs_path = None
-        results_gcs_url = None
-        results_data = None
-        
-        # Save full JSON and results separately if extracted successfully
-        if parsed_json:
-            json_gcs_path, json_gcs_url = streamer._save_json_to_gcs(
-                parsed_json, 
-                req.innovationId, 
-                req.companyId
-            )
-            
-            # Extract and save only the results portion
-            results_data = extract_results_from_response(full_response_text)
-            if not results_data:
-                results_data = extract_results_from_json(parsed_json)
-            
-            if results_data:
-                results_gcs_path, results_gcs_url = streamer._save_results_to_gcs(
-                    results_data,
-                    req.innovationId,
-                    req.companyId
-                )
-                logger.info("✅ Results data saved separately to GCS")
-            else:
-                logger.warning("⚠️ Warning: Could not extract results data for separate storage")
+    # Extract the full JSON and its 'results' subtree in a single pass over the response
+    with pipeline_metrics.stage("patent", "json_extraction"):
+        extraction = extract_json(full_response_text, target_key="results")
+    parsed_json = extraction.document
+    
+    if parsed_json:
+        logger.info(f"✅ JSON extraction successful, keys: {list(parsed_json.keys())}")
+        if "results" not in parsed_json:
+            logger.warning("⚠️ Warning: Extracted JSON does not contain 'results' key")
+    else:
+        logger.error("❌ JSON extraction failed - will save text response only")
+    
+    # Results portion to be saved separately
+    results_data = None
+    if parsed_json:
+        results_data = extraction.target or extract_results_from_json(parsed_json)
+        if not results_data:
+            logger.warning("⚠️ Warning: Could not extract results data for separate storage")
+    
+    return full_response_text, parsed_json, results_data
+
+async def run_patent_shards(req: PatentRequest, user_id: str, context_data: dict) -> tuple:
+    """
+    Run one patent agent query per region concurrently and merge the outputs.
+    
+    Wall-clock time is that of the slowest region. Failed regions are reported in the
+    combined JSON; the run only fails if every region fails.
+    
+    Args:
+        req: Request containing company_id and innovation_id
+        user_id: Id of the user the agent sessions are created for
+        context_data: Agent input whose region is the list of regions to shard over
         
-        # Update patent record with completion status and GCS paths (not signed URLs)
-        patent.status = AnalysisStatus.COMPLETED
-        patent.gcs_url = gcs_path
-        patent.json_gcs_url = json_gcs_path
-        patent.updated_at = datetime.now()
-        db.commit()
+    Returns:
+        tuple: (full_response_text, parsed_json, results_data) for the merged analysis
+    """
+    regions = shard_regions(context_data)
+    logger.info(f"🌐 Running patent analysis for innovation {req.innovationId} across regions {', '.join(regions)}")
+    outcomes = await asyncio.gather(
+        *(run_patent_agent(req, user_id, {**context_data, "region": region}) for region in regions),
+        return_exceptions=True
+    )
+    
+    failed = {region: outcome for region, outcome in zip(regions, outcomes) if isinstance(outcome, BaseException)}
+    if len(failed) == len(regions):
+        raise next(iter(failed.values()))
+    for region, error in failed.items():
+        logger.error(f"❌ Patent analysis for region {region} failed: {getattr(error, 'detail', error)}")
+    
+    texts, documents, shard_results = {}, {}, {}
+    for region, outcome in zip(regions, outcomes):
+        if region in failed:
+            texts[region] = f"❌ Error: {getattr(failed[region], 'detail', failed[region])}"
+            documents[region] = None
+            shard_results[region] = None
+        else:
+            texts[region], documents[region], shard_results[region] = outcome
+    
+    results_data = merge_results(shard_results)
+    parsed_json = merge_documents(documents, results_data)
+    if parsed_json and failed:
+        parsed_json["failed_regions"] = list(failed)
+    return combine_texts(texts), parsed_json, results_data or None
 
-        return PatentResponse(
-            message="Patent analysis completed successfully",
-            gcs_url=gcs_url,
-            json_response=parsed_json,
-            json_gcs_url=json_gcs_url,
-            results_response=results_data if parsed_json and results_data else parsed_json,
-            results_gcs_url=results_gcs_url,
-            innovationId=req.innovationId,
-            companyId=req.companyId
-        )
+async def run_patent_analysis(
+    req: PatentRequest,
+    user_id: str,
+    innovation_id: Any,
+    context_data: dict,
+    cache_key: str
+) -> PatentResponse:
+    """
+    Run the agent, persist the outputs and complete the patent record.
+    
+    Args:
+        req: Request containing company_id and innovation_id
+        user_id: Id of the user the agent session is created for
+        innovation_id: Innovation whose patent record is IN_PROGRESS
+        context_data: Formatted agent input from format_innovation_for_patent
+        cache_key: Result cache key for the context
+        
+    Returns:
+        Patent analysis response with GCS URLs
+    """
+    # One agent query, or one per region run concurrently and merged
+    if shard_regions(context_data):
+        full_response_text, parsed_json, results_data = await run_patent_shards(req, user_id, context_data)
+    else:
+        full_response_text, parsed_json, results_data = await run_patent_agent(req, user_id, context_data)
+    
+    # Save full response, full JSON and results concurrently
+    with pipeline_metrics.stage("patent", "upload"):
+        persisted = await persist_artifacts({
+            "text": lambda: streamer._upload_to_gcs(full_response_text, req.innovationId, req.companyId),
+            "json": (lambda: streamer._save_json_to_gcs(parsed_json, req.innovationId, req.companyId)) if parsed_json else None,
+            "results": (lambda: streamer._save_results_to_gcs(results_data, req.innovationId, req.companyId)) if results_data else None
+        })
+    await content_store.awrite_manifest("patent", req.innovationId, req.companyId, persisted)
+    gcs_path, gcs_url = persisted["text"]
+    json_gcs_path, json_gcs_url = persisted["json"]
+    results_gcs_path, results_gcs_url = persisted["results"]
+    if results_gcs_path:
+        logger.info("✅ Results data saved separately to GCS")
+    
+    # Update patent record with completion status and GCS paths (not signed URLs)
+    await patent_status.complete(innovation_id, gcs_url=gcs_path, json_gcs_url=json_gcs_path)
+
+    results_response = results_data if parsed_json and results_data else parsed_json
+    # Only cache runs that produced structured output so failed runs are retried
+    if parsed_json:
+        await result_cache.aput(cache_key, {
+            "text": full_response_text,
+            "gcs_path": gcs_path,
+            "gcs_url": gcs_url,
+            "json_response": parsed_json,
+            "json_gcs_path": json_gcs_path,
+            "json_gcs_url": json_gcs_url,
+            "results_response": results_response,
+            "results_gcs_path": results_gcs_path,
+            "results_gcs_url": results_gcs_url
+        })
+
+    return PatentResponse(
+        message="Patent analysis completed successfully",
+        gcs_url=gcs_url,
+        json_response=parsed_json,
+        json_gcs_url=json_gcs_url,
+        results_response=results_response,
+        results_gcs_url=results_gcs_url,
+        innovationId=req.innovationId,
+        companyId=req.companyId
+    )
+
+async def generate_patent_analysis(
+    req: PatentRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Generate patent analysis using Vertex AI with proper access control.
+    
+    Args:
+        req: Request containing company_id and innovation_id
+        current_user: Authenticated user from JWT token
+        db: Database session
+        
+    Returns:
+        Patent analysis response with GCS URLs
+        
+    Raises:
+        HTTPException: If user lacks access or innovation not found
+    """
+    ensure_loop_monitor()
+    try:
+        with pipeline_metrics.stage("patent", "total"):
+            innovation_id, context_data, cache_key, cached_response = await prepare_patent_analysis(req, current_user, db)
+            if cached_response:
+                return cached_response
+            
+            try:
+                return await run_patent_analysis(req, str(current_user.id), innovation_id, context_data, cache_key)
+            except HTTPException as e:
+                # e.g. 429 from the agent scheduler: don't leave the record IN_PROGRESS
+                await patent_status.fail(innovation_id, str(e.detail), create=False)
+                raise
         
     except HTTPException:
         raise
     except Exception as e:
         # Set status to FAILED if generation fails and store error message
         error_message = str(e)
+        await patent_status.fail(req.innovationId, error_message, create=False)
+        
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Patent analysis failed: {error_message}"
+        )
+
+def patent_job_runner(req: PatentRequest, user_id: str, innovation_id: Any, context_data: dict, cache_key: str):
+    """Coroutine factory running a prepared patent analysis as a background job."""
+    # Status writes use their own short-lived sessions, so the job outlives the request session
+    async def run_job():
         try:
-            # Get or create patent record for error tracking
-            patent = db.query(Patent).filter(
-                Patent.innovation_id == req.innovationId
-            ).first()
-            
-            if patent:
-                patent.status = AnalysisStatus.FAILED
-                patent.error = error_message
-                patent.updated_at = datetime.now()
-                db.commit()
-        except:
-            pass  # Don't fail the main error if database update fails
+            return await run_patent_analysis(req, user_id, innovation_id, context_data, cache_key)
+        except Exception as e:
+            await patent_status.fail(innovation_id, str(getattr(e, "detail", e)), create=False)
+            raise
+    
+    return run_job
+
+async def submit_patent_analysis_job(
+    req: PatentRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> AnalysisJobResponse:
+    """
+    Validate prerequisites and queue a patent analysis on the background worker pool.
+    
+    Args:
+        req: Request containing company_id and innovation_id
+        current_user: Authenticated user from JWT token
+        db: Database session
+        
+    Returns:
+        AnalysisJobResponse: Job id and status to poll with get_patent_analysis_job
         
+    Raises:
+        HTTPException: If user lacks access, prerequisites are missing or the queue is full
+    """
+    ensure_loop_monitor()
+    try:
+        patent_innovation_id, context_data, cache_key, cached_response = await prepare_patent_analysis(req, current_user, db)
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_message = str(e)
+        await patent_status.fail(req.innovationId, error_message, create=False)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Patent analysis failed: {error_message}"
         )
+    
+    user_id = str(current_user.id)
+    job = AnalysisJob("patent", req.innovationId, req.companyId, user_id)
+    if cached_response:
+        return analysis_jobs.complete(job, cached_response).to_response()
+    
+    try:
+        with stage_label("patent.job"):
+            job = analysis_jobs.submit(job, patent_job_runner(req, user_id, patent_innovation_id, context_data, cache_key))
+    except HTTPException as e:
+        await patent_status.fail(patent_innovation_id, e.detail, create=False)
+        raise
+    
+    return job.to_response()
+
+async def get_patent_analysis_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+) -> AnalysisJobResponse:
+    """
+    Return the status, and once completed the result, of a queued patent analysis.
+    
+    Args:
+        job_id: Id returned by submit_patent_analysis_job
+        current_user: Authenticated user from JWT token
+        
+    Returns:
+        AnalysisJobResponse: Job status with the PatentResponse payload as result
+    """
+    return analysis_jobs.get(job_id, str(current_user.id)).to_response()
+
+async def generate_patent_analysis_batch(
+    req: PatentBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue patent analyses for many innovations of a company and stream their progress.
+    
+    Access, the company and the problem standardization prerequisites are checked for
+    the whole batch with one query each, and the upstream inputs are prefetched
+    together. Each valid innovation then runs as a background job on the shared
+    worker pool; the stream reports per-item progress (queued, running, completed,
+    failed, or rejected/cached without running) and ends with a summary. Items keep
+    running if the client disconnects and can be polled by their job ids.
+    
+    Args:
+        req: Request containing companyId and the innovationIds to analyse
+        current_user: Authenticated user from JWT token
+        db: Database session
+        
+    Returns:
+        StreamingResponse: Per-item progress events, with the batch id in X-Batch-Id
+        
+    Raises:
+        HTTPException: If the batch is empty or too large, the company is not found or
+            the user lacks access to it
+    """
+    ensure_loop_monitor()
+    innovation_ids = normalize_innovation_ids(req.innovationIds)
+    user_id = str(current_user.id)
+    logger.info(f"📦 Patent batch of {len(innovation_ids)} innovations for company {req.companyId}")
+    
+    with pipeline_metrics.stage("patent", "access_check"):
+        company, innovations = load_batch_innovations(db, user_id, req.companyId, innovation_ids)
+    batch = AnalysisBatch("patent", req.companyId, user_id)
+    
+    # Completed problem standardizations of every innovation in one query
+    with pipeline_metrics.stage("patent", "prerequisites"):
+        rows = db.query(ProblemStandardization.innovation_id, ProblemStandardization.json_gcs_url).filter(
+            ProblemStandardization.innovation_id.in_([innovation.id for innovation in innovations.values()]),
+            ProblemStandardization.status == AnalysisStatus.COMPLETED
+        ).all() if innovations else []
+    json_gcs_urls = {str(row.innovation_id): row.json_gcs_url for row in rows}
+    
+    ready = {}
+    for innovation_id in innovation_ids:
+        if innovation_id not in innovations:
+            batch.reject(innovation_id, BATCH_ITEM_DENIED)
+        elif not json_gcs_urls.get(innovation_id):
+            error = PROBLEM_STANDARDIZATION_JSON_MISSING if innovation_id in json_gcs_urls else PROBLEM_STANDARDIZATION_REQUIRED
+            await patent_status.fail(innovations[innovation_id].id, error)
+            batch.reject(innovation_id, error)
+        else:
+            ready[innovation_id] = json_gcs_urls[innovation_id]
+    
+    # Prefetch the upstream documents, then complete cache hits and start the other records
+    async def prepare_item(innovation_id: str, json_gcs_url: str):
+        innovation = innovations[innovation_id]
+        try:
+            with pipeline_metrics.stage("patent", "upstream_fetch"):
+                problem_standardization_data = await asyncio.to_thread(download_json_artifact, json_gcs_url)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to fetch problem standardization results: {str(e)}"
+            )
+        item_req = PatentRequest(companyId=req.companyId, innovationId=innovation_id, regions=req.regions)
+        context_data = with_patent_regions(
+            await format_innovation_for_patent(innovation, company, db, cached_data=problem_standardization_data), req.regions
+        )
+        cache_key, cached_response = await begin_patent_analysis(item_req, innovation.id, context_data)
+        return item_req, context_data, cache_key, cached_response
+    
+    prepared = await run_bounded({
+        innovation_id: (lambda innovation_id=innovation_id, url=url: prepare_item(innovation_id, url))
+        for innovation_id, url in ready.items()
+    })
+    
+    for innovation_id, outcome in prepared.items():
+        record_id = innovations[innovation_id].id
+        if isinstance(outcome, Exception):
+            error = str(getattr(outcome, "detail", outcome))
+            await patent_status.fail(record_id, error)
+            batch.reject(innovation_id, error)
+            continue
+        item_req, context_data, cache_key, cached_response = outcome
+        if cached_response:
+            batch.cached(innovation_id, cached_response)
+            continue
+        try:
+            with stage_label("patent.batch"):
+                batch.submit(innovation_id, patent_job_runner(item_req, user_id, record_id, context_data, cache_key))
+        except HTTPException as e:
+            await patent_status.fail(record_id, e.detail, create=False)
+            batch.reject(innovation_id, e.detail)
+    
+    return streaming_response(batch.events(), req.format, req.gzip, batch.response_headers())
 
 async def generate_patent_analysis_stream(
     req: PatentRequest,
@@ -477,14 +802,17 @@ async def generate_patent_analysis_stream(
     Raises:
         HTTPException: If user lacks access or innovation not found
     """
+    ensure_loop_monitor()
+    started = time.perf_counter()
     try:
         # Verify user has access to the innovation
-        innovation = check_user_access_to_innovation(
-            db, 
-            str(current_user.id), 
-            req.companyId, 
-            req.innovationId
-        )
+        with pipeline_metrics.stage("patent", "access_check"):
+            innovation = check_user_access_to_innovation(
+                db, 
+                str(current_user.id), 
+                req.companyId, 
+                req.innovationId
+            )
         
         if not innovation:
             raise HTTPException(
@@ -500,59 +828,190 @@ async def generate_patent_analysis_stream(
                 detail="Company not found"
             )
         
+        # Attach to an identical analysis that is already streaming instead of starting another
+        # run; like the result cache key, the key covers the regions the analysis runs over
+        regions = resolve_regions(req.regions)
+        flight_key = ("patent", str(innovation.id), *regions)
+        running_flight = stream_flights.get(flight_key)
+        if running_flight:
+            logger.info(f"🔄 Attaching to running patent stream for innovation {req.innovationId}")
+            return streaming_response(running_flight.subscribe(), req.format, req.gzip, running_flight.response_headers())
+        
         # Format data for AI patent analysis
-        context_data = format_innovation_for_patent(innovation, company, db)
-        
-        # Stream response
-        generator_func, response_buffer = await streamer.stream_response(
-            context_data, 
-            str(current_user.id),
-            req.innovationId,
-            req.companyId
-        )
-
-        async def final_generator():
-            full_text_parts = []
-            async for chunk in generator_func():
-                full_text_parts.append(chunk)
-                yield chunk
+        with pipeline_metrics.stage("patent", "prerequisites"):
+            context_data = with_patent_regions(await format_innovation_for_patent(innovation, company, db), regions)
+        
+        # Wait for an agent slot before committing to a stream so that overload surfaces as a 429
+        admission = await agent_scheduler.acquire(streamer.resource_id, req.companyId)
+        running_flight = stream_flights.get(flight_key)
+        if running_flight:
+            # Another caller started the same analysis while we were queued
+            admission.release()
+            return streaming_response(running_flight.subscribe(), req.format, req.gzip, running_flight.response_headers())
+        
+        async def single_generator(outputs: dict):
+            # Stream response; the session is opened inside the flight so that
+            # concurrent callers attach to it rather than racing to start their own
+            generator_func, response_buffer = await streamer.stream_response(
+                context_data, 
+                str(current_user.id),
+                req.innovationId,
+                req.companyId,
+                admission=admission
+            )
+            yield StreamEvent("progress", {"stage": "streaming"}, text="")
             
-            # Upload full response to GCS after streaming
-            full_text = "".join(full_text_parts)
+            # Parse JSON while the agent is still talking; as soon as an object carrying
+            # 'results' closes, publish it and start persisting it in the background
+            extractor = IncrementalJsonExtractor(target_key="results")
+            early_document = None
+            early_persists = outputs["early_persists"]
+            try:
+                async for chunk in generator_func():
+                    yield chunk
+                    if isinstance(chunk, StreamEvent):
+                        continue
+                    for document in extractor.feed(chunk):
+                        if document.has_target:
+                            yield StreamEvent("structured_json", {"key": "results", "data": document.target})
+                            early_document = document
+                            early_persists.append(asyncio.create_task(persist_artifacts({
+                                "results": lambda data=document.target: streamer._save_results_to_gcs(data, req.innovationId, req.companyId)
+                            })))
+            except asyncio.CancelledError:
+                # Every client disconnected; the agent iteration has been cancelled and its
+                # session is cleaned up by the streamer
+                # The streaming path never moves the patent record to IN_PROGRESS or COMPLETED,
+                # so a disconnect leaves the record of an earlier run untouched
+                logger.info(f"🛑 Patent stream cancelled for innovation {req.innovationId}")
+                raise
+            extractor.close()
             
-            logger.info(f"🔄 Patent streaming completed, response length: {len(full_text)}")
+            full_text = response_buffer.text()
             
-            gcs_path, gcs_url = streamer._upload_to_gcs(
-                full_text, 
-                req.innovationId, 
-                req.companyId
-            )
+            logger.info(f"🔄 Patent streaming completed, response length: {len(full_text)}")
             
-            # Try to extract JSON from streaming response - target 'results' key
-            logger.info("🔍 Starting JSON extraction from streaming response...")
-            parsed_json = extract_json_from_response(full_text, target_key="results")
+            extraction = extractor.result()
+            parsed_json = extraction.document
             
+            results_data = None
             if parsed_json:
                 logger.info(f"✅ Streaming JSON extraction successful, keys: {list(parsed_json.keys())}")
-                
-                # Extract and save results separately
-                results_data = extract_results_from_response(full_text)
-                if not results_data:
-                    results_data = extract_results_from_json(parsed_json)
-                
-                if results_data:
-                    results_gcs_path, results_gcs_url = streamer._save_results_to_gcs(
-                        results_data,
-                        req.innovationId,
-                        req.companyId
-                    )
-                    yield f"\n📋 Results data saved to: {results_gcs_url}\n"
+                results_data = extraction.target or extract_results_from_json(parsed_json)
             else:
                 logger.error("❌ Streaming JSON extraction failed")
             
-            yield f"\n\n[Patent analysis saved to GCS]({gcs_url})"
+            # Results already persisted mid-stream are reused unless a later object superseded them
+            outputs.update(
+                text=full_text,
+                results=results_data,
+                results_persisted_early=early_document is not None and extraction.document_span == early_document.span
+            )
+        
+        async def sharded_generator(regions: List[str], outputs: dict):
+            # One agent stream per region, started together; the output is interleaved line
+            # by line, each line labelled with its region
+            buffers = {}
+            
+            async def region_stream(region: str, ticket: Optional[AdmissionTicket]):
+                generator_func, buffers[region] = await streamer.stream_response(
+                    {**context_data, "region": region},
+                    str(current_user.id),
+                    req.innovationId,
+                    req.companyId,
+                    admission=ticket
+                )
+                async for chunk in generator_func():
+                    yield chunk
+            
+            # The slot acquired up front goes to the first region; the others queue for their own
+            streams = {region: region_stream(region, admission if index == 0 else None) for index, region in enumerate(regions)}
+            lines = {region: RegionLineBuffer(region) for region in regions}
+            yield StreamEvent("progress", {"stage": "streaming", "regions": regions}, text="")
+            try:
+                async for region, item in interleave_streams(streams):
+                    if isinstance(item, Exception):
+                        message = str(getattr(item, "detail", item))
+                        logger.error(f"❌ Patent stream for region {region} failed: {message}")
+                        yield StreamEvent("error", {"region": region, "message": message},
+                                          text=lines[region].flush() + f"[{region}] ❌ Error: {message}\n")
+                    elif isinstance(item, StreamEvent):
+                        yield StreamEvent(item.event, {**item.data, "region": region}, text=lines[region].feed(item.text or ""))
+                    else:
+                        text = lines[region].feed(item)
+                        if text:
+                            yield text
+            except asyncio.CancelledError:
+                logger.info(f"🛑 Patent stream cancelled for innovation {req.innovationId}")
+                raise
+            for buffer in lines.values():
+                text = buffer.flush()
+                if text:
+                    yield text
+            
+            # Extract and merge each region's results
+            texts, shard_results = {}, {}
+            with pipeline_metrics.stage("patent", "json_extraction"):
+                for region in regions:
+                    texts[region] = buffers[region].text() if region in buffers else ""
+                    extraction = extract_json(texts[region], target_key="results")
+                    shard_results[region] = None
+                    if extraction.document:
+                        shard_results[region] = extraction.target or extract_results_from_json(extraction.document)
+            results_data = merge_results(shard_results) or None
+            logger.info(f"🔄 Sharded patent streaming completed for regions {', '.join(regions)}")
+            if results_data:
+                yield StreamEvent("structured_json", {"key": "results", "regions": regions, "data": results_data})
+            outputs.update(text=combine_texts(texts), results=results_data, results_persisted_early=False)
+        
+        async def final_generator():
+            # Persists started mid-stream are held here until they have finished
+            outputs = {"early_persists": []}
+            try:
+                async for item in persist_generator(outputs):
+                    yield item
+            finally:
+                await settle_persists(outputs["early_persists"])
+        
+        async def persist_generator(outputs: dict):
+            regions = shard_regions(context_data)
+            source = sharded_generator(regions, outputs) if regions else single_generator(outputs)
+            async for item in source:
+                yield item
+            full_text, results_data = outputs["text"], outputs["results"]
+            results_persisted_early, early_persists = outputs["results_persisted_early"], outputs["early_persists"]
+            
+            # Upload full response (and results if not yet saved) concurrently after streaming
+            yield StreamEvent("progress", {"stage": "saving"}, text="")
+            with pipeline_metrics.stage("patent", "upload"):
+                persisted = await persist_artifacts({
+                    "text": lambda: streamer._upload_to_gcs(full_text, req.innovationId, req.companyId),
+                    "results": (lambda: streamer._save_results_to_gcs(results_data, req.innovationId, req.companyId)) if results_data and not results_persisted_early else None
+                })
+                gcs_path, gcs_url = persisted["text"]
+                results_gcs_path, results_gcs_url = persisted["results"]
+                if early_persists:
+                    early_results = await asyncio.gather(*early_persists)
+                    if results_persisted_early:
+                        results_gcs_path, results_gcs_url = early_results[-1]["results"]
+                await content_store.awrite_manifest("patent", req.innovationId, req.companyId, {
+                    "text": (gcs_path, gcs_url), "results": (results_gcs_path, results_gcs_url)
+                })
+            
+            if results_gcs_url:
+                yield StreamEvent("saved_artifact", {"artifact": "results", "url": results_gcs_url},
+                                  text=f"\n📋 Results data saved to: {results_gcs_url}\n")
+            
+            yield StreamEvent("saved_artifact", {"artifact": "text", "url": gcs_url},
+                              text=f"\n\n[Patent analysis saved to GCS]({gcs_url})")
+            yield StreamEvent("progress", {"stage": "completed"}, text="")
+            pipeline_metrics.observe("patent", "total", time.perf_counter() - started)
 
-        return StreamingResponse(final_generator(), media_type="text/plain")
+        with stage_label("patent.stream"):
+            flight = stream_flights.start(flight_key, final_generator())
+        # The generator releases the slot itself, unless it is cancelled before it starts
+        flight.task.add_done_callback(lambda _task: admission.release())
+        return streaming_response(flight.subscribe(), req.format, req.gzip, flight.response_headers())
         
     except HTTPException:
         raise
@@ -560,4 +1019,54 @@ async def generate_patent_analysis_stream(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Streaming patent analysis failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+async def resume_patent_analysis_stream(
+    req: PatentResumeRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Resume a patent analysis stream after a dropped connection.
+    
+    Replays the output after the given byte offset and, if the run is still going,
+    continues with the live tail. Finished runs are replayed in full from the stream log.
+    
+    Args:
+        req: Request containing companyId, innovationId, the X-Stream-Id of the stream and
+            the number of bytes already received
+        current_user: Authenticated user from JWT token
+        db: Database session
+        
+    Returns:
+        StreamingResponse: The remaining patent analysis output
+        
+    Raises:
+        HTTPException: If user lacks access or the stream is unknown
+    """
+    innovation = check_user_access_to_innovation(
+        db, 
+        str(current_user.id), 
+        req.companyId, 
+        req.innovationId
+    )
+    
+    if not innovation:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied: User does not have access to this innovation or innovation not found"
+        )
+    
+    resumed = await stream_flights.resume(req.streamId, req.offset)
+    # Stream keys are ("patent", innovation id, *regions)
+    if not resumed or resumed[0][:2] != ("patent", str(innovation.id)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patent analysis stream not found"
+        )
+    
+    logger.info(f"🔁 Resuming patent stream {req.streamId} at byte {req.offset} for innovation {req.innovationId}")
+    return streaming_response(resumed[1], gzip=req.gzip, headers={"X-Stream-Id": req.streamId})
+
+
+record_timing(f"import:{__name__}", time.perf_counter() - _import_started)
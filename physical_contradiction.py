@@ -7,33 +7,46 @@ nine windows, and functional analysis as input.
 """
 
 import os
-import json
+import time
+# Import cost of this module, reported by startup_report()
+_import_started = time.perf_counter()
 import asyncio
-import threading
-from datetime import datetime, timedelta
-from queue import Queue, Empty
-from threading import Thread
-from typing import Optional, Dict, Any, Union, List
+from typing import Optional, Dict, Any, Union, List, Literal
 
 from fastapi import HTTPException, Depends, status
-from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from app.utils.vertexai_utils import get_vertexai_client
-import vertexai
-from vertexai import agent_engines
-from google.adk.sessions import VertexAiSessionService
-from google.cloud import storage
-from .gcs_service import gcs_service
-from app.utils.storage import get_storage_client
+from .startup import ensure_vertexai_client, lazy_object, record_timing, register_warmup
+from .analysis_artifacts import fetch_json_artifacts
+from .analysis_cache import AnalysisResultCache, make_cache_key
+from .stream_fanout import stream_flights
+from .analysis_persistence import persist_artifacts, settle_persists
+from .analysis_status import physical_contradiction_status
+from .content_store import content_store
+from .response_buffer import ResponseBuffer
+from .context_compaction import compact_context
+from .pipeline_metrics import pipeline_metrics, stage_label
+from .loop_monitor import ensure_loop_monitor
+from .analysis_jobs import AnalysisJob, AnalysisJobResponse, analysis_jobs
+from .analysis_batch import (
+    BATCH_ITEM_DENIED, AnalysisBatch, load_batch_innovations, normalize_innovation_ids, run_bounded
+)
+from .agent_scheduler import AdmissionTicket, agent_scheduler
+from .agent_handles import get_agent_handle, get_session_pool, get_session_service, schedule_session_cleanup
 from dotenv import load_dotenv
-from app.utils.session_utils import generate_session_user_id
-from app.utils.json_utils import extract_json_from_response, extract_json_with_key, get_json_value_by_key
+from .json_extraction import extract_json, IncrementalJsonExtractor
+from .stream_events import StreamEvent
+from .stream_output import streaming_response
 import logging
 
 # Module logger
 logger = logging.getLogger(__name__)
+
+# Resolved on first upload so importing this module does not load google.cloud.storage
+gcs_service = lazy_object(".gcs_service", "gcs_service", __package__)
+
 if not logger.handlers:
     logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
 
@@ -51,32 +64,39 @@ def extract_model_of_problem_from_json(full_json: dict) -> Union[dict, list]:
         return full_json["model_of_problem"]
     return {}
 
-def extract_model_of_problem_from_response(text: str) -> Union[dict, list]:
-    """
-    Extract model_of_problem directly from AI response text.
-    
-    Args:
-        text: The full response text from the AI agent
-        
-    Returns:
-        dict: Only the model_of_problem section if found, empty dict otherwise
-    """
-    model_of_problem = get_json_value_by_key(text, "model_of_problem")
-    return model_of_problem if model_of_problem else {}
-
 from app.database.database import get_db
 from app.auth.auth import get_current_user
-from app.models.models import User, Innovation, Company, NineWindowsAnalysis, FunctionalAnalysis, ProblemStandardization, AnalysisStatus, PhysicalContradiction
+from app.models.models import User, Innovation, Company, NineWindowsAnalysis, FunctionalAnalysis, ProblemStandardization, AnalysisStatus
 
 load_dotenv()
 
 PROJECT_ID = os.getenv("PROJECT_ID")
 LOCATION = os.getenv("LOCATION")
 BUCKET_NAME = "triz_bucket"
+# Status for runs abandoned by their client; falls back to FAILED on schemas without it
+CANCELLED_STATUS = getattr(AnalysisStatus, "CANCELLED", AnalysisStatus.FAILED)
 
 class PhysicalContradictionRequest(BaseModel):
     companyId: str
     innovationId: str
+    # Streaming endpoints only: text/plain or Server-Sent Events, optionally gzipped
+    format: Literal["text", "sse"] = "text"
+    gzip: bool = False
+
+class PhysicalContradictionBatchRequest(BaseModel):
+    companyId: str
+    innovationIds: List[str]
+    # Progress stream: text/plain or Server-Sent Events, optionally gzipped
+    format: Literal["text", "sse"] = "text"
+    gzip: bool = False
+
+class PhysicalContradictionResumeRequest(BaseModel):
+    companyId: str
+    innovationId: str
+    streamId: str
+    offset: int = 0
+    # Resumed output is text/plain, since offsets count bytes of that rendering
+    gzip: bool = False
 
 class PhysicalContradictionResponse(BaseModel):
     message: str
@@ -92,9 +112,7 @@ class PhysicalContradictionResponse(BaseModel):
 
 class PhysicalContradictionStreamer:
     def __init__(self):
-        # Initialize Vertex AI using centralized client
-        get_vertexai_client()
-        
+        # The Vertex AI client is initialised on first use (or by the warm-up hook), not at import
         # Original bucket logic restored
         self.project_id = PROJECT_ID
         self.location = LOCATION
@@ -102,20 +120,28 @@ class PhysicalContradictionStreamer:
         self.resource_id = "2230258181873860608"  # Physical Contradiction Agent
 
     def initialize_vertex_ai(self):
-        # VertexAI already initialized via centralized client
-        pass
+        # Centralized client, initialised once per process
+        ensure_vertexai_client()
+
+    def warm_up(self):
+        """Initialise the Vertex AI client, agent handle and session service ahead of the first request."""
+        self.initialize_vertex_ai()
+        self.get_agent()
+        get_session_service(self.project_id, self.location)
 
     async def create_session(self, user_id: str):
-        service = VertexAiSessionService(self.project_id, self.location)
-        # Generate unique user ID to prevent concurrent session conflicts
-        unique_user_id = generate_session_user_id(user_id, prefix="physical_contradiction_user")
-        session = await service.create_session(app_name=self.resource_id, user_id=unique_user_id)
-        return service, session, unique_user_id
+        # Reuse the shared session service and, when pooling is enabled, a pre-created session
+        pool = get_session_pool(self.resource_id, self.project_id, self.location, prefix="physical_contradiction_user")
+        return await pool.acquire(user_id)
 
     def get_agent(self):
-        return agent_engines.get(self.resource_id)
+        return get_agent_handle(self.resource_id)
 
-    def _upload_to_gcs(self, text: str, innovation_id: str, company_id: str, file_suffix: str = "") -> tuple[str, str]:
+    def _upload_to_gcs(self, text: str, innovation_id: str, company_id: str, file_suffix: str = "",
+                       parts: Optional[List[str]] = None) -> tuple[str, str]:
+        if content_store.enabled:
+            # Identical outputs share one blob; a full text made of stored parts is composed in GCS
+            return content_store.put_text(text, parts=parts)
         analysis_type = f"physical_contradiction{file_suffix}" if file_suffix else "physical_contradiction"
         return gcs_service.upload_text_to_gcs(
             text=text,
@@ -127,6 +153,8 @@ class PhysicalContradictionStreamer:
         )
 
     def _save_json_to_gcs(self, json_data: dict, innovation_id: str, company_id: str) -> tuple[str, str]:
+        if content_store.enabled:
+            return content_store.put_json(json_data)
         return gcs_service.save_json_to_gcs(
             json_data=json_data,
             innovation_id=innovation_id,
@@ -138,6 +166,9 @@ class PhysicalContradictionStreamer:
     
     def _save_model_of_problem_to_gcs(self, model_of_problem_data: dict, innovation_id: str, company_id: str) -> tuple[str, str]:
         """Save only the model_of_problem portion to GCS separately."""
+        if content_store.enabled:
+            # When the model of problem is the whole JSON document this reuses its blob
+            return content_store.put_json(model_of_problem_data)
         return gcs_service.save_json_to_gcs(
             json_data=model_of_problem_data,
             innovation_id=innovation_id,
@@ -147,18 +178,28 @@ class PhysicalContradictionStreamer:
             project_id=self.project_id
         )
 
-    async def stream_response(self, context_data: dict, user_id: str, innovation_id: str, company_id: str):
+    async def stream_response(self, context_data: dict, user_id: str, innovation_id: str, company_id: str,
+                              admission: Optional[AdmissionTicket] = None):
         self.initialize_vertex_ai()
-        service, session, unique_user_id = await self.create_session(f"user_{user_id}")
-        agent = self.get_agent()
-        queue = Queue()
-        full_response = []
-        all_parts = []
+        # Wait for a slot on this agent unless the caller already holds one
+        if admission is None:
+            admission = await agent_scheduler.acquire(self.resource_id, company_id)
+        pipeline_metrics.observe("physical_contradiction", "admission_wait", admission.queued_seconds)
+        try:
+            with pipeline_metrics.stage("physical_contradiction", "session_create"):
+                service, session, unique_user_id = await self.create_session(f"user_{user_id}")
+                agent = self.get_agent()
+        except BaseException:
+            admission.release()
+            raise
+        response = ResponseBuffer()
 
         # Convert context data to the expected format for the agent
-        query = json.dumps(context_data, indent=2)
+        query = compact_context(context_data, "physical_contradiction").query
 
         async def generator():
+            started = time.perf_counter()
+            first_token = True
             try:
                 async for event in agent.async_stream_query(
                     user_id=unique_user_id,
@@ -170,96 +211,171 @@ class PhysicalContradictionStreamer:
                     for part in parts:
                         text_part = part.get("text", "")
                         if text_part:
-                            full_response.append(text_part)
+                            if first_token:
+                                first_token = False
+                                pipeline_metrics.observe("physical_contradiction", "time_to_first_token", time.perf_counter() - started)
+                            response.append(text_part)
                             yield text_part
-                all_parts.extend(full_response)
             except Exception as e:
-                import traceback
-                traceback.print_exc()
+                logger.exception("Physical Contradiction agent stream failed: %s", e)
                 raise
             finally:
-                await service.delete_session(app_name=self.resource_id, user_id=unique_user_id, session_id=session.id)
+                pipeline_metrics.observe("physical_contradiction", "streaming", time.perf_counter() - started)
+                admission.release()
+                # Session cleanup runs in the background, off the response path
+                schedule_session_cleanup(service, self.resource_id, unique_user_id, session.id)
 
-        return generator, full_response, all_parts
+        return generator, response
 
-def format_analyses_for_physical_contradiction(innovation: Innovation, company: Company, db: Session) -> dict:
+def _latest_completed_json_urls(model, innovation_ids: List[Any]):
     """
-    Format problem standardization, nine windows, and functional analysis data for Physical Contradiction Agent.
+    Subquery of the JSON GCS URL of each innovation's most recent COMPLETED row of a table.
     
     Args:
-        innovation: Innovation database object
-        company: Company database object
+        model: Upstream analysis model with innovation_id, status and json_gcs_url columns
+        innovation_ids: Innovation ids to restrict the subquery to
+        
+    Returns:
+        Subquery with one (innovation_id, json_gcs_url) row per innovation
+    """
+    # Newest first, the id breaking ties, so the bulk and single paths pick the same row
+    order = [model.id.desc()]
+    if hasattr(model, "updated_at"):
+        order.insert(0, model.updated_at.desc())
+    ranked = select(
+        model.innovation_id,
+        model.json_gcs_url,
+        func.row_number().over(partition_by=model.innovation_id, order_by=order).label("rank")
+    ).where(
+        model.status == AnalysisStatus.COMPLETED,
+        model.innovation_id.in_(innovation_ids)
+    ).subquery()
+    return select(ranked.c.innovation_id, ranked.c.json_gcs_url).where(ranked.c.rank == 1).subquery()
+
+def load_physical_contradiction_prerequisites_bulk(innovation_ids: List[Any], db: Session) -> Dict[str, Any]:
+    """
+    Fetch the Physical Contradiction prerequisites of several innovations in one query.
+    
+    Each upstream table contributes its most recent COMPLETED row per innovation, so
+    innovations with several completed runs still yield exactly one row.
+    
+    Args:
+        innovation_ids: Innovation ids to check
         db: Database session
         
     Returns:
-        Combined analysis data formatted for Physical Contradiction agent
+        Dict[str, Any]: Row of problem, nine_windows and functional JSON GCS URLs (None
+        where the analysis is not completed), keyed by innovation id as a string
+    """
+    innovation_ids = list(innovation_ids)
+    problem = _latest_completed_json_urls(ProblemStandardization, innovation_ids)
+    nine_windows = _latest_completed_json_urls(NineWindowsAnalysis, innovation_ids)
+    functional = _latest_completed_json_urls(FunctionalAnalysis, innovation_ids)
+    rows = db.query(
+        Innovation.id.label("innovation_id"),
+        problem.c.json_gcs_url.label("problem"),
+        nine_windows.c.json_gcs_url.label("nine_windows"),
+        functional.c.json_gcs_url.label("functional")
+    ).select_from(Innovation).outerjoin(
+        problem, problem.c.innovation_id == Innovation.id
+    ).outerjoin(
+        nine_windows, nine_windows.c.innovation_id == Innovation.id
+    ).outerjoin(
+        functional, functional.c.innovation_id == Innovation.id
+    ).filter(
+        Innovation.id.in_(innovation_ids)
+    ).all()
+    
+    return {str(row.innovation_id): row for row in rows}
+
+def check_physical_contradiction_prerequisites(prerequisites) -> Dict[str, str]:
+    """
+    Validate one innovation's prerequisite row.
+    
+    Args:
+        prerequisites: Row from load_physical_contradiction_prerequisites_bulk, or None
+        
+    Returns:
+        Dict[str, str]: JSON GCS URLs keyed by "problem", "nine_windows" and "functional"
         
     Raises:
         HTTPException: If required analyses are not completed
     """
-    
-    # Check if problem standardization is completed
-    problem_standardization = db.query(ProblemStandardization).filter(
-        ProblemStandardization.innovation_id == innovation.id,
-        ProblemStandardization.status == AnalysisStatus.COMPLETED
-    ).first()
-    
-    if not problem_standardization or not problem_standardization.json_gcs_url:
+    if not prerequisites or not prerequisites.problem:
         raise HTTPException(
             status_code=status.HTTP_412_PRECONDITION_FAILED,
             detail="Problem standardization must be completed before generating Physical Contradiction analysis."
         )
     
-    # Check if nine windows analysis is completed
-    nine_windows_analysis = db.query(NineWindowsAnalysis).filter(
-        NineWindowsAnalysis.innovation_id == innovation.id,
-        NineWindowsAnalysis.status == AnalysisStatus.COMPLETED
-    ).first()
-    
-    if not nine_windows_analysis or not nine_windows_analysis.json_gcs_url:
+    if not prerequisites.nine_windows:
         raise HTTPException(
             status_code=status.HTTP_412_PRECONDITION_FAILED,
             detail="Nine windows analysis must be completed before generating Physical Contradiction analysis."
         )
     
-    # Check if functional analysis is completed
-    functional_analysis = db.query(FunctionalAnalysis).filter(
-        FunctionalAnalysis.innovation_id == innovation.id,
-        FunctionalAnalysis.status == AnalysisStatus.COMPLETED
-    ).first()
-    
-    if not functional_analysis or not functional_analysis.json_gcs_url:
+    if not prerequisites.functional:
         raise HTTPException(
             status_code=status.HTTP_412_PRECONDITION_FAILED,
             detail="Functional analysis must be completed before generating Physical Contradiction analysis."
         )
     
+    return {
+        "problem": prerequisites.problem,
+        "nine_windows": prerequisites.nine_windows,
+        "functional": prerequisites.functional
+    }
+
+def load_physical_contradiction_prerequisites(innovation: Innovation, db: Session) -> Dict[str, str]:
+    """
+    Check all Physical Contradiction prerequisites with a single database round-trip.
+    
+    Args:
+        innovation: Innovation database object
+        db: Database session
+        
+    Returns:
+        Dict[str, str]: JSON GCS URLs keyed by "problem", "nine_windows" and "functional"
+        
+    Raises:
+        HTTPException: If required analyses are not completed
+    """
+    rows = load_physical_contradiction_prerequisites_bulk([innovation.id], db)
+    return check_physical_contradiction_prerequisites(rows.get(str(innovation.id)))
+
+async def format_analyses_for_physical_contradiction(innovation: Innovation, company: Company, db: Session,
+                                                     json_gcs_urls: Optional[Dict[str, str]] = None) -> dict:
+    """
+    Format problem standardization, nine windows, and functional analysis data for Physical Contradiction Agent.
+    
+    The three upstream JSON documents are downloaded concurrently in worker threads,
+    so the cold-start cost is roughly that of the slowest single download. Documents
+    are served from the shared upstream cache while their blob generation is unchanged.
+    
+    Args:
+        innovation: Innovation database object
+        company: Company database object
+        db: Database session
+        json_gcs_urls: Prerequisite URLs already validated for a batch; skips the query
+        
+    Returns:
+        Combined analysis data formatted for Physical Contradiction agent
+        
+    Raises:
+        HTTPException: If required analyses are not completed
+    """
+    if json_gcs_urls is None:
+        with pipeline_metrics.stage("physical_contradiction", "prerequisites"):
+            json_gcs_urls = load_physical_contradiction_prerequisites(innovation, db)
+    
     try:
-        client = get_storage_client()
-        
-        # Download problem standardization data
-        problem_gcs_path = problem_standardization.json_gcs_url.replace("gs://triz_bucket/", "")
-        problem_blob = client.bucket("triz_bucket").blob(problem_gcs_path)
-        problem_content = problem_blob.download_as_text()
-        problem_data = json.loads(problem_content)
-        
-        # Download nine windows analysis data
-        nine_windows_gcs_path = nine_windows_analysis.json_gcs_url.replace("gs://triz_bucket/", "")
-        nine_windows_blob = client.bucket("triz_bucket").blob(nine_windows_gcs_path)
-        nine_windows_content = nine_windows_blob.download_as_text()
-        nine_windows_data = json.loads(nine_windows_content)
-        
-        # Download functional analysis data
-        functional_gcs_path = functional_analysis.json_gcs_url.replace("gs://triz_bucket/", "")
-        functional_blob = client.bucket("triz_bucket").blob(functional_gcs_path)
-        functional_content = functional_blob.download_as_text()
-        functional_data = json.loads(functional_content)
+        with pipeline_metrics.stage("physical_contradiction", "upstream_fetch"):
+            artifacts = await fetch_json_artifacts(json_gcs_urls)
         
         # Format for Physical Contradiction analysis according to the test input structure
         formatted_data = {
-            "Company_context": problem_data,  # Maps to problem standardization
-            "ideality_improvement_analysis": functional_data,  # Maps to functional analysis
-            "window_analysis": nine_windows_data  # Maps to nine windows analysis
+            "Company_context": artifacts["problem"],  # Maps to problem standardization
+            "ideality_improvement_analysis": artifacts["functional"],  # Maps to functional analysis
+            "window_analysis": artifacts["nine_windows"]  # Maps to nine windows analysis
         }
         
         return formatted_data
@@ -275,22 +391,14 @@ def format_analyses_for_physical_contradiction(innovation: Innovation, company:
 from app.services.problem_standardisation import check_user_access_to_innovation
 
 streamer = PhysicalContradictionStreamer()
+result_cache = AnalysisResultCache("physical_contradiction", signed_urls={
+    "signed_url": "gcs_url", "json_signed_url": "json_gcs_url", "model_of_problem_signed_url": "model_of_problem_gcs_url"
+})
+register_warmup("physical_contradiction", streamer.warm_up)
 
-async def generate_physical_contradiction_analysis(
-    req: PhysicalContradictionRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+async def prepare_physical_contradiction_analysis(req: PhysicalContradictionRequest, current_user: User, db: Session):
     """
-    Generate Physical Contradiction analysis using Vertex AI.
-    
-    This function:
-    1. Verifies user has access to the specified innovation
-    2. Fetches completed problem standardization, nine windows, and functional analysis
-    3. Formats the combined data for Physical Contradiction analysis
-    4. Processes the data with Vertex AI (Physical Contradiction agent)
-    5. Saves outputs (sub-agents and last-agent) separately to GCS
-    6. Returns the processed output and GCS URLs
+    Validate access and prerequisites and create a fresh IN_PROGRESS analysis record.
     
     Args:
         req: Request containing companyId and innovationId
@@ -298,20 +406,20 @@ async def generate_physical_contradiction_analysis(
         db: Database session
         
     Returns:
-        PhysicalContradictionResponse: Analysis results with GCS URLs
+        tuple: (innovation_id, context_data, cache_key, cached_response); cached_response is
+        a PhysicalContradictionResponse on a result cache hit, None otherwise
         
     Raises:
         HTTPException: If user lacks access or required analyses not completed
     """
-    logger.info("Starting Physical Contradiction analysis for innovation=%s company=%s", req.innovationId, req.companyId)
-    
     # Verify user has access to the innovation
-    innovation = check_user_access_to_innovation(
-        db, 
-        str(current_user.id), 
-        req.companyId, 
-        req.innovationId
-    )
+    with pipeline_metrics.stage("physical_contradiction", "access_check"):
+        innovation = check_user_access_to_innovation(
+            db, 
+            str(current_user.id), 
+            req.companyId, 
+            req.innovationId
+        )
     
     if not innovation:
         raise HTTPException(
@@ -327,124 +435,190 @@ async def generate_physical_contradiction_analysis(
             detail="Company not found"
         )
     
-    # Clear existing analysis and start fresh
-    existing_analysis = db.query(PhysicalContradiction).filter(
-        PhysicalContradiction.innovation_id == innovation.id
-    ).first()
-    
-    if existing_analysis:
-        logger.info("Clearing existing Physical Contradiction analysis for innovation=%s", innovation.innovation_name)
-        db.delete(existing_analysis)
-        db.commit()
+    return await begin_physical_contradiction_analysis(req, innovation, company, db)
+
+
+async def begin_physical_contradiction_analysis(req: PhysicalContradictionRequest, innovation: Innovation, company: Company,
+                                                db: Session, json_gcs_urls: Optional[Dict[str, str]] = None):
+    """
+    Mark the record IN_PROGRESS, build the agent input and look up the result cache.
     
-    # Create new analysis record
-    analysis_record = PhysicalContradiction(
-        innovation_id=innovation.id,
-        status=AnalysisStatus.IN_PROGRESS
-    )
-    db.add(analysis_record)
-    db.commit()
+    Args:
+        req: Request containing companyId and innovationId
+        innovation: Innovation the user has access to
+        company: Company of the innovation
+        db: Database session
+        json_gcs_urls: Prerequisite URLs already validated for a batch (optional)
+        
+    Returns:
+        tuple: (innovation_id, context_data, cache_key, cached_response) as returned by
+        prepare_physical_contradiction_analysis
+        
+    Raises:
+        HTTPException: If required analyses are not completed or cannot be fetched
+    """
+    # Start fresh: a single upsert clears any previous results and marks the run IN_PROGRESS
+    innovation_id = innovation.id
+    await physical_contradiction_status.start(innovation_id)
     
     try:
         # Format combined analysis data for Physical Contradiction
-        context_data = format_analyses_for_physical_contradiction(innovation, company, db)
+        context_data = await format_analyses_for_physical_contradiction(innovation, company, db, json_gcs_urls)
+        
+        # Serve identical re-runs from the result cache without starting an agent session
+        cache_key = make_cache_key(context_data, streamer.resource_id)
+        with pipeline_metrics.stage("physical_contradiction", "cache_lookup"):
+            cached_result = await result_cache.aget(cache_key)
+        if cached_result:
+            logger.info("Physical Contradiction cache hit for innovation=%s", innovation.innovation_name)
+            await physical_contradiction_status.complete(
+                innovation_id,
+                gcs_url=cached_result["gcs_url"],
+                json_gcs_url=cached_result["json_gcs_url"],
+                model_of_problem_gcs_url=cached_result["model_of_problem_gcs_url"],
+                model_of_problem_response=cached_result["model_of_problem_response"],
+                sub_agents_gcs_url=cached_result["sub_agents_url"],
+                last_agent_gcs_url=None
+            )
+            
+            return innovation_id, context_data, cache_key, PhysicalContradictionResponse(
+                message="Physical Contradiction analysis completed successfully",
+                gcs_url=cached_result["signed_url"],
+                json_response=cached_result["json_response"],
+                json_gcs_url=cached_result["json_signed_url"],
+                model_of_problem_response=cached_result["model_of_problem_response"],
+                model_of_problem_gcs_url=cached_result["model_of_problem_signed_url"],
+                sub_agents_url=cached_result["sub_agents_url"],
+                last_agent_url=cached_result["last_agent_url"],
+                innovationId=req.innovationId,
+                companyId=req.companyId
+            )
         
+        return innovation_id, context_data, cache_key, None
+        
+    except HTTPException:
+        # Update status to failed
+        await physical_contradiction_status.fail(innovation_id, "HTTP error occurred during analysis")
+        raise
+    except Exception as e:
+        logger.exception("Error in Physical Contradiction analysis: %s", e)
+        
+        # Update status to failed
+        await physical_contradiction_status.fail(innovation_id, str(e))
+        
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Physical Contradiction analysis failed: {str(e)}"
+        )
+
+
+async def run_physical_contradiction_analysis(
+    req: PhysicalContradictionRequest,
+    user_id: str,
+    innovation_id: str,
+    context_data: dict,
+    cache_key: str
+) -> PhysicalContradictionResponse:
+    """
+    Run the Physical Contradiction agent, persist the outputs and complete the record.
+    
+    Args:
+        req: Request containing companyId and innovationId
+        user_id: Id of the user the agent session is created for
+        innovation_id: Innovation id as a string; its record was set IN_PROGRESS by
+            prepare_physical_contradiction_analysis
+        context_data: Formatted agent input from format_analyses_for_physical_contradiction
+        cache_key: Result cache key for the context
+        
+    Returns:
+        PhysicalContradictionResponse: Analysis results with GCS URLs
+    """
+    try:
         # Generate Physical Contradiction analysis using the streamer
-        generator, full_response_parts, all_parts = await streamer.stream_response(
+        generator, response = await streamer.stream_response(
             context_data=context_data,
-            user_id=str(current_user.id),
-            innovation_id=str(innovation.id),
+            user_id=user_id,
+            innovation_id=innovation_id,
             company_id=req.companyId
         )
         
-        # Collect the full response
-        full_response = ""
-        async for chunk in generator():
-            full_response += chunk
+        # Drain the stream; the chunks accumulate in the response buffer
+        async for _ in generator():
+            pass
+        full_response = response.text()
         
         if not full_response:
-            analysis_record.status = AnalysisStatus.FAILED
-            analysis_record.error = "No response received from Physical Contradiction analysis agent"
-            db.commit()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="No response received from Physical Contradiction analysis agent"
             )
         
-        # Save full response to GCS
-        gcs_url, signed_url = streamer._upload_to_gcs(
-            text=full_response,
-            innovation_id=str(innovation.id),
-            company_id=req.companyId
-        )
-
-        # Save sub-agents output (all except last) and last agent output separately
-        sub_agents_url = None
-        last_agent_url = None
-        sub_agents_signed_url = None
-        last_agent_signed_url = None
-        
-        if all_parts and len(all_parts) > 1:
-            # Sub-agents output (all except last)
-            sub_output = "".join(all_parts[:-1])
-            if sub_output.strip():
-                sub_agents_url, sub_agents_signed_url = streamer._upload_to_gcs(
-                    text=sub_output,
-                    innovation_id=str(innovation.id),
-                    company_id=req.companyId,
-                    file_suffix="_sub_agents"
-                )
-            
-            # Last agent output (only last part)
-            last_output = all_parts[-1]
-            if last_output.strip():
-                last_agent_url, last_agent_signed_url = streamer._upload_to_gcs(
-                    text=last_output,
-                    innovation_id=str(innovation.id),
-                    company_id=req.companyId,
-                    file_suffix="_last_agent"
-                )
+        # Split sub-agents output (all except last) from the last agent output
+        sub_output = response.sub_agents_text()
+        last_output = response.last_agent_text()
         
-        # Extract and save JSON if available - always get the last JSON
-        json_gcs_url = None
-        model_of_problem_gcs_url = None
-        json_response = None
-        model_of_problem_response = None
-        json_signed_url = None
-        model_of_problem_signed_url = None
-        
-        # Extract JSON from final_json_string
-        extracted_json = extract_json_from_response(full_response, target_key="model_of_problem")
-        
-        if extracted_json:
-            # Save full JSON
-            json_gcs_url, json_signed_url = streamer._save_json_to_gcs(
-                json_data=extracted_json,
-                innovation_id=str(innovation.id),
-                company_id=req.companyId
-            )
-            json_response = extracted_json
-            
-           
-            model_of_problem_gcs_url, model_of_problem_signed_url = streamer._save_model_of_problem_to_gcs(
-                model_of_problem_data=extracted_json,
-                innovation_id=str(innovation.id),
-                company_id=req.companyId
-            )
-            model_of_problem_response = extracted_json
+        # Extract JSON from final_json_string - always get the last JSON
+        with pipeline_metrics.stage("physical_contradiction", "json_extraction"):
+            extracted_json = extract_json(full_response, target_key="model_of_problem").document
+        json_response = extracted_json or None
+        model_of_problem_response = extracted_json or None
+        
+        # Save full response, agent outputs and JSON concurrently
+        upload_started = time.perf_counter()
+        persisted = await persist_artifacts({
+            "full": lambda: streamer._upload_to_gcs(
+                text=full_response, innovation_id=innovation_id, company_id=req.companyId,
+                parts=[sub_output, last_output]
+            ),
+            "sub_agents": (lambda: streamer._upload_to_gcs(
+                text=sub_output, innovation_id=innovation_id, company_id=req.companyId, file_suffix="_sub_agents"
+            )) if sub_output and sub_output.strip() else None,
+            "last_agent": (lambda: streamer._upload_to_gcs(
+                text=last_output, innovation_id=innovation_id, company_id=req.companyId, file_suffix="_last_agent"
+            )) if last_output and last_output.strip() else None,
+            "json": (lambda: streamer._save_json_to_gcs(
+                json_data=extracted_json, innovation_id=innovation_id, company_id=req.companyId
+            )) if extracted_json else None,
+            "model_of_problem": (lambda: streamer._save_model_of_problem_to_gcs(
+                model_of_problem_data=extracted_json, innovation_id=innovation_id, company_id=req.companyId
+            )) if extracted_json else None
+        })
+        pipeline_metrics.observe("physical_contradiction", "upload", time.perf_counter() - upload_started)
+        await content_store.awrite_manifest("physical_contradiction", innovation_id, req.companyId, persisted)
+        gcs_url, signed_url = persisted["full"]
+        sub_agents_url, sub_agents_signed_url = persisted["sub_agents"]
+        last_agent_url, last_agent_signed_url = persisted["last_agent"]
+        json_gcs_url, json_signed_url = persisted["json"]
+        model_of_problem_gcs_url, model_of_problem_signed_url = persisted["model_of_problem"]
+        
+        # Update analysis record with results in a single write
+        await physical_contradiction_status.complete(
+            innovation_id,
+            gcs_url=gcs_url,
+            json_gcs_url=json_gcs_url,
+            model_of_problem_gcs_url=model_of_problem_gcs_url,
+            model_of_problem_response=model_of_problem_response,
+            sub_agents_gcs_url=sub_agents_url,
+            last_agent_gcs_url=None
+        )
         
-        # Update analysis record with results
-        analysis_record.status = AnalysisStatus.COMPLETED
-        analysis_record.gcs_url = gcs_url
-        analysis_record.json_gcs_url = json_gcs_url
-        analysis_record.model_of_problem_gcs_url = model_of_problem_gcs_url
-        analysis_record.model_of_problem_response = model_of_problem_response
-        analysis_record.sub_agents_gcs_url = sub_agents_url
-        analysis_record.last_agent_gcs_url = last_agent_url
-        analysis_record.last_agent_gcs_url = None
-        db.commit()
+        logger.info("Physical Contradiction analysis completed for innovation=%s", innovation_id)
         
-        logger.info("Physical Contradiction analysis completed for innovation=%s", innovation.innovation_name)
+        # Only cache runs that produced structured output so failed runs are retried
+        if json_response:
+            await result_cache.aput(cache_key, {
+                "text": full_response,
+                "gcs_url": gcs_url,
+                "signed_url": signed_url,
+                "json_response": json_response,
+                "json_gcs_url": json_gcs_url,
+                "json_signed_url": json_signed_url,
+                "model_of_problem_response": model_of_problem_response,
+                "model_of_problem_gcs_url": model_of_problem_gcs_url,
+                "model_of_problem_signed_url": model_of_problem_signed_url,
+                "sub_agents_url": sub_agents_url,
+                "last_agent_url": last_agent_url
+            })
         
         return PhysicalContradictionResponse(
             message="Physical Contradiction analysis completed successfully",
@@ -459,19 +633,15 @@ async def generate_physical_contradiction_analysis(
             companyId=req.companyId
         )
         
-    except HTTPException:
-        # Update status to failed
-        analysis_record.status = AnalysisStatus.FAILED
-        analysis_record.error = "HTTP error occurred during analysis"
-        db.commit()
+    except HTTPException as e:
+        # Update status to failed, keeping the reason the run was rejected
+        await physical_contradiction_status.fail(innovation_id, str(e.detail))
         raise
     except Exception as e:
         logger.exception("Error in Physical Contradiction analysis: %s", e)
         
         # Update status to failed
-        analysis_record.status = AnalysisStatus.FAILED
-        analysis_record.error = str(e)
-        db.commit()
+        await physical_contradiction_status.fail(innovation_id, str(e))
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -479,6 +649,196 @@ async def generate_physical_contradiction_analysis(
         )
 
 
+async def generate_physical_contradiction_analysis(
+    req: PhysicalContradictionRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Generate Physical Contradiction analysis using Vertex AI.
+    
+    This function:
+    1. Verifies user has access to the specified innovation
+    2. Fetches completed problem standardization, nine windows, and functional analysis
+    3. Formats the combined data for Physical Contradiction analysis
+    4. Processes the data with Vertex AI (Physical Contradiction agent)
+    5. Saves outputs (sub-agents and last-agent) separately to GCS
+    6. Returns the processed output and GCS URLs
+    
+    Args:
+        req: Request containing companyId and innovationId
+        current_user: Authenticated user from JWT token
+        db: Database session
+        
+    Returns:
+        PhysicalContradictionResponse: Analysis results with GCS URLs
+        
+    Raises:
+        HTTPException: If user lacks access or required analyses not completed
+    """
+    ensure_loop_monitor()
+    logger.info("Starting Physical Contradiction analysis for innovation=%s company=%s", req.innovationId, req.companyId)
+    
+    with pipeline_metrics.stage("physical_contradiction", "total"):
+        innovation_id, context_data, cache_key, cached_response = await prepare_physical_contradiction_analysis(req, current_user, db)
+        if cached_response:
+            return cached_response
+        
+        return await run_physical_contradiction_analysis(
+            req,
+            str(current_user.id),
+            str(innovation_id),
+            context_data,
+            cache_key
+        )
+
+
+async def submit_physical_contradiction_analysis_job(
+    req: PhysicalContradictionRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> AnalysisJobResponse:
+    """
+    Validate prerequisites and queue a Physical Contradiction analysis on the background worker pool.
+    
+    Args:
+        req: Request containing companyId and innovationId
+        current_user: Authenticated user from JWT token
+        db: Database session
+        
+    Returns:
+        AnalysisJobResponse: Job id and status to poll with get_physical_contradiction_analysis_job
+        
+    Raises:
+        HTTPException: If user lacks access, required analyses not completed or the queue is full
+    """
+    ensure_loop_monitor()
+    logger.info("Queueing Physical Contradiction analysis for innovation=%s company=%s", req.innovationId, req.companyId)
+    
+    record_innovation_id, context_data, cache_key, cached_response = await prepare_physical_contradiction_analysis(req, current_user, db)
+    
+    user_id = str(current_user.id)
+    job = AnalysisJob("physical_contradiction", req.innovationId, req.companyId, user_id)
+    if cached_response:
+        return analysis_jobs.complete(job, cached_response).to_response()
+    
+    # Status writes use their own short-lived sessions, so the job outlives the request session
+    innovation_id = str(record_innovation_id)
+    
+    async def run_job():
+        return await run_physical_contradiction_analysis(req, user_id, innovation_id, context_data, cache_key)
+    
+    try:
+        with stage_label("physical_contradiction.job"):
+            job = analysis_jobs.submit(job, run_job)
+    except HTTPException as e:
+        await physical_contradiction_status.fail(record_innovation_id, e.detail)
+        raise
+    
+    return job.to_response()
+
+
+async def get_physical_contradiction_analysis_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+) -> AnalysisJobResponse:
+    """
+    Return the status, and once completed the result, of a queued Physical Contradiction analysis.
+    
+    Args:
+        job_id: Id returned by submit_physical_contradiction_analysis_job
+        current_user: Authenticated user from JWT token
+        
+    Returns:
+        AnalysisJobResponse: Job status with the PhysicalContradictionResponse payload as result
+    """
+    return analysis_jobs.get(job_id, str(current_user.id)).to_response()
+
+
+async def generate_physical_contradiction_analysis_batch(
+    req: PhysicalContradictionBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue Physical Contradiction analyses for many innovations and stream their progress.
+    
+    Access, the company and the three prerequisite analyses are checked for the whole
+    batch with one query each, and the upstream inputs are prefetched together. Each
+    valid innovation then runs as a background job on the shared worker pool; the
+    stream reports per-item progress and ends with a summary. Items keep running if
+    the client disconnects and can be polled by their job ids.
+    
+    Args:
+        req: Request containing companyId and the innovationIds to analyse
+        current_user: Authenticated user from JWT token
+        db: Database session
+        
+    Returns:
+        StreamingResponse: Per-item progress events, with the batch id in X-Batch-Id
+        
+    Raises:
+        HTTPException: If the batch is empty or too large, the company is not found or
+            the user lacks access to it
+    """
+    ensure_loop_monitor()
+    innovation_ids = normalize_innovation_ids(req.innovationIds)
+    user_id = str(current_user.id)
+    logger.info("Starting Physical Contradiction batch of %s innovations for company=%s", len(innovation_ids), req.companyId)
+    
+    with pipeline_metrics.stage("physical_contradiction", "access_check"):
+        company, innovations = load_batch_innovations(db, user_id, req.companyId, innovation_ids)
+    batch = AnalysisBatch("physical_contradiction", req.companyId, user_id)
+    
+    with pipeline_metrics.stage("physical_contradiction", "prerequisites"):
+        prerequisites = load_physical_contradiction_prerequisites_bulk(
+            [innovation.id for innovation in innovations.values()], db
+        ) if innovations else {}
+    
+    ready = {}
+    for innovation_id in innovation_ids:
+        if innovation_id not in innovations:
+            batch.reject(innovation_id, BATCH_ITEM_DENIED)
+            continue
+        try:
+            ready[innovation_id] = check_physical_contradiction_prerequisites(prerequisites.get(innovation_id))
+        except HTTPException as e:
+            await physical_contradiction_status.fail(innovations[innovation_id].id, e.detail)
+            batch.reject(innovation_id, e.detail)
+    
+    # Prefetch the upstream documents, then complete cache hits; the other records are IN_PROGRESS
+    prepared = await run_bounded({
+        innovation_id: (lambda innovation_id=innovation_id, urls=urls: begin_physical_contradiction_analysis(
+            PhysicalContradictionRequest(companyId=req.companyId, innovationId=innovation_id),
+            innovations[innovation_id], company, db, urls
+        ))
+        for innovation_id, urls in ready.items()
+    })
+    
+    for innovation_id, outcome in prepared.items():
+        if isinstance(outcome, Exception):
+            # begin_physical_contradiction_analysis has already marked the record failed
+            batch.reject(innovation_id, str(getattr(outcome, "detail", outcome)))
+            continue
+        record_innovation_id, context_data, cache_key, cached_response = outcome
+        if cached_response:
+            batch.cached(innovation_id, cached_response)
+            continue
+        item_req = PhysicalContradictionRequest(companyId=req.companyId, innovationId=innovation_id)
+        
+        async def run_item(item_req=item_req, context_data=context_data, cache_key=cache_key):
+            return await run_physical_contradiction_analysis(item_req, user_id, item_req.innovationId, context_data, cache_key)
+        
+        try:
+            with stage_label("physical_contradiction.batch"):
+                batch.submit(innovation_id, run_item)
+        except HTTPException as e:
+            await physical_contradiction_status.fail(record_innovation_id, e.detail)
+            batch.reject(innovation_id, e.detail)
+    
+    return streaming_response(batch.events(), req.format, req.gzip, batch.response_headers())
+
+
 async def generate_physical_contradiction_analysis_stream(
     req: PhysicalContradictionRequest,
     current_user: User = Depends(get_current_user),
@@ -498,15 +858,18 @@ async def generate_physical_contradiction_analysis_stream(
     Raises:
         HTTPException: If user lacks access or required analyses not completed
     """
+    ensure_loop_monitor()
     logger.info("Starting Physical Contradiction analysis (streaming) for innovation=%s company=%s", req.innovationId, req.companyId)
+    started = time.perf_counter()
     
     # Verify user has access to the innovation
-    innovation = check_user_access_to_innovation(
-        db, 
-        str(current_user.id), 
-        req.companyId, 
-        req.innovationId
-    )
+    with pipeline_metrics.stage("physical_contradiction", "access_check"):
+        innovation = check_user_access_to_innovation(
+            db, 
+            str(current_user.id), 
+            req.companyId, 
+            req.innovationId
+        )
     
     if not innovation:
         raise HTTPException(
@@ -522,134 +885,228 @@ async def generate_physical_contradiction_analysis_stream(
             detail="Company not found"
         )
     
-    # Clear existing analysis and start fresh
-    existing_analysis = db.query(PhysicalContradiction).filter(
-        PhysicalContradiction.innovation_id == innovation.id
-    ).first()
+    # Attach to an identical analysis that is already streaming instead of starting another run
+    flight_key = ("physical_contradiction", str(innovation.id))
+    running_flight = stream_flights.get(flight_key)
+    if running_flight:
+        logger.info("Attaching to running Physical Contradiction stream for innovation=%s", innovation.innovation_name)
+        return streaming_response(running_flight.subscribe(), req.format, req.gzip, running_flight.response_headers())
     
-    if existing_analysis:
-        logger.info("Clearing existing Physical Contradiction analysis for innovation=%s", innovation.innovation_name)
-        db.delete(existing_analysis)
-        db.commit()
+    # Check prerequisites and fetch the upstream documents with the request's session,
+    # before holding an agent slot
+    context_data = await format_analyses_for_physical_contradiction(innovation, company, db)
     
-    # Create new analysis record
-    analysis_record = PhysicalContradiction(
-        innovation_id=innovation.id,
-        status=AnalysisStatus.IN_PROGRESS
-    )
-    db.add(analysis_record)
-    db.commit()
+    # Wait for an agent slot before touching the record so that overload surfaces as a 429
+    admission = await agent_scheduler.acquire(streamer.resource_id, req.companyId)
+    running_flight = stream_flights.get(flight_key)
+    if running_flight:
+        # Another caller started the same analysis while we were queued
+        admission.release()
+        return streaming_response(running_flight.subscribe(), req.format, req.gzip, running_flight.response_headers())
+    
+    # The flight outlives the request session, so it only keeps plain values
+    record_innovation_id = innovation.id
+    innovation_id = str(record_innovation_id)
+    innovation_name = innovation.innovation_name
+    user_id = str(current_user.id)
     
     async def stream_physical_contradiction_analysis():
+        # Persists started mid-stream are held here until they have finished
+        early_persists = []
         try:
-            # Format combined analysis data for Physical Contradiction
-            context_data = format_analyses_for_physical_contradiction(innovation, company, db)
+            # Start fresh: a single upsert clears any previous results and marks the run
+            # IN_PROGRESS. It runs inside the flight, which is registered without awaiting
+            # after the admission re-check, so concurrent callers cannot both start a run.
+            # Status writes use their own sessions, not this request's.
+            await physical_contradiction_status.start(record_innovation_id)
             
             # Generate Physical Contradiction analysis using the streamer
-            generator, full_response_parts, all_parts = await streamer.stream_response(
+            generator, response = await streamer.stream_response(
                 context_data=context_data,
-                user_id=str(current_user.id),
-                innovation_id=str(innovation.id),
-                company_id=req.companyId
+                user_id=user_id,
+                innovation_id=innovation_id,
+                company_id=req.companyId,
+                admission=admission
             )
+            yield StreamEvent("progress", {"stage": "streaming"}, text="")
+            
+            def persist_structured(json_data, model_of_problem_data):
+                return persist_artifacts({
+                    "json": lambda: streamer._save_json_to_gcs(
+                        json_data=json_data, innovation_id=innovation_id, company_id=req.companyId
+                    ),
+                    "model_of_problem": (lambda: streamer._save_model_of_problem_to_gcs(
+                        model_of_problem_data=model_of_problem_data, innovation_id=innovation_id, company_id=req.companyId
+                    )) if model_of_problem_data else None
+                })
             
-            # Stream the response and collect full response
-            full_response = ""
+            # Stream the response; the chunks accumulate in the response buffer. JSON is
+            # parsed as it arrives, and once an object carrying model_of_problem closes it
+            # is published to the client and persisted in the background.
+            extractor = IncrementalJsonExtractor(target_key="model_of_problem")
+            early_document = None
             async for chunk in generator():
-                full_response += chunk
                 yield chunk
+                for document in extractor.feed(chunk):
+                    if document.has_target:
+                        yield StreamEvent("structured_json", {"key": "model_of_problem", "data": document.target})
+                        early_document = document
+                        early_persists.append(asyncio.create_task(persist_structured(document.value, document.target)))
+            extractor.close()
+            full_response = response.text()
             
             if full_response:
-                # Save full response to GCS
-                gcs_url, signed_url = streamer._upload_to_gcs(
-                    text=full_response,
-                    innovation_id=str(innovation.id),
-                    company_id=req.companyId
-                )
-                
-                # Save separate outputs
-                sub_agents_url = None
-                last_agent_url = None
+                # Split sub-agents output from the last agent output
+                sub_output = response.sub_agents_text()
+                last_output = response.last_agent_text()
                 
-                if all_parts and len(all_parts) > 1:
-                    # Sub-agents output
-                    sub_output = "".join(all_parts[:-1])
-                    if sub_output.strip():
-                        sub_agents_url, _ = streamer._upload_to_gcs(
-                            text=sub_output,
-                            innovation_id=str(innovation.id),
-                            company_id=req.companyId,
-                            file_suffix="_sub_agents"
-                        )
-                    
-                    # Last agent output
-                    last_output = all_parts[-1]
-                    if last_output.strip():
-                        last_agent_url, _ = streamer._upload_to_gcs(
-                            text=last_output,
-                            innovation_id=str(innovation.id),
-                            company_id=req.companyId,
-                            file_suffix="_last_agent"
-                        )
+                # JSON with model_of_problem key (or the last JSON) plus the subtree
+                extraction = extractor.result()
+                extracted_json = extraction.document
                 
-                # Extract and save JSON if available - always get the last JSON
-                json_gcs_url = None
-                model_of_problem_gcs_url = None
+                model_of_problem_data = None
+                if extracted_json:
+                    model_of_problem_data = extraction.target or extract_model_of_problem_from_json(extracted_json)
                 
-                # First try to get JSON with model_of_problem key, then fallback to last JSON
-                extracted_json = extract_json_from_response(full_response, target_key="model_of_problem")
+                # Structured output already persisted mid-stream is reused unless a later object superseded it
+                structured_persisted_early = early_document is not None and extraction.document_span == early_document.span
+                structured_persist = None
+                if extracted_json and not structured_persisted_early:
+                    structured_persist = persist_structured(extracted_json, model_of_problem_data)
                 
+                # Save full response and agent outputs concurrently with any pending JSON uploads
+                yield StreamEvent("progress", {"stage": "saving"}, text="")
+                upload_started = time.perf_counter()
+                persisted, *structured_results = await asyncio.gather(
+                    persist_artifacts({
+                        "full": lambda: streamer._upload_to_gcs(
+                            text=full_response, innovation_id=innovation_id, company_id=req.companyId,
+                            parts=[sub_output, last_output]
+                        ),
+                        "sub_agents": (lambda: streamer._upload_to_gcs(
+                            text=sub_output, innovation_id=innovation_id, company_id=req.companyId, file_suffix="_sub_agents"
+                        )) if sub_output and sub_output.strip() else None,
+                        "last_agent": (lambda: streamer._upload_to_gcs(
+                            text=last_output, innovation_id=innovation_id, company_id=req.companyId, file_suffix="_last_agent"
+                        )) if last_output and last_output.strip() else None
+                    }),
+                    *early_persists,
+                    *([structured_persist] if structured_persist else [])
+                )
+                pipeline_metrics.observe("physical_contradiction", "upload", time.perf_counter() - upload_started)
                 if extracted_json:
-                    # Save full JSON
-                    json_gcs_url, _ = streamer._save_json_to_gcs(
-                        json_data=extracted_json,
-                        innovation_id=str(innovation.id),
-                        company_id=req.companyId
-                    )
-                    
-                    # Extract and save model_of_problem separately
-                    model_of_problem_data = extract_model_of_problem_from_response(full_response)
-                    if not model_of_problem_data:
-                        model_of_problem_data = extract_model_of_problem_from_json(extracted_json)
-                    
-                    if model_of_problem_data:
-                        model_of_problem_gcs_url, model_of_problem_signed_url = streamer._save_model_of_problem_to_gcs(
-                            model_of_problem_data=model_of_problem_data,
-                            innovation_id=str(innovation.id),
-                            company_id=req.companyId
-                        )
+                    persisted.update(structured_results[-1])
+                else:
+                    persisted.update({"json": (None, None), "model_of_problem": (None, None)})
+                await content_store.awrite_manifest("physical_contradiction", innovation_id, req.companyId, persisted)
+                gcs_url, signed_url = persisted["full"]
+                sub_agents_url, _ = persisted["sub_agents"]
+                last_agent_url, _ = persisted["last_agent"]
+                json_gcs_url, _ = persisted["json"]
+                model_of_problem_gcs_url, model_of_problem_signed_url = persisted["model_of_problem"]
+                model_of_problem_response = model_of_problem_data or None
                 
-                # Update analysis record with results
-                analysis_record.status = AnalysisStatus.COMPLETED
-                analysis_record.gcs_url = gcs_url
-                analysis_record.json_gcs_url = json_gcs_url
-                analysis_record.model_of_problem_gcs_url = model_of_problem_gcs_url
-                analysis_record.model_of_problem_response = model_of_problem_response
-                analysis_record.sub_agents_gcs_url = sub_agents_url
-                analysis_record.last_agent_gcs_url = last_agent_url
-                analysis_record.last_agent_gcs_url = None
-                db.commit()
-                
-                yield f"\n\n📊 Physical Contradiction analysis completed and saved to GCS: {signed_url}\n"
+                # Tell the client as soon as the uploads are done, before the DB write
+                yield StreamEvent("saved_artifact", {"artifact": "full", "url": signed_url},
+                                  text=f"\n\n📊 Physical Contradiction analysis completed and saved to GCS: {signed_url}\n")
                 if json_gcs_url:
-                    yield f"📄 JSON results saved\n"
+                    yield StreamEvent("saved_artifact", {"artifact": "json"}, text=f"📄 JSON results saved\n")
                 if model_of_problem_gcs_url:
-                    yield f"🎩 Model of problem saved to: {model_of_problem_signed_url}\n"
+                    yield StreamEvent("saved_artifact", {"artifact": "model_of_problem", "url": model_of_problem_signed_url},
+                                      text=f"🎩 Model of problem saved to: {model_of_problem_signed_url}\n")
+                
+                # Update analysis record with results in a single write
+                await physical_contradiction_status.complete(
+                    record_innovation_id,
+                    gcs_url=gcs_url,
+                    json_gcs_url=json_gcs_url,
+                    model_of_problem_gcs_url=model_of_problem_gcs_url,
+                    model_of_problem_response=model_of_problem_response,
+                    sub_agents_gcs_url=sub_agents_url,
+                    last_agent_gcs_url=None
+                )
+                pipeline_metrics.observe("physical_contradiction", "total", time.perf_counter() - started)
+                yield StreamEvent("progress", {"stage": "completed"}, text="")
             else:
                 # Update status to failed
-                analysis_record.status = AnalysisStatus.FAILED
-                analysis_record.error = "No response received from agent"
-                db.commit()
-                yield "❌ Error: No response received from Physical Contradiction analysis agent\n"
+                await physical_contradiction_status.fail(record_innovation_id, "No response received from agent")
+                yield StreamEvent("error", {"message": "No response received from Physical Contradiction analysis agent"},
+                                  text="❌ Error: No response received from Physical Contradiction analysis agent\n")
                 
+        except asyncio.CancelledError:
+            # Every client disconnected; the agent iteration has been cancelled and its
+            # session is cleaned up by the streamer
+            logger.info("Physical Contradiction stream cancelled for innovation=%s", innovation_name)
+            await asyncio.shield(physical_contradiction_status.fail(
+                record_innovation_id, "Cancelled: client disconnected", status_value=CANCELLED_STATUS
+            ))
+            raise
         except Exception as e:
             logger.exception("Error in Physical Contradiction analysis streaming: %s", e)
             
             # Update status to failed
-            analysis_record.status = AnalysisStatus.FAILED
-            analysis_record.error = str(e)
-            db.commit()
+            await physical_contradiction_status.fail(record_innovation_id, str(e))
             
-            yield f"❌ Error: {str(e)}\n"
+            yield StreamEvent("error", {"message": str(e)}, text=f"❌ Error: {str(e)}\n")
+        finally:
+            await settle_persists(early_persists)
+    
+    try:
+        with stage_label("physical_contradiction.stream"):
+            flight = stream_flights.start(flight_key, stream_physical_contradiction_analysis())
+    except BaseException:
+        admission.release()
+        raise
+    # The streamer releases the slot itself; this covers a flight that fails or is
+    # cancelled before its agent session opens
+    flight.task.add_done_callback(lambda _task: admission.release())
+    return streaming_response(flight.subscribe(), req.format, req.gzip, flight.response_headers())
+
+async def resume_physical_contradiction_analysis_stream(
+    req: PhysicalContradictionResumeRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Resume a Physical Contradiction analysis stream after a dropped connection.
+    
+    Replays the output after the given byte offset and, if the run is still going,
+    continues with the live tail. Finished runs are replayed in full from the stream log.
     
-    return StreamingResponse(stream_physical_contradiction_analysis(), media_type="text/plain")
\ No newline at end of file
+    Args:
+        req: Request containing companyId, innovationId, the X-Stream-Id of the stream and
+            the number of bytes already received
+        current_user: Authenticated user from JWT token
+        db: Database session
+        
+    Returns:
+        StreamingResponse: The remaining Physical Contradiction analysis output
+        
+    Raises:
+        HTTPException: If user lacks access or the stream is unknown
+    """
+    innovation = check_user_access_to_innovation(
+        db, 
+        str(current_user.id), 
+        req.companyId, 
+        req.innovationId
+    )
+    
+    if not innovation:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied: User does not have access to this innovation or innovation not found"
+        )
+    
+    resumed = await stream_flights.resume(req.streamId, req.offset)
+    if not resumed or resumed[0] != ("physical_contradiction", str(innovation.id)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Physical Contradiction analysis stream not found"
+        )
+    
+    logger.info("Resuming Physical Contradiction stream %s at byte %s for innovation=%s", req.streamId, req.offset, innovation.innovation_name)
+    return streaming_response(resumed[1], gzip=req.gzip, headers={"X-Stream-Id": req.streamId})
+
+
+record_timing(f"import:{__name__}", time.perf_counter() - _import_started)
@@ -0,0 +1,171 @@
+"""
+Pipeline Stage Metrics.
+
+Lightweight timers for the stages of an analysis run (access check, prerequisite
+queries, GCS downloads, session creation, time to first token, streaming, JSON
+extraction, uploads, DB commits). Durations are aggregated into fixed-bucket histograms
+per agent type and stage, and rendered in the Prometheus text exposition format.
+
+The module has no dependencies beyond the standard library; metrics_api serves it from
+the API process that runs the pipelines.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; agent runs take minutes, DB and cache work milliseconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# A collector returns samples as (metric name, labels, value); names ending in _total
+# are exposed as counters, all others as gauges
+Collector = Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]
+
+# "<agent>.<stage>" the current task is in, used to attribute event-loop stalls
+current_stage: ContextVar[Optional[str]] = ContextVar("pipeline_stage", default=None)
+
+
+@contextmanager
+def stage_label(label: str) -> Iterator[None]:
+    """
+    Attribute the enclosed work to a stage without timing it.
+
+    Tasks copy the context when they are created, so a background task started inside
+    this block keeps the label for its whole lifetime.
+    """
+    token = current_stage.set(label)
+    try:
+        yield
+    finally:
+        current_stage.reset(token)
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class PipelineMetrics:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._collectors: List[Tuple[str, Collector]] = []
+        self._lock = threading.Lock()
+
+    def observe(self, agent: str, stage: str, seconds: float):
+        """Record one stage duration."""
+        with self._lock:
+            histogram = self._histograms.get((agent, stage))
+            if histogram is None:
+                histogram = self._histograms[(agent, stage)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def error(self, agent: str, stage: str):
+        """Count a stage that ended with an exception."""
+        with self._lock:
+            self._errors[(agent, stage)] = self._errors.get((agent, stage), 0) + 1
+
+    @contextmanager
+    def stage(self, agent: str, stage: str) -> Iterator[None]:
+        """
+        Time the enclosed block as one stage; works inside async functions too.
+
+        Usage:
+            with pipeline_metrics.stage("patent", "upload"):
+                await persist_artifacts(...)
+        """
+        started = time.perf_counter()
+        token = current_stage.set(f"{agent}.{stage}")
+        try:
+            yield
+        except BaseException:
+            self.error(agent, stage)
+            raise
+        finally:
+            current_stage.reset(token)
+            self.observe(agent, stage, time.perf_counter() - started)
+
+    def register_collector(self, help_text: str, collector: Collector):
+        """Add gauges (e.g. queue depths or cache sizes) and counters sampled at scrape time."""
+        self._collectors.append((help_text, collector))
+
+    def snapshot(self, agent: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Count, total and mean duration per stage, for logs and benchmarks."""
+        with self._lock:
+            return {
+                f"{key[0]}.{key[1]}": {"count": h.count, "sum": h.sum, "mean": h.sum / h.count if h.count else 0.0}
+                for key, h in self._histograms.items()
+                if agent is None or key[0] == agent
+            }
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format (0.0.4)."""
+        lines = [
+            "# HELP analysis_stage_duration_seconds Duration of analysis pipeline stages.",
+            "# TYPE analysis_stage_duration_seconds histogram"
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            errors = sorted(self._errors.items())
+            for (agent, stage), histogram in histograms:
+                labels = {"agent": agent, "stage": stage}
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"analysis_stage_duration_seconds_bucket{_labels({**labels, 'le': repr(bound)})} {cumulative}")
+                lines.append(f"analysis_stage_duration_seconds_bucket{_labels({**labels, 'le': '+Inf'})} {histogram.count}")
+                lines.append(f"analysis_stage_duration_seconds_sum{_labels(labels)} {histogram.sum}")
+                lines.append(f"analysis_stage_duration_seconds_count{_labels(labels)} {histogram.count}")
+
+        lines.append("# HELP analysis_stage_errors_total Analysis pipeline stages that raised.")
+        lines.append("# TYPE analysis_stage_errors_total counter")
+        for (agent, stage), count in errors:
+            lines.append(f"analysis_stage_errors_total{_labels({'agent': agent, 'stage': stage})} {count}")
+
+        for help_text, collector in self._collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                logger.warning("Metrics collector failed: %s", e)
+                continue
+            declared = set()
+            for name, labels, value in samples:
+                if name not in declared:
+                    declared.add(name)
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}")
+                lines.append(f"{name}{_labels(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Shared metrics for all analysis pipelines in this process
+pipeline_metrics = PipelineMetrics()
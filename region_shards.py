@@ -0,0 +1,180 @@
+"""
+Region-Sharded Agent Runs.
+
+Helpers for running one agent query per patent region (US, EP, CN, ...) concurrently
+instead of a single "all" query that covers every jurisdiction in turn:
+
+- resolve_regions: the requested regions, or PATENT_SHARD_REGIONS, normalized;
+- interleave_streams: merge per-region chunk streams as the chunks arrive;
+- RegionLineBuffer: turn interleaved token fragments into whole, region-labelled lines
+  so text/plain clients get a readable stream;
+- merge_results / merge_documents: combine the per-region results, dropping duplicates
+  (the same family often shows up in several jurisdictions' searches).
+"""
+
+import os
+import json
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+# Comma-separated default regions, e.g. "US,EP,CN,JP,KR,WO"; empty keeps one "all" query
+SHARD_REGIONS = [region.strip().upper() for region in os.getenv("PATENT_SHARD_REGIONS", "").split(",") if region.strip()]
+MAX_SHARDS = int(os.getenv("PATENT_MAX_SHARDS", "8"))
+# A partial line is flushed once it grows this long, so long lines still stream
+LINE_FLUSH_CHARS = 512
+
+# Fields that identify the same patent across region results, most specific first
+DEDUPE_KEYS = ("publication_number", "patent_number", "patent_id", "application_number", "id", "url", "link")
+
+_STREAM_END = object()
+
+
+def resolve_regions(requested: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Regions to query for one analysis.
+
+    Args:
+        requested: Regions from the request; None falls back to PATENT_SHARD_REGIONS
+
+    Returns:
+        List[str]: Unique upper-case regions, at most MAX_SHARDS; ["all"] when none apply
+    """
+    regions: List[str] = []
+    for region in (SHARD_REGIONS if requested is None else requested):
+        region = region.strip().upper()
+        if region and region != "ALL" and region not in regions:
+            regions.append(region)
+    if len(regions) > MAX_SHARDS:
+        logger.warning("Limiting patent region shards to %s of %s requested", MAX_SHARDS, len(regions))
+        regions = regions[:MAX_SHARDS]
+    return regions or ["all"]
+
+
+async def interleave_streams(streams: Dict[str, AsyncIterator[Any]]) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Yield (name, item) from several async streams in arrival order.
+
+    A stream that raises yields (name, exception) and ends; the others keep going.
+    Closing the interleaved stream cancels every source.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump(name: str, stream: AsyncIterator[Any]):
+        try:
+            async for item in stream:
+                queue.put_nowait((name, item))
+        except Exception as e:
+            queue.put_nowait((name, e))
+        finally:
+            queue.put_nowait((name, _STREAM_END))
+
+    tasks = [asyncio.create_task(pump(name, stream)) for name, stream in streams.items()]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            name, item = await queue.get()
+            if item is _STREAM_END:
+                remaining -= 1
+                continue
+            yield name, item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class RegionLineBuffer:
+    """Re-chunks one region's token fragments into whole lines prefixed with [REGION]."""
+
+    def __init__(self, region: str):
+        self.prefix = f"[{region}] "
+        self._pending = ""
+
+    def feed(self, text: str) -> str:
+        self._pending += text
+        if "\n" not in self._pending:
+            if len(self._pending) < LINE_FLUSH_CHARS:
+                return ""
+            # Break a very long line so the region keeps streaming
+            text, self._pending = self._pending, ""
+            return self.prefix + text + "\n"
+        complete, self._pending = self._pending.rsplit("\n", 1)
+        return "".join(self.prefix + line + "\n" for line in complete.split("\n"))
+
+    def flush(self) -> str:
+        text, self._pending = self._pending, ""
+        return self.prefix + text + "\n" if text else ""
+
+
+def _identity(item: Any) -> str:
+    if isinstance(item, dict):
+        for key in DEDUPE_KEYS:
+            value = item.get(key)
+            if value:
+                # Patent numbers are written with and without separators ("US 10,123,456 B2")
+                return f"{key}:" + "".join(ch for ch in str(value).upper() if ch.isalnum())
+    return json.dumps(item, sort_keys=True, default=str)
+
+
+def merge_results(shard_results: Dict[str, Any]) -> Any:
+    """
+    Merge per-region 'results' into one.
+
+    List results are concatenated in region order without duplicates; a patent found in
+    several regions is kept once with the regions listed under "regions". When any shard
+    returned a non-list value the results are kept per region instead.
+
+    Args:
+        shard_results: Region -> that shard's results (None/empty for failed shards)
+
+    Returns:
+        The merged results list, or a region -> results dict
+    """
+    present = {region: results for region, results in shard_results.items() if results}
+    if not all(isinstance(results, list) for results in present.values()):
+        return present
+
+    merged: List[Any] = []
+    seen: Dict[str, int] = {}
+    for region, results in present.items():
+        for item in results:
+            identity = _identity(item)
+            if identity in seen:
+                existing = merged[seen[identity]]
+                if isinstance(existing, dict) and region not in existing["regions"]:
+                    existing["regions"].append(region)
+                continue
+            seen[identity] = len(merged)
+            merged.append({**item, "regions": [region]} if isinstance(item, dict) else item)
+    logger.info("Merged %s region results into %s unique",
+                sum(len(results) for results in present.values()), len(merged))
+    return merged
+
+
+def merge_documents(shard_documents: Dict[str, Optional[dict]], merged_results: Any) -> Optional[dict]:
+    """
+    Combine per-region JSON documents: the merged results plus each shard's other fields.
+
+    Returns:
+        The combined document, or None when no shard produced JSON
+    """
+    documents = {region: document for region, document in shard_documents.items() if isinstance(document, dict)}
+    if not documents:
+        return None
+    return {
+        "region": list(shard_documents),
+        "results": merged_results,
+        "shards": {
+            region: {key: value for key, value in document.items() if key != "results"}
+            for region, document in documents.items()
+        }
+    }
+
+
+def combine_texts(shard_texts: Dict[str, str]) -> str:
+    """Full response text of a sharded run: each region's output under its own heading."""
+    return "\n\n".join(f"## Region: {region}\n\n{text}" for region, text in shard_texts.items())
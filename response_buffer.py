@@ -0,0 +1,62 @@
+"""
+Agent Response Buffer.
+
+Single-copy accumulator for streamed agent output shared by the analysis streamers.
+Parts are appended in linear time and joined once; the extraction and upload stages
+read the joined text and the sub-agent / last-agent split from the same buffer.
+"""
+
+from typing import List, Optional
+
+
+class ResponseBuffer:
+    def __init__(self):
+        self._parts: List[str] = []
+        self._text: Optional[str] = None
+        self._part_count = 0
+        self._last_start = 0
+        self._length = 0
+
+    def append(self, part: str):
+        """Append a streamed text part."""
+        if self._text is not None:
+            # Re-open a frozen buffer; this only happens if a stream is resumed after reading
+            self._parts = [self._text]
+            self._text = None
+        self._parts.append(part)
+        self._part_count += 1
+        self._last_start = self._length
+        self._length += len(part)
+
+    def text(self) -> str:
+        """
+        Return the full response text.
+
+        The parts are joined once and released, so the buffer holds a single copy.
+        """
+        if self._text is None:
+            self._text = "".join(self._parts)
+            self._parts = []
+        return self._text
+
+    def sub_agents_text(self) -> Optional[str]:
+        """Return the output of every part except the last, or None for single-part responses."""
+        if self._part_count < 2:
+            return None
+        return self.text()[:self._last_start]
+
+    def last_agent_text(self) -> Optional[str]:
+        """Return the last part, or None for single-part responses."""
+        if self._part_count < 2:
+            return None
+        return self.text()[self._last_start:]
+
+    @property
+    def part_count(self) -> int:
+        return self._part_count
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bool__(self) -> bool:
+        return self._length > 0
@@ -0,0 +1,187 @@
+"""
+Startup Cost Tracking, Lazy Loading and Warm-Up.
+
+The analysis services used to import vertexai, google.adk and google.cloud.storage and
+initialise the Vertex AI client at import time, which made every worker boot (and
+autoscaling cold start) pay for clients it might not need yet, and made the modules
+impossible to import offline. Instead:
+
+- lazy_module / lazy_callable / lazy_object defer an import to first use;
+- ensure_vertexai_client initialises the centralized client once, on first use;
+- register_warmup collects hooks (client init, agent handles, session services) that
+  schedule_warmup runs on a background thread once the server is up, so the first
+  request does not pay for them either. WARMUP_ON_STARTUP=true schedules it
+  automatically WARMUP_DELAY_SECONDS after the first hook is registered;
+- every deferred import, client initialisation and warm-up step is timed, and
+  startup_report() returns the timings (also exported as metrics).
+"""
+
+import os
+import time
+import importlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .pipeline_metrics import pipeline_metrics
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower() == "true"
+WARMUP_DELAY_SECONDS = float(os.getenv("WARMUP_DELAY_SECONDS", "2"))
+
+_BOOT_STARTED = time.perf_counter()
+_lock = threading.Lock()
+_timings: Dict[str, float] = {}
+_warmups: List[Tuple[str, Callable[[], Any]]] = []
+_warmup_state: Dict[str, Any] = {"scheduled": False, "started_at": None, "finished_at": None, "failed": []}
+_vertexai_lock = threading.Lock()
+_vertexai_ready = False
+
+
+def record_timing(step: str, seconds: float):
+    """Record the cost of one startup step, e.g. "import:google.cloud.storage"."""
+    with _lock:
+        _timings[step] = _timings.get(step, 0.0) + seconds
+
+
+@contextmanager
+def timed(step: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(step, time.perf_counter() - started)
+
+
+class LazyModule:
+    """Module proxy that imports the module on first attribute access."""
+
+    def __init__(self, name: str, package: Optional[str] = None):
+        self._name = name
+        self._package = package
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with timed(f"import:{self._name.lstrip('.')}"):
+                self._module = importlib.import_module(self._name, self._package)
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+
+def lazy_module(name: str, package: Optional[str] = None) -> LazyModule:
+    return LazyModule(name, package)
+
+
+def lazy_callable(module_name: str, attr: str, package: Optional[str] = None) -> Callable[..., Any]:
+    """A function that imports module_name on its first call and forwards to module_name.attr."""
+    module = LazyModule(module_name, package)
+
+    def call(*args, **kwargs):
+        return getattr(module._load(), attr)(*args, **kwargs)
+
+    call.__name__ = attr
+    return call
+
+
+class LazyObject:
+    """Proxy for a module-level object (e.g. a shared service instance) resolved on first use."""
+
+    def __init__(self, module_name: str, attr: str, package: Optional[str] = None):
+        self._module = LazyModule(module_name, package)
+        self._attr = attr
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(getattr(self._module._load(), self._attr), name)
+
+
+def lazy_object(module_name: str, attr: str, package: Optional[str] = None) -> LazyObject:
+    return LazyObject(module_name, attr, package)
+
+
+def ensure_vertexai_client():
+    """Initialise the centralized Vertex AI client once, on first use (blocking)."""
+    global _vertexai_ready
+    if _vertexai_ready:
+        return
+    with _vertexai_lock:
+        if _vertexai_ready:
+            return
+        with timed("init:vertexai"):
+            vertexai_utils = importlib.import_module("app.utils.vertexai_utils")
+            vertexai_utils.get_vertexai_client()
+        _vertexai_ready = True
+
+
+def register_warmup(name: str, hook: Callable[[], Any]):
+    """
+    Add a blocking warm-up step, run in registration order by schedule_warmup.
+
+    With WARMUP_ON_STARTUP=true the first registration schedules the warm-up.
+    """
+    with _lock:
+        _warmups.append((name, hook))
+    if WARMUP_ON_STARTUP:
+        schedule_warmup()
+
+
+def _run_warmups(delay: float):
+    if delay > 0:
+        time.sleep(delay)
+    _warmup_state["started_at"] = time.perf_counter() - _BOOT_STARTED
+    with _lock:
+        hooks = list(_warmups)
+    for name, hook in hooks:
+        try:
+            with timed(f"warmup:{name}"):
+                hook()
+        except Exception as e:
+            _warmup_state["failed"].append(name)
+            logger.warning("Warm-up step %s failed: %s", name, e)
+    _warmup_state["finished_at"] = time.perf_counter() - _BOOT_STARTED
+    logger.info("Warm-up finished in %.2fs: %s", _warmup_state["finished_at"] - _warmup_state["started_at"],
+                ", ".join(f"{step}={seconds:.3f}s" for step, seconds in sorted(_timings.items())))
+
+
+def schedule_warmup(delay: float = WARMUP_DELAY_SECONDS) -> bool:
+    """
+    Run the registered warm-up steps once on a daemon thread.
+
+    Call it from the application's startup hook; the delay lets the server start
+    listening first so health checks are not held up.
+
+    Returns:
+        bool: False if warm-up was already scheduled
+    """
+    with _lock:
+        if _warmup_state["scheduled"]:
+            return False
+        _warmup_state["scheduled"] = True
+    threading.Thread(target=_run_warmups, args=(delay,), name="service-warmup", daemon=True).start()
+    return True
+
+
+def startup_report() -> Dict[str, Any]:
+    """Timings of deferred imports, client initialisation and warm-up steps since boot."""
+    with _lock:
+        timings = dict(sorted(_timings.items()))
+    return {
+        "seconds_since_boot": time.perf_counter() - _BOOT_STARTED,
+        "timings": timings,
+        "warmup": {key: (list(value) if isinstance(value, list) else value) for key, value in _warmup_state.items()}
+    }
+
+
+def _startup_samples():
+    with _lock:
+        timings = list(_timings.items())
+    for step, seconds in timings:
+        yield "service_startup_step_seconds", {"step": step}, seconds
+
+
+pipeline_metrics.register_collector("Time spent in deferred imports, client initialisation and warm-up.", _startup_samples)
@@ -0,0 +1,74 @@
+"""
+Structured Stream Events.
+
+Streaming analyses yield plain text chunks for agent tokens and StreamEvent objects for
+structured side-channel messages (e.g. a parsed JSON result that closed mid-stream, a
+saved artifact or an error). Renderers turn the mixed stream into the wire format sent
+to clients: text/plain for existing clients, Server-Sent Events for typed consumers.
+
+Event types: token (agent text), progress, structured_json, saved_artifact, error.
+"""
+
+import json
+from typing import Any, AsyncIterator, Optional, Union
+
+
+class StreamEvent:
+    def __init__(self, event: str, data: Any, text: Optional[str] = None):
+        self.event = event
+        self.data = data
+        # What text/plain clients see instead of the trailer frame, e.g. the
+        # human-readable "saved to" line; "" hides the event from them entirely
+        self.text = text
+
+
+StreamItem = Union[str, StreamEvent]
+
+
+def _compact(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def render_text(item: StreamItem) -> str:
+    """
+    Render a stream item for a text/plain response.
+
+    Events are written as their text fallback when they have one, otherwise as a
+    trailer frame on their own line: [[event]]{compact json}
+    """
+    if isinstance(item, StreamEvent):
+        if item.text is not None:
+            return item.text
+        payload = json.dumps(item.data, separators=(",", ":"), default=str)
+        return f"\n[[{item.event}]]{payload}\n"
+    return item
+
+
+def render_sse(item: StreamItem, event_id: Optional[int] = None) -> str:
+    """
+    Render a stream item as one Server-Sent Events frame.
+
+    Text chunks become token events. The id, when given, is the byte offset of the
+    text/plain rendering after this item, which the resume endpoints accept.
+    """
+    if isinstance(item, StreamEvent):
+        event, payload = item.event, _compact(item.data)
+    else:
+        event, payload = "token", _compact({"text": item})
+    frame = f"event: {event}\n"
+    if event_id is not None:
+        frame += f"id: {event_id}\n"
+    # Compact JSON never contains raw newlines, so the payload is a single data line
+    return frame + f"data: {payload}\n\n"
+
+
+async def render_text_stream(source: AsyncIterator[StreamItem]) -> AsyncIterator[str]:
+    """Render a mixed stream of chunks and events as text/plain."""
+    try:
+        async for item in source:
+            text = render_text(item)
+            if text:
+                yield text
+    finally:
+        # Close the source right away when the client disconnects so it can clean up
+        await source.aclose()
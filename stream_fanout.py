@@ -0,0 +1,197 @@
+"""
+Single-Flight Stream Fan-Out.
+
+Deduplicates concurrent identical streaming analyses. The first caller for a key starts
+the producer as a background task; later callers attach to the running flight and
+receive every chunk produced so far followed by the live tail. When the last subscriber
+disconnects and nobody resumes within STREAM_RESUME_GRACE_SECONDS, the producer is
+cancelled so abandoned runs release their resources.
+
+Each flight also writes its chunks to a durable StreamLog under a stream id, so a client
+that lost its connection can resume from a byte offset, during or after the run.
+
+A producer that raises ends its flight with a terminal error event, which every
+subscriber and every later resume receives like the producers' own error events.
+"""
+
+import os
+import asyncio
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional, Tuple
+from .stream_log import StreamLog, locate_offset, read_stream_log, replay_items
+from .stream_events import StreamEvent
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+# How long an abandoned flight keeps running so a client can resume after a network blip
+RESUME_GRACE_SECONDS = float(os.getenv("STREAM_RESUME_GRACE_SECONDS", "30"))
+
+
+class StreamFlight:
+    def __init__(self, key: Hashable, log: Optional[StreamLog] = None):
+        self.key = key
+        self.log = log
+        self.stream_id = log.stream_id if log else None
+        self.chunks: List[Any] = []
+        self.done = False
+        # Message of the exception that ended the producer, None for a clean end
+        self.error: Optional[str] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._abandon_timer: Optional[asyncio.TimerHandle] = None
+        self._condition = asyncio.Condition()
+
+    def response_headers(self) -> Dict[str, str]:
+        """Headers that tell the client which stream id to resume from."""
+        return {"X-Stream-Id": self.stream_id} if self.stream_id else {}
+
+    async def _notify(self):
+        async with self._condition:
+            self._condition.notify_all()
+
+    def _publish(self, chunk: Any):
+        if self.log:
+            self.log.append(chunk)
+        self.chunks.append(chunk)
+
+    async def _run(self, source: AsyncIterator[Any]):
+        try:
+            async for chunk in source:
+                self._publish(chunk)
+                await self._notify()
+        except Exception as e:
+            logger.exception("Stream flight %s failed: %s", self.key, e)
+            self.error = str(getattr(e, "detail", e))
+            self._publish(StreamEvent("error", {"message": self.error, "terminal": True},
+                                      text=f"\n❌ Error: {self.error}\n"))
+        finally:
+            if self.log:
+                self.log.close(error=self.error)
+            self.done = True
+            await self._notify()
+            if self.log:
+                await self.log.publish()
+
+    async def subscribe(self, offset: int = 0) -> AsyncIterator[Any]:
+        """
+        Yield every chunk of the flight starting at the given offset, then the live tail.
+
+        Args:
+            offset: Index of the first chunk to deliver
+
+        Yields:
+            Chunks in production order
+        """
+        self.subscribers += 1
+        if self._abandon_timer:
+            # A client came back within the grace period
+            self._abandon_timer.cancel()
+            self._abandon_timer = None
+        index = offset
+        try:
+            while True:
+                while index < len(self.chunks):
+                    yield self.chunks[index]
+                    index += 1
+                if self.done:
+                    break
+                async with self._condition:
+                    await self._condition.wait_for(lambda: index < len(self.chunks) or self.done)
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self.task:
+                if RESUME_GRACE_SECONDS > 0 and self.log:
+                    self._abandon_timer = asyncio.get_running_loop().call_later(RESUME_GRACE_SECONDS, self._cancel_if_abandoned)
+                else:
+                    self._cancel_if_abandoned()
+
+    def _cancel_if_abandoned(self):
+        self._abandon_timer = None
+        if self.subscribers == 0 and not self.done and self.task:
+            # Every client has gone away: stop the upstream run instead of finishing it for nobody
+            logger.info("All subscribers left stream flight %s, cancelling producer", self.key)
+            self.task.cancel()
+
+
+class SingleFlightRegistry:
+    def __init__(self):
+        self._flights: Dict[Hashable, StreamFlight] = {}
+        self._by_stream_id: Dict[str, StreamFlight] = {}
+
+    def get(self, key: Hashable) -> Optional[StreamFlight]:
+        """Return the running flight for a key, if any."""
+        flight = self._flights.get(key)
+        if flight and not flight.done:
+            return flight
+        return None
+
+    def start(self, key: Hashable, source: AsyncIterator[Any]) -> StreamFlight:
+        """
+        Start a new flight that drains the given async iterator in the background.
+
+        Callers must check get() first; starting a key that is already running
+        replaces the registry entry but leaves the earlier flight running.
+
+        Args:
+            key: Deduplication key, e.g. (analysis_type, innovation_id)
+            source: Async iterator producing the stream chunks
+
+        Returns:
+            StreamFlight: The newly started flight
+        """
+        try:
+            log = StreamLog(key)
+        except OSError as e:
+            # Resumability is best effort; never fail the analysis because the log can't be written
+            logger.warning("Stream log unavailable for %s: %s", key, e)
+            log = None
+        flight = StreamFlight(key, log)
+        self._flights[key] = flight
+        if flight.stream_id:
+            self._by_stream_id[flight.stream_id] = flight
+
+        def _release(_task: asyncio.Task):
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            self._by_stream_id.pop(flight.stream_id, None)
+
+        flight.task = asyncio.create_task(flight._run(source))
+        flight.task.add_done_callback(_release)
+        return flight
+
+    async def resume(self, stream_id: str, offset: int = 0) -> Optional[Tuple[Any, AsyncIterator[Any]]]:
+        """
+        Reopen a stream from a byte offset of its rendered text/plain output.
+
+        A running flight replays the missed chunks from memory and continues on the live
+        tail; a finished one is replayed from its durable log.
+
+        Args:
+            stream_id: Id sent to the client in the X-Stream-Id header
+            offset: Number of bytes the client already received
+
+        Returns:
+            (key, rendered chunk iterator), or None if the stream is unknown. Callers must
+            check that the key belongs to a resource the user may read.
+        """
+        flight = self._by_stream_id.get(stream_id)
+        if flight and flight.log:
+            index, skip = flight.log.locate(offset)
+            return flight.key, replay_items(flight.subscribe(index), skip)
+
+        stored = await asyncio.to_thread(read_stream_log, stream_id)
+        if stored is None:
+            return None
+        index, skip = locate_offset(stored.offsets, offset)
+
+        async def _replay():
+            for item in stored.items[index:]:
+                yield item
+
+        key = tuple(stored.key) if isinstance(stored.key, list) else stored.key
+        return key, replay_items(_replay(), skip)
+
+
+# Shared registry for all streaming analyses in this process
+stream_flights = SingleFlightRegistry()
@@ -0,0 +1,307 @@
+"""
+Durable Stream Logs.
+
+Every streaming analysis appends its chunks, numbered and with their byte offset in the
+rendered text/plain output, to an append-only JSON-lines log. A client whose connection
+broke can reconnect with the number of bytes it already received and get the missing
+output replayed, followed by the live tail if the run is still going.
+
+Logs are spooled to local disk (STREAM_LOG_DIR). With STREAM_LOG_BACKEND=gcs the finished
+log is also uploaded to GCS, so it can be replayed by any instance after a restart.
+
+Appending only buffers the record; a writer task flushes the buffer in a worker thread,
+so chunk-rate disk writes and the periodic sweep of old logs never block the event loop.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import tempfile
+import threading
+from typing import Any, AsyncIterator, Dict, Hashable, Iterator, List, Optional, Tuple, Union
+
+from .stream_events import StreamEvent, StreamItem, render_text
+from .startup import lazy_callable
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+# google.cloud.storage is imported on the first GCS call
+get_storage_client = lazy_callable("app.utils.storage", "get_storage_client")
+
+STREAM_LOG_DIR = os.getenv("STREAM_LOG_DIR", os.path.join(tempfile.gettempdir(), "stream_logs"))
+STREAM_LOG_BACKEND = os.getenv("STREAM_LOG_BACKEND", "local").lower()
+STREAM_LOG_RETENTION_SECONDS = int(os.getenv("STREAM_LOG_RETENTION_SECONDS", "86400"))
+BUCKET_NAME = "triz_bucket"
+GCS_LOG_PREFIX = "stream_logs"
+
+# Local logs older than the retention are swept at most this often
+_PRUNE_INTERVAL_SECONDS = 600
+_last_prune = 0.0
+
+
+def _local_path(stream_id: str) -> str:
+    return os.path.join(STREAM_LOG_DIR, f"{stream_id}.jsonl")
+
+
+def _blob_path(stream_id: str) -> str:
+    return f"{GCS_LOG_PREFIX}/{stream_id}.jsonl"
+
+
+def _valid_stream_id(stream_id: str) -> bool:
+    # Stream ids are uuid4 hex strings; anything else must never reach a file path
+    return len(stream_id) == 32 and all(c in "0123456789abcdef" for c in stream_id)
+
+
+def _encode_item(item: StreamItem) -> Dict[str, Any]:
+    if isinstance(item, StreamEvent):
+        record = {"event": item.event, "data": item.data}
+        if item.text is not None:
+            record["text"] = item.text
+        return record
+    return {"chunk": item}
+
+
+def _decode_item(record: Dict[str, Any]) -> StreamItem:
+    if "event" in record:
+        return StreamEvent(record["event"], record["data"], record.get("text"))
+    return record["chunk"]
+
+
+def prune_stream_logs(now: Optional[float] = None):
+    """Delete local stream logs older than STREAM_LOG_RETENTION_SECONDS (blocking)."""
+    now = now or time.time()
+    if not os.path.isdir(STREAM_LOG_DIR):
+        return
+    try:
+        for name in os.listdir(STREAM_LOG_DIR):
+            path = os.path.join(STREAM_LOG_DIR, name)
+            if now - os.path.getmtime(path) > STREAM_LOG_RETENTION_SECONDS:
+                os.remove(path)
+    except OSError as e:
+        logger.warning("Failed to prune stream logs in %s: %s", STREAM_LOG_DIR, e)
+
+
+def schedule_stream_log_prune():
+    """Sweep old local logs on a background thread, at most every _PRUNE_INTERVAL_SECONDS."""
+    global _last_prune
+    now = time.time()
+    if now - _last_prune < _PRUNE_INTERVAL_SECONDS:
+        return
+    _last_prune = now
+    threading.Thread(target=prune_stream_logs, args=(now,), name="stream-log-prune", daemon=True).start()
+
+
+class StreamLog:
+    """Append-only, sequence-numbered log of one stream's items."""
+
+    def __init__(self, key: Hashable, stream_id: Optional[str] = None):
+        self.stream_id = stream_id or uuid.uuid4().hex
+        self.key = list(key) if isinstance(key, tuple) else key
+        self.length = 0
+        # Byte offset at which each item starts in the rendered output
+        self.offsets: List[int] = []
+        self.closed = False
+        self._file = None
+        self._failed = False
+        self._pending: List[str] = []
+        self._writer: Optional[asyncio.Task] = None
+        schedule_stream_log_prune()
+        self._write({"stream_id": self.stream_id, "key": self.key, "created_at": time.time()})
+
+    def _write(self, record: Dict[str, Any]):
+        self._pending.append(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self):
+        # Records appended while a batch is being written go out with the next batch
+        while self._pending:
+            lines, self._pending = self._pending, []
+            await asyncio.to_thread(self._write_lines, lines)
+        if self.closed:
+            await asyncio.to_thread(self._close_file)
+
+    def _write_lines(self, lines: List[str]):
+        if self._failed:
+            return
+        try:
+            if self._file is None:
+                os.makedirs(STREAM_LOG_DIR, exist_ok=True)
+                self._file = open(_local_path(self.stream_id), "a", encoding="utf-8")
+            self._file.write("".join(lines))
+            # Flush per batch so a crashed process still leaves a replayable prefix
+            self._file.flush()
+        except OSError as e:
+            # Resumability is best effort; the live stream carries on without its log
+            logger.warning("Stream log %s disabled: %s", self.stream_id, e)
+            self._failed = True
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def append(self, item: StreamItem) -> int:
+        """
+        Append an item to the log.
+
+        Args:
+            item: Text chunk or StreamEvent
+
+        Returns:
+            int: Sequence number of the item
+        """
+        seq = len(self.offsets)
+        record = {"seq": seq, "offset": self.length}
+        record.update(_encode_item(item))
+        self._write(record)
+        self.offsets.append(self.length)
+        self.length += len(render_text(item).encode("utf-8"))
+        return seq
+
+    def locate(self, offset: int) -> Tuple[int, int]:
+        """
+        Map a byte offset in the rendered output to (sequence number, bytes to skip in that item).
+        """
+        return locate_offset(self.offsets, offset)
+
+    def close(self, error: Optional[str] = None):
+        """
+        Mark the log complete; safe to call more than once.
+
+        Args:
+            error: Why the stream failed, if it did not end cleanly
+        """
+        if self.closed:
+            return
+        self.closed = True
+        record = {"done": True, "length": self.length}
+        if error is not None:
+            record["error"] = error
+        self._write(record)
+
+    async def flushed(self):
+        """Wait until every appended record is on disk (and, once closed, the file is closed)."""
+        while self._writer is not None and not self._writer.done():
+            await asyncio.shield(self._writer)
+
+    async def publish(self):
+        """With the GCS backend, upload the closed log off the event loop."""
+        await self.flushed()
+        if STREAM_LOG_BACKEND != "gcs" or self._failed:
+            return
+        try:
+            await asyncio.to_thread(self._upload)
+        except Exception as e:
+            logger.error("Failed to upload stream log %s: %s", self.stream_id, e)
+
+    def _upload(self):
+        client = get_storage_client()
+        blob = client.bucket(BUCKET_NAME).blob(_blob_path(self.stream_id))
+        blob.upload_from_filename(_local_path(self.stream_id), content_type="application/x-ndjson")
+
+
+def locate_offset(offsets: List[int], offset: int) -> Tuple[int, int]:
+    """
+    Find the item containing a byte offset.
+
+    Args:
+        offsets: Start offset of every item, ascending
+        offset: Number of bytes the client already received
+
+    Returns:
+        Tuple[int, int]: Index of the first item to send and bytes to drop from its start
+    """
+    if offset <= 0 or not offsets:
+        return 0, 0
+    # Last item starting at or before the offset
+    low, high = 0, len(offsets) - 1
+    while low < high:
+        middle = (low + high + 1) // 2
+        if offsets[middle] <= offset:
+            low = middle
+        else:
+            high = middle - 1
+    return low, offset - offsets[low]
+
+
+class StoredStreamLog:
+    def __init__(self, header: Dict[str, Any], items: List[StreamItem], offsets: List[int], done: bool,
+                 error: Optional[str] = None):
+        self.stream_id = header.get("stream_id")
+        self.key = header.get("key")
+        self.items = items
+        self.offsets = offsets
+        self.done = done
+        self.error = error
+
+
+def _parse_log(lines: Iterator[str]) -> Optional[StoredStreamLog]:
+    header: Dict[str, Any] = {}
+    items: List[StreamItem] = []
+    offsets: List[int] = []
+    done = False
+    error = None
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # A torn final line from a crashed writer ends the replayable prefix
+            break
+        if "stream_id" in record:
+            header = record
+        elif record.get("done"):
+            done = True
+            error = record.get("error")
+        else:
+            items.append(_decode_item(record))
+            offsets.append(record["offset"])
+    if not header:
+        return None
+    return StoredStreamLog(header, items, offsets, done, error)
+
+
+def read_stream_log(stream_id: str) -> Optional[StoredStreamLog]:
+    """
+    Load a stream log from local disk, falling back to GCS (blocking).
+
+    Returns:
+        StoredStreamLog or None if the log does not exist
+    """
+    if not _valid_stream_id(stream_id):
+        return None
+    path = _local_path(stream_id)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as log_file:
+            return _parse_log(log_file)
+    if STREAM_LOG_BACKEND != "gcs":
+        return None
+    blob = get_storage_client().bucket(BUCKET_NAME).blob(_blob_path(stream_id))
+    if not blob.exists():
+        return None
+    return _parse_log(iter(blob.download_as_text().splitlines()))
+
+
+async def replay_items(items: AsyncIterator[StreamItem], skip: int) -> AsyncIterator[Union[str, bytes]]:
+    """
+    Render items as text/plain, dropping the first `skip` bytes of the first one.
+
+    The client may have stopped in the middle of a multi-byte character, so the
+    partial item is sent as raw bytes.
+    """
+    first = True
+    try:
+        async for item in items:
+            text = render_text(item)
+            if first and skip:
+                yield text.encode("utf-8")[skip:]
+            elif text:
+                yield text
+            first = False
+    finally:
+        if hasattr(items, "aclose"):
+            await items.aclose()
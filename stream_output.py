@@ -0,0 +1,208 @@
+"""
+Streaming Output Layer.
+
+Builds the StreamingResponse for a stream of text chunks and StreamEvents:
+
+- Coalescing: consecutive text chunks are merged until STREAM_COALESCE_BYTES characters
+  are pending or the oldest one has waited STREAM_COALESCE_MS, so token fragments go
+  out as a few larger writes while the added latency stays bounded. Events flush the
+  pending text and are never delayed behind it.
+- Format: text/plain (the existing wire format) or Server-Sent Events with typed
+  events (token, progress, structured_json, saved_artifact, error).
+- Compression: optional gzip, flushed per frame so clients still read incrementally.
+
+Set both STREAM_COALESCE_BYTES and STREAM_COALESCE_MS to 0 to send every chunk as is.
+"""
+
+import os
+import zlib
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Union
+
+from fastapi.responses import StreamingResponse
+
+from .stream_events import StreamEvent, StreamItem, render_sse, render_text, render_text_stream
+from .pipeline_metrics import pipeline_metrics
+import logging
+
+# Module logger
+logger = logging.getLogger(__name__)
+
+STREAM_COALESCE_BYTES = int(os.getenv("STREAM_COALESCE_BYTES", "4096"))
+STREAM_COALESCE_MS = float(os.getenv("STREAM_COALESCE_MS", "25"))
+STREAM_GZIP_LEVEL = int(os.getenv("STREAM_GZIP_LEVEL", "6"))
+
+# Running totals for monitoring: items produced vs frames written
+stream_output_totals = {"items": 0, "frames": 0}
+
+_END = object()
+
+
+class _SourceFailure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _join(pending: List[Union[str, bytes]]) -> Union[str, bytes]:
+    if len(pending) == 1:
+        return pending[0]
+    if any(isinstance(chunk, bytes) for chunk in pending):
+        # A resumed stream may start with a partial multi-byte character
+        return b"".join(chunk if isinstance(chunk, bytes) else chunk.encode("utf-8") for chunk in pending)
+    return "".join(pending)
+
+
+async def coalesce_stream(source: AsyncIterator[StreamItem], max_bytes: int = STREAM_COALESCE_BYTES,
+                          max_delay: float = STREAM_COALESCE_MS / 1000) -> AsyncIterator[StreamItem]:
+    """
+    Merge consecutive text chunks within a size and time window.
+
+    Args:
+        source: Text chunks (str or bytes) and StreamEvents
+        max_bytes: Flush once this many characters are pending (0 = no size limit)
+        max_delay: Flush once the oldest pending chunk is this old, in seconds (0 = no
+            time limit)
+
+    Yields:
+        Merged text chunks and the events in their original order
+    """
+    if max_bytes <= 0 and max_delay <= 0:
+        try:
+            async for item in source:
+                stream_output_totals["items"] += 1
+                stream_output_totals["frames"] += 1
+                yield item
+        finally:
+            await source.aclose()
+        return
+
+    # The source is read by a separate task so a quiet agent cannot hold pending text
+    # back past its deadline
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for item in source:
+                queue.put_nowait(item)
+        except Exception as e:
+            queue.put_nowait(_SourceFailure(e))
+        queue.put_nowait(_END)
+
+    loop = asyncio.get_running_loop()
+    pump_task = loop.create_task(pump())
+    pending: List[Union[str, bytes]] = []
+    pending_size = 0
+    deadline = 0.0
+    try:
+        while True:
+            if pending and max_delay > 0 and loop.time() >= deadline:
+                stream_output_totals["frames"] += 1
+                yield _join(pending)
+                pending, pending_size = [], 0
+            if not queue.empty():
+                item = queue.get_nowait()
+            elif pending and max_delay > 0:
+                try:
+                    item = await asyncio.wait_for(queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    continue
+            else:
+                item = await queue.get()
+
+            if item is _END or isinstance(item, (_SourceFailure, StreamEvent)):
+                if pending:
+                    stream_output_totals["frames"] += 1
+                    yield _join(pending)
+                    pending, pending_size = [], 0
+                if item is _END:
+                    break
+                if isinstance(item, _SourceFailure):
+                    raise item.error
+                stream_output_totals["items"] += 1
+                stream_output_totals["frames"] += 1
+                yield item
+                continue
+
+            stream_output_totals["items"] += 1
+            if not pending:
+                deadline = loop.time() + max_delay
+            pending.append(item)
+            pending_size += len(item)
+            if max_bytes > 0 and pending_size >= max_bytes:
+                stream_output_totals["frames"] += 1
+                yield _join(pending)
+                pending, pending_size = [], 0
+    finally:
+        pump_task.cancel()
+        try:
+            await pump_task
+        except asyncio.CancelledError:
+            pass
+        await source.aclose()
+
+
+async def render_sse_stream(source: AsyncIterator[StreamItem]) -> AsyncIterator[str]:
+    """
+    Render a mixed stream of chunks and events as Server-Sent Events.
+
+    Every frame's id is the byte offset of the text/plain rendering after it, so an SSE
+    client can continue through the resume endpoints with its last event id.
+    """
+    offset = 0
+    try:
+        async for item in source:
+            offset += len(render_text(item).encode("utf-8"))
+            yield render_sse(item, offset)
+    finally:
+        await source.aclose()
+
+
+async def gzip_stream(source: AsyncIterator[Union[str, bytes]], level: int = STREAM_GZIP_LEVEL) -> AsyncIterator[bytes]:
+    """Gzip a rendered stream, sync-flushing after every frame."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        async for chunk in source:
+            data = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        await source.aclose()
+
+
+def streaming_response(source: AsyncIterator[StreamItem], output_format: str = "text", gzip: bool = False,
+                       headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """
+    Build the StreamingResponse for an analysis stream.
+
+    Args:
+        source: Chunks and events, e.g. flight.subscribe() or a resumed stream
+        output_format: "text" for text/plain or "sse" for text/event-stream
+        gzip: Compress the body with gzip
+        headers: Extra response headers, e.g. flight.response_headers()
+
+    Returns:
+        StreamingResponse: The coalesced, rendered (and compressed) stream
+    """
+    headers = dict(headers or {})
+    items = coalesce_stream(source)
+    if output_format == "sse":
+        body = render_sse_stream(items)
+        media_type = "text/event-stream"
+        headers.update({"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    else:
+        body = render_text_stream(items)
+        media_type = "text/plain"
+    if gzip:
+        body = gzip_stream(body)
+        headers.update({"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+def _stream_output_samples():
+    for field, value in stream_output_totals.items():
+        yield f"stream_output_{field}_total", {}, value
+
+
+pipeline_metrics.register_collector("Streamed items and the frames they were coalesced into.", _stream_output_samples)